@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import tickets, agents, analytics, ml
+from app.api.v1 import tickets, agents, analytics, ml, routing
 
 router = APIRouter()
 
@@ -8,3 +8,4 @@ router.include_router(tickets.router, prefix="/tickets", tags=["tickets"])
 router.include_router(agents.router, prefix="/agents", tags=["agents"])
 router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 router.include_router(ml.router, prefix="/ml", tags=["machine-learning"])
+router.include_router(routing.router, prefix="/routing", tags=["routing"])
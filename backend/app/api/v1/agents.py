@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.services.analytics_cache import invalidate_analytics_async
 from app.schemas import AgentCreate, AgentUpdate, AgentResponse
-from models.ticket import Agent
+from models.ticket import Agent, Ticket, TicketStatus
 
 router = APIRouter()
 
 
 @router.post("/", response_model=AgentResponse, status_code=status.HTTP_201_CREATED)
-def create_agent(agent: AgentCreate, db: Session = Depends(get_db)):
+async def create_agent(agent: AgentCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new agent"""
     
     # Check if email already exists
-    existing_agent = db.query(Agent).filter(Agent.email == agent.email).first()
+    existing_agent = await db.scalar(select(Agent).where(Agent.email == agent.email))
     if existing_agent:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -26,41 +28,42 @@ def create_agent(agent: AgentCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_agent)
-    db.commit()
-    db.refresh(db_agent)
+    await db.commit()
+    await invalidate_analytics_async()
+    await db.refresh(db_agent)
     return db_agent
 
 
 @router.get("/", response_model=List[AgentResponse])
-def get_agents(
+async def get_agents(
     skip: int = 0,
     limit: int = 100,
     is_available: bool = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all agents"""
-    query = db.query(Agent)
+    query = select(Agent)
     
     if is_available is not None:
-        query = query.filter(Agent.is_available == is_available)
+        query = query.where(Agent.is_available == is_available)
     
-    agents = query.offset(skip).limit(limit).all()
-    return agents
+    agents = await db.scalars(query.offset(skip).limit(limit))
+    return agents.all()
 
 
 @router.get("/{agent_id}", response_model=AgentResponse)
-def get_agent(agent_id: int, db: Session = Depends(get_db)):
+async def get_agent(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific agent by ID"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = await db.get(Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
 
 @router.put("/{agent_id}", response_model=AgentResponse)
-def update_agent(agent_id: int, agent_update: AgentUpdate, db: Session = Depends(get_db)):
+async def update_agent(agent_id: int, agent_update: AgentUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update an agent"""
-    db_agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    db_agent = await db.get(Agent, agent_id)
     if not db_agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
@@ -68,46 +71,52 @@ def update_agent(agent_id: int, agent_update: AgentUpdate, db: Session = Depends
     for field, value in update_data.items():
         setattr(db_agent, field, value)
     
-    db.commit()
-    db.refresh(db_agent)
+    await db.commit()
+    await invalidate_analytics_async()
+    await db.refresh(db_agent)
     return db_agent
 
 
 @router.delete("/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_agent(agent_id: int, db: Session = Depends(get_db)):
+async def delete_agent(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete an agent (soft delete by setting is_active=False)"""
-    db_agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    db_agent = await db.get(Agent, agent_id)
     if not db_agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     # Soft delete
     db_agent.is_active = False
-    db.commit()
+    await db.commit()
+    await invalidate_analytics_async()
     return None
 
 
 @router.get("/{agent_id}/tickets")
-def get_agent_tickets(agent_id: int, db: Session = Depends(get_db)):
+async def get_agent_tickets(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all tickets assigned to an agent"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = await db.get(Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    return agent.tickets
+    tickets = await db.scalars(select(Ticket).where(Ticket.assigned_to == agent_id).order_by(Ticket.id))
+    return tickets.all()
 
 
 @router.get("/{agent_id}/stats")
-def get_agent_stats(agent_id: int, db: Session = Depends(get_db)):
+async def get_agent_stats(agent_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get performance statistics for an agent"""
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = await db.get(Agent, agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    from models.ticket import TicketStatus
-    
-    open_tickets = len([t for t in agent.tickets if t.status == TicketStatus.OPEN])
-    in_progress_tickets = len([t for t in agent.tickets if t.status == TicketStatus.IN_PROGRESS])
-    resolved_tickets = len([t for t in agent.tickets if t.status == TicketStatus.RESOLVED])
+    status_counts = dict((await db.execute(
+        select(Ticket.status, func.count(Ticket.id)).where(
+            Ticket.assigned_to == agent_id
+        ).group_by(Ticket.status)
+    )).all())
+    open_tickets = status_counts.get(TicketStatus.OPEN, 0)
+    in_progress_tickets = status_counts.get(TicketStatus.IN_PROGRESS, 0)
+    resolved_tickets = status_counts.get(TicketStatus.RESOLVED, 0)
     
     return {
         "agent_id": agent.id,
@@ -125,7 +134,7 @@ def get_agent_stats(agent_id: int, db: Session = Depends(get_db)):
         },
         "capacity": {
             "max_tickets": agent.max_tickets,
-            "current_tickets": agent.current_ticket_count,
-            "available_slots": agent.max_tickets - agent.current_ticket_count
+            "current_tickets": agent.open_ticket_count,
+            "available_slots": agent.max_tickets - agent.open_ticket_count
         }
     }
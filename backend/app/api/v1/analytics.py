@@ -1,88 +1,95 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from sqlalchemy import func, and_
+from datetime import timedelta
 from collections import defaultdict
 
-from app.core.database import get_db
-from models.ticket import Ticket, Agent, TicketStatus, TicketCategory, TicketPriority
+from app.core.database import get_async_db
+from app.services.analytics_cache import cached_analytics, get_analytics_cache
+from app.services.rollups import utc_today
+from models.ticket import Ticket, TicketDailyStat, Agent, TicketStatus, TicketCategory, TicketPriority
 
 router = APIRouter()
 
 
+def _hours_between(db: Session, start, end):
+    """SQL expression for the hours between two timestamp columns"""
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 24
+    return func.extract("epoch", end - start) / 3600
+
+
 @router.get("/dashboard")
-def get_dashboard_analytics(db: Session = Depends(get_db)):
+async def get_dashboard_analytics(db: AsyncSession = Depends(get_async_db)):
     """Get comprehensive dashboard analytics"""
-    
-    # Ticket statistics
-    total_tickets = db.query(Ticket).count()
-    open_tickets = db.query(Ticket).filter(Ticket.status == TicketStatus.OPEN).count()
-    in_progress = db.query(Ticket).filter(Ticket.status == TicketStatus.IN_PROGRESS).count()
-    resolved = db.query(Ticket).filter(Ticket.status == TicketStatus.RESOLVED).count()
-    closed = db.query(Ticket).filter(Ticket.status == TicketStatus.CLOSED).count()
-    
-    # Category distribution
-    category_counts = db.query(
-        Ticket.category, 
-        func.count(Ticket.id)
-    ).group_by(Ticket.category).all()
-    
-    tickets_by_category = {cat: count for cat, count in category_counts if cat}
-    
-    # Priority distribution
-    priority_counts = db.query(
+    return await cached_analytics("dashboard", compute_dashboard_analytics, db)
+
+
+def compute_dashboard_analytics(db: Session):
+    """Dashboard analytics straight from the database"""
+    
+    # Ticket statistics and average resolution time (in hours) in one pass
+    is_resolved = and_(Ticket.status == TicketStatus.RESOLVED, Ticket.resolved_at.isnot(None))
+    ticket_row = db.query(
+        func.count(Ticket.id),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.OPEN),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.IN_PROGRESS),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.RESOLVED),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.CLOSED),
+        func.avg(_hours_between(db, Ticket.created_at, Ticket.resolved_at)).filter(is_resolved)
+    ).one()
+    total_tickets, open_tickets, in_progress, resolved, closed, avg_resolution_time = ticket_row
+    avg_resolution_time = float(avg_resolution_time or 0.0)
+    
+    # Category, priority and sentiment distributions from one grouped scan
+    tickets_by_category = defaultdict(int)
+    tickets_by_priority = defaultdict(int)
+    sentiment_distribution = defaultdict(int)
+    
+    distribution_rows = db.query(
+        Ticket.category,
         Ticket.priority,
-        func.count(Ticket.id)
-    ).group_by(Ticket.priority).all()
-    
-    tickets_by_priority = {pri: count for pri, count in priority_counts}
-    
-    # Sentiment distribution
-    sentiment_counts = db.query(
         Ticket.sentiment,
         func.count(Ticket.id)
-    ).group_by(Ticket.sentiment).all()
-    
-    sentiment_distribution = {sent: count for sent, count in sentiment_counts if sent}
+    ).group_by(Ticket.category, Ticket.priority, Ticket.sentiment).all()
     
-    # Average resolution time
-    resolved_tickets = db.query(Ticket).filter(
-        Ticket.status == TicketStatus.RESOLVED,
-        Ticket.resolved_at.isnot(None)
-    ).all()
-    
-    if resolved_tickets:
-        resolution_times = [
-            (t.resolved_at - t.created_at).total_seconds() / 3600  # in hours
-            for t in resolved_tickets
-        ]
-        avg_resolution_time = sum(resolution_times) / len(resolution_times)
-    else:
-        avg_resolution_time = 0.0
+    for category, priority, sentiment, count in distribution_rows:
+        if category:
+            tickets_by_category[category] += count
+        tickets_by_priority[priority] += count
+        if sentiment:
+            sentiment_distribution[sentiment] += count
     
     # Agent statistics
-    total_agents = db.query(Agent).filter(Agent.is_active == True).count()
-    available_agents = db.query(Agent).filter(
-        Agent.is_active == True,
-        Agent.is_available == True
-    ).count()
+    total_agents, available_agents = db.query(
+        func.count(Agent.id),
+        func.count(Agent.id).filter(Agent.is_available == True)
+    ).filter(Agent.is_active == True).one()
     
     # Top performing agents
-    agents = db.query(Agent).filter(Agent.is_active == True).all()
-    top_performers = sorted(
-        [
-            {
-                "id": agent.id,
-                "name": agent.name,
-                "tickets_handled": agent.total_tickets_handled,
-                "avg_resolution_time": agent.average_resolution_time,
-                "satisfaction_score": agent.customer_satisfaction_score
-            }
-            for agent in agents
-        ],
-        key=lambda x: x["satisfaction_score"],
-        reverse=True
-    )[:5]
+    top_agents = db.query(
+        Agent.id,
+        Agent.name,
+        Agent.total_tickets_handled,
+        Agent.average_resolution_time,
+        Agent.customer_satisfaction_score
+    ).filter(
+        Agent.is_active == True
+    ).order_by(
+        Agent.customer_satisfaction_score.desc(), Agent.id
+    ).limit(5).all()
+    
+    top_performers = [
+        {
+            "id": agent.id,
+            "name": agent.name,
+            "tickets_handled": agent.total_tickets_handled,
+            "avg_resolution_time": agent.average_resolution_time,
+            "satisfaction_score": agent.customer_satisfaction_score
+        }
+        for agent in top_agents
+    ]
     
     return {
         "ticket_stats": {
@@ -92,9 +99,9 @@ def get_dashboard_analytics(db: Session = Depends(get_db)):
             "resolved_tickets": resolved,
             "closed_tickets": closed,
             "average_resolution_time": round(avg_resolution_time, 2),
-            "tickets_by_category": tickets_by_category,
-            "tickets_by_priority": tickets_by_priority,
-            "sentiment_distribution": sentiment_distribution
+            "tickets_by_category": dict(tickets_by_category),
+            "tickets_by_priority": dict(tickets_by_priority),
+            "sentiment_distribution": dict(sentiment_distribution)
         },
         "agent_stats": {
             "total_agents": total_agents,
@@ -107,61 +114,65 @@ def get_dashboard_analytics(db: Session = Depends(get_db)):
     }
 
 
+def _daily_rollup(db: Session, days: int, by_category: bool = False):
+    """Per-day (and optionally per-category) ticket counts from ticket_daily_stats"""
+    start_day = utc_today() - timedelta(days=days)
+    columns = [TicketDailyStat.day]
+    if by_category:
+        columns.append(TicketDailyStat.category)
+    
+    return db.query(
+        *columns,
+        func.sum(TicketDailyStat.ticket_count)
+    ).filter(
+        TicketDailyStat.day >= start_day
+    ).group_by(*columns).all()
+
+
 def get_ticket_trends(db: Session):
     """Get ticket trends over time"""
     
-    # Get tickets from last 30 days
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_tickets = db.query(Ticket).filter(
-        Ticket.created_at >= thirty_days_ago
-    ).all()
-    
-    # Group by day
+    # Counts from the last 30 days of the daily rollup
     daily_counts = defaultdict(int)
-    for ticket in recent_tickets:
-        day = ticket.created_at.date()
-        daily_counts[str(day)] += 1
-    
-    # Sort by date
-    sorted_trends = dict(sorted(daily_counts.items()))
-    
-    # Category trends
     category_trends = defaultdict(lambda: defaultdict(int))
-    for ticket in recent_tickets:
-        if ticket.category:
-            day = ticket.created_at.date()
-            category_trends[ticket.category][str(day)] += 1
+    for day, category, count in _daily_rollup(db, 30, by_category=True):
+        daily_counts[str(day)] += int(count)
+        if category:
+            category_trends[category][str(day)] += int(count)
     
     return {
-        "daily_ticket_count": sorted_trends,
-        "category_trends": dict(category_trends),
-        "total_last_30_days": len(recent_tickets)
+        "daily_ticket_count": dict(sorted(daily_counts.items())),
+        "category_trends": {category: dict(sorted(days.items())) for category, days in category_trends.items()},
+        "total_last_30_days": sum(daily_counts.values())
     }
 
 
 @router.get("/trends")
-def get_trends(days: int = 30, db: Session = Depends(get_db)):
+async def get_trends(days: int = 30, db: AsyncSession = Depends(get_async_db)):
     """Get ticket trends for specified number of days"""
+    return await cached_analytics(f"trends:{days}", lambda session: compute_trends(session, days), db)
+
+
+def compute_trends(db: Session, days: int):
+    """Per-day ticket counts for the last `days` days"""
     
-    start_date = datetime.now() - timedelta(days=days)
-    tickets = db.query(Ticket).filter(Ticket.created_at >= start_date).all()
-    
-    # Daily trends
-    daily_counts = defaultdict(int)
-    for ticket in tickets:
-        day = ticket.created_at.date()
-        daily_counts[str(day)] += 1
+    daily_counts = {str(day): int(count) for day, count in _daily_rollup(db, days) if count}
     
     return {
         "period_days": days,
-        "total_tickets": len(tickets),
+        "total_tickets": sum(daily_counts.values()),
         "daily_breakdown": dict(sorted(daily_counts.items()))
     }
 
 
 @router.get("/top-issues")
-def get_top_issues(limit: int = 10, db: Session = Depends(get_db)):
+async def get_top_issues(limit: int = 10, db: AsyncSession = Depends(get_async_db)):
     """Get most common issues based on ticket categories and keywords"""
+    return await cached_analytics(f"top-issues:{limit}", lambda session: compute_top_issues(session, limit), db)
+
+
+def compute_top_issues(db: Session, limit: int):
+    """Most common ticket categories"""
     
     # Category-based issues
     category_counts = db.query(
@@ -184,35 +195,43 @@ def get_top_issues(limit: int = 10, db: Session = Depends(get_db)):
 
 
 @router.get("/performance")
-def get_performance_metrics(db: Session = Depends(get_db)):
+async def get_performance_metrics(db: AsyncSession = Depends(get_async_db)):
     """Get overall system performance metrics"""
-    
-    # Response time metrics
-    total_tickets = db.query(Ticket).count()
-    
-    # First response time (time to first agent assignment)
-    assigned_tickets = db.query(Ticket).filter(
-        Ticket.assigned_to.isnot(None)
-    ).all()
+    return await cached_analytics("performance", compute_performance_metrics, db)
+
+
+def compute_performance_metrics(db: Session):
+    """Resolution and agent utilization metrics"""
     
     # Resolution metrics
-    resolved_tickets = db.query(Ticket).filter(
-        Ticket.status == TicketStatus.RESOLVED
-    ).all()
-    
-    resolution_rate = (len(resolved_tickets) / total_tickets * 100) if total_tickets > 0 else 0
-    
-    # Agent utilization
-    agents = db.query(Agent).filter(Agent.is_active == True).all()
-    total_capacity = sum(agent.max_tickets for agent in agents)
-    current_load = sum(agent.current_ticket_count for agent in agents)
+    total_tickets, resolved_tickets = db.query(
+        func.count(Ticket.id),
+        func.count(Ticket.id).filter(Ticket.status == TicketStatus.RESOLVED)
+    ).one()
+    
+    resolution_rate = (resolved_tickets / total_tickets * 100) if total_tickets > 0 else 0
+    
+    # Agent utilization from the maintained per-agent counters
+    total_capacity, current_load = db.query(
+        func.coalesce(func.sum(Agent.max_tickets), 0),
+        func.coalesce(func.sum(Agent.open_ticket_count), 0)
+    ).filter(Agent.is_active == True).one()
     utilization_rate = (current_load / total_capacity * 100) if total_capacity > 0 else 0
     
     return {
         "resolution_rate": round(resolution_rate, 2),
         "total_tickets": total_tickets,
-        "resolved_tickets": len(resolved_tickets),
+        "resolved_tickets": resolved_tickets,
         "agent_utilization": round(utilization_rate, 2),
         "total_capacity": total_capacity,
         "current_load": current_load
     }
+
+
+@router.get("/cache/stats")
+async def get_analytics_cache_stats():
+    """Analytics result cache counters"""
+    cache = get_analytics_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
@@ -1,6 +1,15 @@
-from fastapi import APIRouter
-from app.schemas import ClassificationRequest, ClassificationResponse, SentimentResponse
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.schemas import (
+    ClassificationRequest, ClassificationResponse, SentimentResponse,
+    BatchClassificationRequest, BatchClassificationResponse
+)
 from app.core.config import settings
+from app.ml.classifier import get_classifier
+from app.ml.inference import get_ml_service
+from app.ml.text_features import extract_features, classify_features
+from app.services.response_cache import get_response_cache
+from app.services.suggestions import generate_suggestion, stream_suggestion
 import logging
 
 router = APIRouter()
@@ -11,145 +20,83 @@ logger = logging.getLogger(__name__)
 async def classify_text(request: ClassificationRequest):
     """Classify ticket text into categories"""
 
-    text_lower = request.text.lower()
+    features = extract_features(request.text)
+    return ClassificationResponse(**classify_features(features))
 
-    categories = {
-        "billing": ["payment", "charge", "invoice", "bill", "refund", "subscription"],
-        "technical": ["error", "bug", "not working", "broken", "crash", "issue", "problem"],
-        "account": ["password", "login", "access", "account", "sign in", "username"],
-        "complaint": ["disappointed", "upset", "angry", "terrible", "worst", "complaint"],
-        "feature_request": ["feature", "would like", "suggestion", "add", "implement", "wish"],
-        "general": ["question", "help", "how to", "what", "when", "where"]
-    }
 
-    scores = {}
-    for category, keywords in categories.items():
-        score = sum(1 for keyword in keywords if keyword in text_lower)
-        scores[category] = score
+@router.post("/classify/batch", response_model=BatchClassificationResponse)
+def classify_batch(request: BatchClassificationRequest):
+    """Classify many texts at once with the trained TF-IDF + NaiveBayes model"""
 
-    if max(scores.values()) > 0:
-        best_category = max(scores, key=scores.get)
-        confidence = min(scores[best_category] / 5.0, 1.0)
-    else:
-        best_category = "general"
-        confidence = 0.5
+    if len(request.texts) > settings.CLASSIFY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds limit of {settings.CLASSIFY_BATCH_MAX_SIZE}"
+        )
 
-    total_score = sum(scores.values()) if sum(scores.values()) > 0 else 1
-    all_predictions = {cat: score / total_score for cat, score in scores.items()}
+    classifier = get_classifier()
+    if classifier.is_ready():
+        results = classifier.predict_batch(request.texts)
+        model = "tfidf_naive_bayes"
+    else:
+        # No trained artifacts, fall back to keyword rules
+        results = [classify_features(extract_features(text)) for text in request.texts]
+        model = "keyword_rules"
 
-    return ClassificationResponse(
-        category=best_category,
-        confidence=confidence,
-        all_predictions=all_predictions
+    return BatchClassificationResponse(
+        model=model,
+        results=[ClassificationResponse(**result) for result in results]
     )
 
 
 @router.post("/sentiment", response_model=SentimentResponse)
 async def analyze_sentiment(request: ClassificationRequest):
-    """Analyze sentiment and urgency of ticket text"""
-
-    text_lower = request.text.lower()
-
-    negative_words = ['angry', 'terrible', 'worst', 'disappointed', 'frustrated', 'broken', 'upset']
-    positive_words = ['great', 'good', 'thanks', 'appreciate', 'helpful', 'excellent', 'amazing']
-
-    neg_count = sum(1 for word in negative_words if word in text_lower)
-    pos_count = sum(1 for word in positive_words if word in text_lower)
+    """Analyze sentiment and urgency of ticket text, by keyword rules until the model is warm"""
 
-    if neg_count > pos_count:
-        sentiment = "negative"
-        score = 0.3
-    elif pos_count > neg_count:
-        sentiment = "positive"
-        score = 0.8
-    else:
-        sentiment = "neutral"
-        score = 0.5
+    analysis = await get_ml_service().analyze_sentiment(request.text)
+    return SentimentResponse(**analysis)
 
-    urgency_keywords = {
-        "urgent": 1.0, "asap": 0.9, "immediately": 0.9,
-        "critical": 0.95, "emergency": 1.0, "broken": 0.7,
-        "not working": 0.7, "down": 0.8,
-    }
 
-    urgency_score = 0.3
-    for keyword, weight in urgency_keywords.items():
-        if keyword in text_lower:
-            urgency_score = max(urgency_score, weight)
+@router.post("/suggest-response")
+async def suggest_response(request: ClassificationRequest, category: str = None):
+    """Get AI-suggested response using Groq, with keyword fallback"""
 
-    if sentiment == "negative":
-        urgency_score = min(urgency_score + 0.2, 1.0)
+    if not category:
+        classification = await classify_text(request)
+        category = classification.category
 
-    return SentimentResponse(
-        sentiment=sentiment,
-        score=score,
-        urgency_score=round(urgency_score, 2)
-    )
+    return await generate_suggestion(request.text, category)
 
 
-@router.post("/suggest-response")
-async def suggest_response(request: ClassificationRequest, category: str = None):
-    """Get AI-suggested response using Groq, with keyword fallback"""
+@router.post("/suggest-response/stream")
+async def suggest_response_stream(request: ClassificationRequest, category: str = None):
+    """Stream an AI-suggested response as Server-Sent Events"""
 
     if not category:
         classification = await classify_text(request)
         category = classification.category
 
-    # Try Groq first if key is configured
-    if settings.GROQ_API_KEY:
-        try:
-            from groq import Groq
-            client = Groq(api_key=settings.GROQ_API_KEY)
-            chat = client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a helpful customer support agent. "
-                            "Write a concise, empathetic response to the customer's support ticket. "
-                            "Keep it under 3 sentences. Do not use placeholder text like [Name]."
-                        )
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Category: {category}\n\nTicket: {request.text}"
-                    }
-                ],
-                max_tokens=200,
-            )
-            suggested_text = chat.choices[0].message.content.strip()
-            return {
-                "suggested_text": suggested_text,
-                "confidence": 0.95,
-                "source_tickets": [],
-                "reasoning": f"Generated by Groq AI for category: {category}"
-            }
-        except Exception as e:
-            logger.warning(f"Groq API error, falling back to templates: {e}")
-
-    # Fallback templates
-    suggestions = {
-        "account": "Thank you for contacting support. I can help you with your account issue. Please verify your email address and I'll send you a password reset link.",
-        "billing": "I apologize for the billing concern. I've reviewed your account and will process a refund within 3-5 business days.",
-        "technical": "Thank you for reporting this issue. Our technical team is investigating. Please try clearing your cache and let us know if the problem persists.",
-        "complaint": "I sincerely apologize for your experience. Your feedback is important to us and I'd like to understand the issue better — could you provide more details?",
-        "feature_request": "Thank you for your suggestion! I've forwarded your feature request to our product team and we appreciate your feedback.",
-        "general": "Thank you for reaching out. I'm here to help — could you provide more details about your inquiry?"
-    }
+    return StreamingResponse(
+        stream_suggestion(request.text, category),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    return {
-        "suggested_text": suggestions.get(category, suggestions["general"]),
-        "confidence": 0.8,
-        "source_tickets": [],
-        "reasoning": f"Template response for category: {category}"
-    }
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the AI suggestion cache"""
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
 
 
 @router.get("/models/status")
 async def get_models_status():
     return {
         "classification_model": True,
+        "tfidf_classifier": get_classifier().is_ready(),
         "sentiment_model": True,
         "groq_ai": bool(settings.GROQ_API_KEY),
         "note": "Using rule-based classification + Groq AI for response suggestions"
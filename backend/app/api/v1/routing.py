@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.database import get_db
+from app.services.analytics_cache import invalidate_analytics
+from app.services.routing import (
+    plan_backlog_assignment, apply_assignment_plan, StaleAssignmentPlan
+)
+
+router = APIRouter()
+
+
+@router.post("/rebalance")
+def rebalance_backlog(dry_run: bool = False, limit: Optional[int] = None, db: Session = Depends(get_db)):
+    """Assign the open, unassigned backlog across agents in one batch"""
+    plan = plan_backlog_assignment(db, limit=limit, lock=not dry_run)
+    
+    if not dry_run:
+        try:
+            apply_assignment_plan(db, plan)
+        except StaleAssignmentPlan as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if plan.assignments:
+            invalidate_analytics()
+    
+    return {"dry_run": dry_run, **plan.to_dict()}
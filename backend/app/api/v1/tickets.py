@@ -1,34 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from collections import Counter
 from datetime import datetime
-import random
-import string
+import asyncio
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.ml.text_features import priority_from_urgency
+from app.services.agent_load import assign_ticket_to_agent
+from app.services.analytics_cache import invalidate_analytics_async
+from app.services.rollups import apply_rollup_deltas, row_bucket
+from app.services.ticket_numbers import allocate_ticket_numbers
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 from app.schemas import (
     TicketCreate, TicketUpdate, TicketResponse, 
-    TicketAssign, MessageCreate, MessageResponse
+    TicketAssign, MessageCreate, MessageResponse,
+    BulkTicketCreate, BulkTicketCreateResponse, BulkTicketResult
+)
+from app.services.suggestions import generate_suggestion, stream_suggestion
+from app.services.export import build_export_query, stream_tickets
+from app.tasks.enrichment import analyze_batch
+from app.tasks.enrichment_queue import enqueue_enrichment
+from models.ticket import (
+    Ticket, TicketResponse as TicketResponseModel, TicketStatus, TicketCategory, TicketPriority
 )
-from models.ticket import Ticket, TicketResponse as TicketResponseModel, TicketStatus
 
 router = APIRouter()
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
 
-def generate_ticket_number():
-    """Generate unique ticket number"""
-    timestamp = datetime.now().strftime("%Y%m%d")
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"TKT-{timestamp}-{random_str}"
+
+def ticket_filters(
+    status: str = None,
+    category: str = None,
+    priority: str = None,
+    created_from: datetime = None,
+    created_to: datetime = None
+) -> list:
+    """Filter conditions shared by ticket listing and export"""
+    conditions = []
+    if status:
+        conditions.append(Ticket.status == status)
+    if category:
+        conditions.append(Ticket.category == category)
+    if priority:
+        conditions.append(Ticket.priority == priority)
+    if created_from:
+        conditions.append(Ticket.created_at >= created_from)
+    if created_to:
+        conditions.append(Ticket.created_at < created_to)
+    return conditions
 
 
 @router.post("/", response_model=TicketResponse, status_code=status.HTTP_201_CREATED)
-async def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
-    """Create a new support ticket"""
+async def create_ticket(ticket: TicketCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new support ticket
+
+    The ticket is stored and returned right away; classification, sentiment,
+    priority, routing and knowledge-base indexing run in the enrichment
+    pipeline (see app.tasks.enrichment).
+    """
     
     # Create ticket
     db_ticket = Ticket(
-        ticket_number=generate_ticket_number(),
+        ticket_number=(await allocate_ticket_numbers())[0],
         customer_name=ticket.customer_name,
         customer_email=ticket.customer_email,
         customer_id=ticket.customer_id,
@@ -36,102 +76,178 @@ async def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
         description=ticket.description
     )
     
-    # Simple keyword-based classification (no ML service needed for now)
-    text_lower = ticket.description.lower()
-    
-    # Determine category
-    if any(word in text_lower for word in ['password', 'login', 'access', 'account']):
-        db_ticket.category = "account"
-        db_ticket.urgency_score = 0.6
-    elif any(word in text_lower for word in ['payment', 'charge', 'bill', 'refund']):
-        db_ticket.category = "billing"
-        db_ticket.urgency_score = 0.7
-    elif any(word in text_lower for word in ['error', 'bug', 'crash', 'not working', 'broken']):
-        db_ticket.category = "technical"
-        db_ticket.urgency_score = 0.8
-    elif any(word in text_lower for word in ['feature', 'suggest', 'add', 'implement']):
-        db_ticket.category = "feature_request"
-        db_ticket.urgency_score = 0.3
-    elif any(word in text_lower for word in ['disappointed', 'terrible', 'angry', 'complaint']):
-        db_ticket.category = "complaint"
-        db_ticket.urgency_score = 0.7
-    else:
-        db_ticket.category = "general"
-        db_ticket.urgency_score = 0.5
-    
-    db_ticket.category_confidence = 0.75
-    
-    # Simple sentiment analysis
-    negative_words = ['angry', 'terrible', 'worst', 'disappointed', 'frustrated', 'broken']
-    positive_words = ['great', 'good', 'thanks', 'appreciate', 'helpful']
-    
-    neg_count = sum(1 for word in negative_words if word in text_lower)
-    pos_count = sum(1 for word in positive_words if word in text_lower)
-    
-    if neg_count > pos_count:
-        db_ticket.sentiment = "negative"
-        db_ticket.sentiment_score = 0.3
-    elif pos_count > neg_count:
-        db_ticket.sentiment = "positive"
-        db_ticket.sentiment_score = 0.8
-    else:
-        db_ticket.sentiment = "neutral"
-        db_ticket.sentiment_score = 0.5
-    
-    # Set priority based on urgency
-    if db_ticket.urgency_score > 0.8:
-        db_ticket.priority = "urgent"
-    elif db_ticket.urgency_score > 0.6:
-        db_ticket.priority = "high"
-    elif db_ticket.urgency_score > 0.3:
-        db_ticket.priority = "medium"
-    else:
-        db_ticket.priority = "low"
-    
     # Save to database
     db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+    await db.commit()
+    await invalidate_analytics_async()
+    await enqueue_enrichment([db_ticket.id])
+    await db.refresh(db_ticket)
     
     return db_ticket
 
 
+@router.post("/bulk", response_model=BulkTicketCreateResponse)
+async def create_tickets_bulk(request: BulkTicketCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create many tickets in one request
+
+    Items are validated one by one; invalid ones are reported with their
+    index and the rest are still created. Valid tickets are classified and
+    scored as one batch and written with a single multi-row INSERT, then
+    handed to the enrichment pipeline for routing and indexing.
+    """
+    if len(request.tickets) > settings.TICKET_BULK_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds limit of {settings.TICKET_BULK_MAX_SIZE}"
+        )
+    
+    results = [None] * len(request.tickets)
+    valid = []
+    for index, item in enumerate(request.tickets):
+        try:
+            valid.append((index, TicketCreate.model_validate(item)))
+        except ValidationError as e:
+            results[index] = BulkTicketResult(
+                index=index,
+                errors=[{"loc": list(error["loc"]), "msg": error["msg"]} for error in e.errors()]
+            )
+    
+    if valid:
+        # Classification is CPU-bound, keep it off the event loop
+        analyses = await asyncio.to_thread(analyze_batch, [ticket.description for _, ticket in valid])
+        numbers = await allocate_ticket_numbers(len(valid))
+        
+        rows = [
+            {
+                "ticket_number": number,
+                "customer_name": ticket.customer_name,
+                "customer_email": ticket.customer_email,
+                "customer_id": ticket.customer_id,
+                "subject": ticket.subject,
+                "description": ticket.description,
+                "category": TicketCategory(analysis["category"]),
+                "category_confidence": analysis["confidence"],
+                "priority": TicketPriority(priority_from_urgency(analysis["urgency_score"])),
+                "sentiment": analysis["sentiment"],
+                "sentiment_score": analysis["sentiment_score"],
+                "urgency_score": analysis["urgency_score"],
+                "status": TicketStatus.OPEN
+            }
+            for (_, ticket), analysis, number in zip(valid, analyses, numbers)
+        ]
+        
+        # Core insert, so the rollup deltas the ORM listeners would record are applied here
+        inserted = (await db.execute(
+            insert(Ticket.__table__).returning(
+                Ticket.__table__.c.id, Ticket.__table__.c.created_at, sort_by_parameter_order=True
+            ),
+            rows
+        )).all()
+        deltas = Counter(row_bucket(created_at, row) for row, (_, created_at) in zip(rows, inserted))
+        await db.run_sync(lambda session: apply_rollup_deltas(session.connection(), deltas))
+        await db.commit()
+        await invalidate_analytics_async()
+        
+        ticket_ids = [ticket_id for ticket_id, _ in inserted]
+        await enqueue_enrichment(ticket_ids)
+        
+        for (index, _), row, ticket_id in zip(valid, rows, ticket_ids):
+            results[index] = BulkTicketResult(
+                index=index,
+                ticket_id=ticket_id,
+                ticket_number=row["ticket_number"],
+                category=row["category"],
+                priority=row["priority"],
+                sentiment=row["sentiment"]
+            )
+    
+    return BulkTicketCreateResponse(
+        created=len(valid),
+        failed=len(results) - len(valid),
+        results=results
+    )
+
+
 @router.get("/", response_model=List[TicketResponse])
-def get_tickets(
+async def get_tickets(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: str = None,
     category: str = None,
     priority: str = None,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all tickets with optional filters"""
-    query = db.query(Ticket)
+    """
+    Get tickets newest first with optional filters
+
+    Pass the X-Next-Cursor header of one page as `cursor` to fetch the next;
+    keyset pagination on (created_at, id) costs the same on every page.
+    `skip` is still honoured when no cursor is given.
+    """
+    query = select(Ticket).where(*ticket_filters(status, category, priority))
     
-    if status:
-        query = query.filter(Ticket.status == status)
-    if category:
-        query = query.filter(Ticket.category == category)
-    if priority:
-        query = query.filter(Ticket.priority == priority)
+    if cursor:
+        try:
+            created_at, ticket_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(Ticket.created_at, Ticket.id) < (created_at, ticket_id))
+    
+    query = query.order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    # Fetch one extra row to know whether another page exists
+    tickets = (await db.scalars(query.limit(limit + 1))).all()
+    
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        last = tickets[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
     
-    tickets = query.offset(skip).limit(limit).all()
     return tickets
 
 
+@router.get("/export")
+def export_tickets(
+    format: str = "ndjson",
+    status: str = None,
+    category: str = None,
+    priority: str = None,
+    created_from: datetime = None,
+    created_to: datetime = None
+):
+    """Stream all matching tickets as NDJSON or CSV, oldest first"""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    
+    query = build_export_query(
+        ticket_filters(status, category, priority, created_from, created_to)
+    )
+    
+    return StreamingResponse(
+        stream_tickets(query, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=tickets.{format}"}
+    )
+
+
 @router.get("/{ticket_id}", response_model=TicketResponse)
-def get_ticket(ticket_id: int, db: Session = Depends(get_db)):
+async def get_ticket(ticket_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific ticket by ID"""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     return ticket
 
 
 @router.put("/{ticket_id}", response_model=TicketResponse)
-def update_ticket(ticket_id: int, ticket_update: TicketUpdate, db: Session = Depends(get_db)):
+async def update_ticket(ticket_id: int, ticket_update: TicketUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update a ticket"""
-    db_ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    db_ticket = await db.get(Ticket, ticket_id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
@@ -143,53 +259,55 @@ def update_ticket(ticket_id: int, ticket_update: TicketUpdate, db: Session = Dep
     if ticket_update.status == TicketStatus.RESOLVED and not db_ticket.resolved_at:
         db_ticket.resolved_at = datetime.now()
     
-    db.commit()
-    db.refresh(db_ticket)
+    await db.commit()
+    await invalidate_analytics_async()
+    await db.refresh(db_ticket)
     return db_ticket
 
 
 @router.post("/{ticket_id}/assign", response_model=TicketResponse)
-def assign_ticket(ticket_id: int, assignment: TicketAssign, db: Session = Depends(get_db)):
+async def assign_ticket(ticket_id: int, assignment: TicketAssign, db: AsyncSession = Depends(get_async_db)):
     """Assign ticket to an agent"""
-    db_ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    # Lock the ticket so concurrent reassignments are applied one at a time
+    db_ticket = await db.get(Ticket, ticket_id, with_for_update=True)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
     # Check if agent exists
     from models.ticket import Agent
-    agent = db.query(Agent).filter(Agent.id == assignment.agent_id).first()
+    agent = await db.get(Agent, assignment.agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    # Check if agent is available and has capacity
-    if not agent.is_available or agent.current_ticket_count >= agent.max_tickets:
+    # Claim a slot atomically; fails if the agent is unavailable or at capacity
+    assigned = await db.run_sync(lambda session: assign_ticket_to_agent(session, db_ticket, agent.id))
+    if not assigned:
         raise HTTPException(status_code=400, detail="Agent is not available or at capacity")
     
-    db_ticket.assigned_to = assignment.agent_id
-    db_ticket.status = TicketStatus.IN_PROGRESS
-    
-    db.commit()
-    db.refresh(db_ticket)
+    await db.commit()
+    await invalidate_analytics_async()
+    await db.refresh(db_ticket)
     return db_ticket
 
 
 @router.delete("/{ticket_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_ticket(ticket_id: int, db: Session = Depends(get_db)):
+async def delete_ticket(ticket_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a ticket"""
-    db_ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    db_ticket = await db.get(Ticket, ticket_id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
-    db.delete(db_ticket)
-    db.commit()
+    await db.delete(db_ticket)
+    await db.commit()
+    await invalidate_analytics_async()
     return None
 
 
 @router.post("/{ticket_id}/responses", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-async def add_response(ticket_id: int, message: MessageCreate, db: Session = Depends(get_db)):
+async def add_response(ticket_id: int, message: MessageCreate, db: AsyncSession = Depends(get_async_db)):
     """Add a response to a ticket"""
     # Check if ticket exists
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
@@ -202,43 +320,45 @@ async def add_response(ticket_id: int, message: MessageCreate, db: Session = Dep
     )
     
     db.add(db_response)
-    db.commit()
-    db.refresh(db_response)
+    await db.commit()
+    await db.refresh(db_response)
     return db_response
 
 
 @router.get("/{ticket_id}/responses", response_model=List[MessageResponse])
-def get_ticket_responses(ticket_id: int, db: Session = Depends(get_db)):
+async def get_ticket_responses(ticket_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all responses for a ticket"""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
-    return ticket.responses
+    responses = await db.scalars(
+        select(TicketResponseModel).where(TicketResponseModel.ticket_id == ticket_id).order_by(TicketResponseModel.id)
+    )
+    return responses.all()
 
 
 @router.post("/{ticket_id}/suggest-response")
-async def suggest_response(ticket_id: int, db: Session = Depends(get_db)):
+async def suggest_response(ticket_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get AI-suggested response for a ticket"""
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    ticket = await db.get(Ticket, ticket_id)
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    
+    category = ticket.category.value if ticket.category else "general"
+    return await generate_suggestion(ticket.description, category)
+
+
+@router.post("/{ticket_id}/suggest-response/stream")
+async def suggest_response_stream(ticket_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stream an AI-suggested response for a ticket as Server-Sent Events"""
+    ticket = await db.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     
-    # Simple suggestion based on category
-    suggestions = {
-        "account": "Thank you for contacting support. I can help you with your account issue. Please verify your email address and I'll send you a password reset link.",
-        "billing": "I apologize for the billing concern. I've reviewed your account and will process a refund within 3-5 business days.",
-        "technical": "Thank you for reporting this issue. Our technical team is investigating. Please try clearing your cache and let us know if the problem persists.",
-        "complaint": "I sincerely apologize for your experience. Your feedback is important to us. I'd like to understand the issue better - could you provide more details?",
-        "feature_request": "Thank you for your suggestion! I've forwarded your feature request to our product team. We appreciate customer feedback.",
-        "general": "Thank you for reaching out. I'm here to help. Could you provide more details about your inquiry?"
-    }
-    
-    suggestion_text = suggestions.get(ticket.category, suggestions["general"])
-    
-    return {
-        "suggested_text": suggestion_text,
-        "confidence": 0.8,
-        "source_tickets": [],
-        "reasoning": f"Based on category: {ticket.category}"
-    }
\ No newline at end of file
+    category = ticket.category.value if ticket.category else "general"
+    return StreamingResponse(
+        stream_suggestion(ticket.description, category),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+import re
+
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn, CreateIndex
 from app.core.config import settings
 
 # Create engine
@@ -14,6 +19,31 @@ engine = create_engine(
 # Create session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (asyncpg, aiosqlite)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+
+# Async engine for the request handlers; the sync engine stays for scripts and workers
+async_engine = create_async_engine(
+    ASYNC_URL,
+    pool_pre_ping=True,
+    # aiosqlite gets a NullPool, which takes no sizing arguments
+    **({} if make_url(ASYNC_URL).get_backend_name() == "sqlite" else {"pool_size": 10, "max_overflow": 20})
+)
+
+# expire_on_commit=False so committed objects can still be serialized without lazy loads
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -25,3 +55,86 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def create_tables() -> list:
+    """Create tables missing from the database; returns the names of the ones created"""
+    existing = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    return [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+
+
+def ensure_indexes() -> list:
+    """
+    Create indexes added to models after their tables already existed; returns their names
+
+    On PostgreSQL they are built CONCURRENTLY, so writes to a large table are
+    not blocked while an index builds. This is a deploy step (see
+    scripts/create_indexes.py), not something each worker runs at startup.
+    """
+    inspector = inspect(engine)
+    postgresql = engine.dialect.name == "postgresql"
+    created = []
+    # CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+                if postgresql:
+                    ddl = re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)
+                conn.execute(text(ddl))
+                created.append(index.name)
+    return created
+
+
+def ensure_columns() -> list:
+    """Add columns added to models after their tables already existed; returns their names"""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                table_name = engine.dialect.identifier_preparer.format_table(table)
+                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def committed_values(session, obj, names) -> dict:
+    """Stored values of obj's attributes, ignoring changes that are not flushed yet"""
+    state = inspect(obj)
+    values = {}
+    for name in names:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            # Attribute is unloaded (or was set while unloaded), so ask the database
+            break
+    else:
+        return values
+    
+    table = obj.__table__
+    row = session.connection().execute(
+        select(*[table.c[name] for name in names]).where(table.c.id == obj.id)
+    ).one()
+    return dict(zip(names, row))
@@ -0,0 +1,198 @@
+import asyncio
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+# With several uvicorn workers, PROMETHEUS_MULTIPROC_DIR points at a directory
+# (emptied before the server starts) where every worker writes its samples;
+# /metrics then aggregates them. prometheus_client picks its value storage
+# when first imported, so the variable has to be set before that.
+_multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or settings.PROMETHEUS_MULTIPROC_DIR
+if _multiproc_dir:
+    os.makedirs(_multiproc_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = _multiproc_dir
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event  # noqa: E402
+from starlette.routing import Match  # noqa: E402
+
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Latency buckets from sub-millisecond index lookups up to slow LLM calls
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is fully sent",
+    ["method", "route"], buckets=REQUEST_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served",
+    ["method", "route"], multiprocess_mode="livesum"
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out of the pool",
+    ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Connections open beyond pool_size",
+    ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the pool, including opening and pre-ping",
+    ["engine"], buckets=FAST_BUCKETS
+)
+
+ML_INFERENCE_DURATION = Histogram(
+    "ml_inference_duration_seconds", "Model inference time",
+    ["operation"], buckets=FAST_BUCKETS
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "Groq call time, including waiting for a concurrency slot",
+    ["operation", "outcome"], buckets=REQUEST_BUCKETS
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by cache and result (hit, stale or miss)",
+    ["cache", "result"]
+)
+ROUTING_DECISION_DURATION = Histogram(
+    "routing_decision_seconds", "Time to lock a ticket and pick and claim an agent",
+    ["outcome"], buckets=FAST_BUCKETS
+)
+
+
+@contextmanager
+def observe_duration(histogram, **labels):
+    """Observe the time spent in the block on histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+def track_inference(operation: str):
+    """Decorator recording a sync or async function's duration as ML inference"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with observe_duration(ML_INFERENCE_DURATION, operation=operation):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with observe_duration(ML_INFERENCE_DURATION, operation=operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+
+
+def instrument_engine(engine, name: str):
+    """Track pool usage of an engine (pass sync_engine for an AsyncEngine)"""
+    checked_out = DB_POOL_CHECKED_OUT.labels(engine=name)
+    overflow = DB_POOL_OVERFLOW.labels(engine=name)
+    wait = DB_POOL_CHECKOUT_WAIT.labels(engine=name)
+
+    def update(returning: int):
+        # engine.pool, not a captured pool: dispose() swaps in a new one
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):
+            checked_out.set(pool.checkedout() - returning)
+            overflow.set(max(pool.overflow(), 0))
+
+    # Engine-level listeners follow the engine across dispose(); checkin fires
+    # before the connection is back in the pool
+    event.listen(engine, "checkout", lambda *args: update(0))
+    event.listen(engine, "checkin", lambda *args: update(1))
+
+    # The pool has no event before a checkout, so time Engine.connect() itself,
+    # which Sessions, begin() and AsyncEngine all go through
+    connect = engine.connect
+
+    @functools.wraps(connect)
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            wait.observe(time.perf_counter() - start)
+
+    engine.connect = timed_connect
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording per-route request counts, latency and in-flight requests
+
+    Requests are labelled with the route template (/api/v1/tickets/{ticket_id})
+    rather than the raw path to keep label cardinality bounded. Latency covers
+    the whole response body, so streamed exports and SSE count in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route(self, scope) -> str:
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method=method, route=route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method=method, route=route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method=method, route=route, status=str(status_code)).inc()
+            in_progress.dec()
+
+
+def render_metrics() -> bytes:
+    """Exposition of this process's metrics, or of every worker in multiprocess mode"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the multiprocess directory"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
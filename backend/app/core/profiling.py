@@ -0,0 +1,157 @@
+import asyncio
+import hmac
+import itertools
+import logging
+import os
+import re
+import time
+import uuid
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_FILE_HEADER = "X-Profile-File"
+PROFILE_FORMATS = {"speedscope": "speedscope.json", "collapsed": "collapsed.txt"}
+
+
+def collapsed_stacks(session) -> str:
+    """
+    Brendan Gregg's collapsed-stack format (flamegraph.pl, speedscope, inferno)
+
+    One "outer;inner;leaf <microseconds>" line per stack with self time.
+    """
+    lines: List[str] = []
+
+    def walk(frame, stack):
+        name = f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+        stack = stack + [name.replace(";", ":")]
+        self_time = frame.time - sum(child.time for child in frame.children)
+        micros = int(round(self_time * 1_000_000))
+        if micros > 0:
+            lines.append(f"{';'.join(stack)} {micros}")
+        for child in frame.children:
+            walk(child, stack)
+
+    root = session.root_frame()
+    if root is not None:
+        walk(root, [])
+    return "\n".join(lines) + "\n"
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in statistical profiler for individual requests
+
+    A request is profiled when it carries the PROFILING_HEADER header or the
+    PROFILING_QUERY_PARAM query parameter with PROFILING_TOKEN as its value,
+    and automatically for one in every PROFILING_SAMPLE_EVERY requests. The
+    profile of that request alone (pyinstrument follows it across awaits) is
+    written to PROFILING_OUTPUT_DIR and the file name is returned in the
+    X-Profile-File header. Other requests only pay for the header check; the
+    middleware is not installed at all unless PROFILING_ENABLED is set.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: str,
+        header: str,
+        query_param: str,
+        sample_every: int,
+        interval: float,
+        output_dir: str,
+        fmt: str
+    ):
+        self.app = app
+        self.token = token
+        self.header = header.lower().encode()
+        self.query_param = query_param
+        self.sample_every = sample_every
+        self.interval = interval
+        self.output_dir = output_dir
+        self.fmt = fmt if fmt in PROFILE_FORMATS else "speedscope"
+        self._counter = itertools.count(1)
+
+    def _requested(self, scope) -> bool:
+        if not self.token:
+            return False
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return hmac.compare_digest(value, self.token.encode())
+        query = scope.get("query_string", b"")
+        if query and self.query_param.encode() in query:
+            value = parse_qs(query.decode()).get(self.query_param, [""])[0]
+            return hmac.compare_digest(value.encode(), self.token.encode())
+        return False
+
+    def _sampled(self) -> bool:
+        return self.sample_every > 0 and next(self._counter) % self.sample_every == 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self._requested(scope) or self._sampled()):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        filename = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}-{slug}-"
+            f"{uuid.uuid4().hex[:6]}.{PROFILE_FORMATS[self.fmt]}"
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (PROFILE_FILE_HEADER.lower().encode(), filename.encode())
+                ]
+            await send(message)
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            await asyncio.to_thread(self._write, session, filename)
+
+    def _write(self, session, filename: str):
+        try:
+            if self.fmt == "collapsed":
+                output = collapsed_stacks(session)
+            else:
+                from pyinstrument.renderers import SpeedscopeRenderer
+                output = SpeedscopeRenderer().render(session)
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, filename), "w") as f:
+                f.write(output)
+        except Exception as e:
+            logger.warning(f"Could not write request profile {filename}: {e}")
+
+
+def profiling_middleware_options() -> Optional[dict]:
+    """Middleware options from settings, or None when profiling is off or unavailable"""
+    if not settings.PROFILING_ENABLED:
+        return None
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed; profiling disabled")
+        return None
+    if not settings.PROFILING_TOKEN and settings.PROFILING_SAMPLE_EVERY <= 0:
+        logger.warning("Profiling enabled without PROFILING_TOKEN or PROFILING_SAMPLE_EVERY; nothing will be profiled")
+    return {
+        "token": settings.PROFILING_TOKEN,
+        "header": settings.PROFILING_HEADER,
+        "query_param": settings.PROFILING_QUERY_PARAM,
+        "sample_every": settings.PROFILING_SAMPLE_EVERY,
+        "interval": settings.PROFILING_INTERVAL_SECONDS,
+        "output_dir": settings.PROFILING_OUTPUT_DIR,
+        "fmt": settings.PROFILING_FORMAT.lower()
+    }
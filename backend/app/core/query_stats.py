@@ -0,0 +1,163 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+SERVER_TIMING_HEADER = "Server-Timing"
+_START_KEY = "query_stats_start"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Expanded IN lists and executemany VALUES differ only in placeholder count
+_PLACEHOLDER_LIST_RE = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*,?)+\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace and placeholder lists normalized"""
+    return _PLACEHOLDER_LIST_RE.sub("(...)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+@dataclass
+class QueryStats:
+    """Statements run while a request (or a count_queries block) was active"""
+    label: str = ""
+    repeat_threshold: int = 0
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    warned: Set[str] = field(default_factory=set)
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if self.repeat_threshold and self.shapes[shape] > self.repeat_threshold and shape not in self.warned:
+            self.warned.add(shape)
+            logger.warning(
+                f"Possible N+1 in {self.label or 'request'}: statement ran more than "
+                f"{self.repeat_threshold} times: {shape[:200]}"
+            )
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get(_START_KEY)
+    if stats is None or not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+@contextmanager
+def count_queries(label: str = "", repeat_threshold: int = 0) -> Iterator[QueryStats]:
+    """Record the statements run in this block (and in threads or run_sync calls it starts)"""
+    stats = QueryStats(label=label, repeat_threshold=repeat_threshold)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def parse_server_timing(header: str) -> Optional[QueryStats]:
+    """Query count and time from a Server-Timing header written by QueryStatsMiddleware"""
+    for metric in header.split(","):
+        parts = [part.strip() for part in metric.split(";")]
+        if parts[0] != "db":
+            continue
+        stats = QueryStats()
+        for part in parts[1:]:
+            key, _, value = part.partition("=")
+            if key == "dur":
+                stats.duration = float(value) / 1000
+            elif key == "desc":
+                stats.count = int(value.strip('"').split()[0])
+        return stats
+    return None
+
+
+def assert_query_budget(source, max_queries: int):
+    """
+    Fail when a request ran more than max_queries statements
+
+    source is a QueryStats from count_queries() or an HTTP response from a
+    server running QueryStatsMiddleware, e.g.
+
+        response = client.get("/api/v1/agents/1/stats")
+        assert_query_budget(response, 3)
+    """
+    if isinstance(source, QueryStats):
+        stats = source
+    else:
+        stats = parse_server_timing(source.headers.get(SERVER_TIMING_HEADER, ""))
+        if stats is None:
+            raise AssertionError("Response has no db Server-Timing metric; is QUERY_STATS_ENABLED set?")
+
+    if stats.count > max_queries:
+        repeated = [f"{n}x {shape[:120]}" for shape, n in stats.shapes.most_common(3) if n > 1]
+        detail = f"; most repeated: {repeated}" if repeated else ""
+        raise AssertionError(f"Ran {stats.count} queries, budget is {max_queries}{detail}")
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware counting SQL statements and DB time per request
+
+    Totals go out as a Server-Timing header (db;dur=<ms>;desc="<n> queries"),
+    which browser dev tools display, and a warning is logged when one
+    statement shape repeats more than repeat_threshold times in a request.
+    Statements run after the response headers are sent (streamed bodies)
+    are counted for the N+1 check but not in the header.
+    """
+
+    def __init__(self, app, repeat_threshold: int):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope['method']} {scope['path']}"
+
+        with count_queries(label, self.repeat_threshold) as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (SERVER_TIMING_HEADER.lower().encode(), stats.server_timing().encode())
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+def query_stats_middleware_options() -> Optional[dict]:
+    """Middleware options from settings, or None when disabled"""
+    if not settings.QUERY_STATS_ENABLED:
+        return None
+    return {"repeat_threshold": settings.QUERY_REPEAT_WARNING_THRESHOLD}
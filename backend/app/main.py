@@ -1,12 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, SessionLocal, create_tables, ensure_columns
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.metrics import (
+    CONTENT_TYPE_LATEST, PrometheusMiddleware, instrument_engine, mark_process_dead, render_metrics
+)
+from app.core.query_stats import QueryStatsMiddleware, query_stats_middleware_options
+from app.core.profiling import PROFILE_FILE_HEADER, ProfilingMiddleware, profiling_middleware_options
 from app.api.v1 import router as api_router
+from app.ml.inference import get_ml_service
+from app.services.llm import close_llm_client
+from app.services.rollups import rebuild_daily_stats  # also registers the ticket_daily_stats flush listeners
+from app.services.agent_load import repair_open_ticket_counts
+from app.tasks.enrichment_queue import shutdown_enrichment
 
 # Configure logging
 logging.basicConfig(
@@ -20,10 +33,35 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown"""
     logger.info("Starting AutoSupport API...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created")
+    start = time.perf_counter()
+    created_tables = create_tables()
+    added_columns = ensure_columns()
+    # Indexes on existing tables are built by scripts/create_indexes.py at deploy time
+    if "agents.open_ticket_count" in added_columns:
+        # Counter column is new, so backfill it from the tickets table
+        db = SessionLocal()
+        try:
+            repair_open_ticket_counts(db)
+        finally:
+            db.close()
+    if "ticket_daily_stats" in created_tables:
+        # Rollup table is new, so backfill it before any ticket write applies deltas to it
+        db = SessionLocal()
+        try:
+            rebuild_daily_stats(db)
+        finally:
+            db.close()
+    logger.info(f"Database tables created in {time.perf_counter() - start:.2f}s")
+    if settings.ML_BACKGROUND_LOADING:
+        # Serve with rule-based fallbacks while the models warm up
+        get_ml_service().start_background_loading()
     yield
     logger.info("Shutting down AutoSupport API...")
+    # Let tickets already queued for enrichment finish
+    await asyncio.to_thread(shutdown_enrichment)
+    await close_llm_client()
+    await async_engine.dispose()
+    mark_process_dead()
 
 
 # Create FastAPI app
@@ -43,8 +81,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PROFILE_FILE_HEADER],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+
+query_stats_options = query_stats_middleware_options()
+if query_stats_options is not None:
+    app.add_middleware(QueryStatsMiddleware, **query_stats_options)
+
+profiling_options = profiling_middleware_options()
+if profiling_options is not None:
+    app.add_middleware(ProfilingMiddleware, **profiling_options)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -64,6 +116,20 @@ async def health_check():
     return {"status": "healthy", "database": "connected"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Per-model loading state; requests are served with rule-based fallbacks until models are ready"""
+    return get_ml_service().status()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
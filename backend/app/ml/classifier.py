@@ -0,0 +1,89 @@
+import pickle
+import os
+import logging
+import threading
+from typing import Dict, List
+
+from app.core.config import settings
+from app.core.metrics import track_inference
+
+logger = logging.getLogger(__name__)
+
+
+class TfidfClassifier:
+    """TF-IDF + MultinomialNB ticket classifier trained by ml/train_models.py"""
+
+    def __init__(self, model_path: str = None):
+        self.model_path = model_path or settings.MODEL_PATH
+        self.model = None
+        self.vectorizer = None
+        self._lock = threading.Lock()
+        self._attempted = False
+
+    def load(self) -> bool:
+        """Load classifier.pkl and vectorizer.pkl; returns whether both are available"""
+        with self._lock:
+            if self._attempted:
+                return self.is_ready()
+            self._attempted = True
+
+            classifier_path = os.path.join(self.model_path, "classifier.pkl")
+            vectorizer_path = os.path.join(self.model_path, "vectorizer.pkl")
+
+            if not (os.path.exists(classifier_path) and os.path.exists(vectorizer_path)):
+                logger.warning(f"Classifier artifacts not found in {self.model_path}")
+                return False
+
+            try:
+                with open(classifier_path, 'rb') as f:
+                    model = pickle.load(f)
+                with open(vectorizer_path, 'rb') as f:
+                    vectorizer = pickle.load(f)
+            except Exception as e:
+                logger.error(f"Error loading classifier artifacts: {str(e)}")
+                return False
+
+            self.model = model
+            self.vectorizer = vectorizer
+            logger.info(f"Loaded TF-IDF classifier with classes: {list(model.classes_)}")
+            return True
+
+    def is_ready(self) -> bool:
+        """Check if both artifacts are loaded"""
+        return self.model is not None and self.vectorizer is not None
+
+    @track_inference("tfidf_classify_batch")
+    def predict_batch(self, texts: List[str]) -> List[Dict]:
+        """Classify many texts with one sparse transform and one predict_proba"""
+        if not self.is_ready():
+            raise RuntimeError("Classifier artifacts not loaded")
+
+        if not texts:
+            return []
+
+        matrix = self.vectorizer.transform(texts)
+        probabilities = self.model.predict_proba(matrix)
+        classes = [str(c) for c in self.model.classes_]
+        best = probabilities.argmax(axis=1)
+
+        results = []
+        for row, best_idx in zip(probabilities.tolist(), best.tolist()):
+            results.append({
+                "category": classes[best_idx],
+                "confidence": round(row[best_idx], 4),
+                "all_predictions": {cat: round(p, 4) for cat, p in zip(classes, row)}
+            })
+        return results
+
+    def predict(self, text: str) -> Dict:
+        """Classify a single text"""
+        return self.predict_batch([text])[0]
+
+
+_classifier = TfidfClassifier()
+
+
+def get_classifier() -> TfidfClassifier:
+    """Process-wide classifier, loaded on first use"""
+    _classifier.load()
+    return _classifier
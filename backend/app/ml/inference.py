@@ -1,24 +1,35 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from sentence_transformers import SentenceTransformer
-import pickle
-import os
+import asyncio
 import logging
-from typing import Dict, List
-import re
+import time
+from typing import Dict, List, Optional
 
 from app.core.config import settings
-from app.ml.rag_system import RAGSystem
+from app.core.metrics import track_inference
+from app.ml.classifier import get_classifier
+from app.ml.text_features import (
+    URGENCY_KEYWORDS, extract_features, classify_features, sentiment_from_features, urgency_from_features
+)
 
 logger = logging.getLogger(__name__)
 
 
+MODEL_NAMES = ("classifier", "sentiment", "embedding", "rag")
+
+
 class MLService:
-    """Machine Learning service for ticket classification and analysis"""
+    """
+    Machine Learning service for ticket classification and analysis
+
+    torch, transformers, sentence-transformers and chromadb are imported by
+    the loaders, not at module import, so the API starts without them.
+    Models load concurrently in the background (see start_background_loading)
+    and every method falls back to the keyword rules until its model is warm.
+    """
     
     def __init__(self):
         self.classification_model = None
         self.classification_tokenizer = None
+        self.text_classifier = None
         self.sentiment_pipeline = None
         self.embedding_model = None
         self.rag_system = None
@@ -30,122 +41,129 @@ class MLService:
             4: "complaint",
             5: "feature_request"
         }
-        self.urgency_keywords = {
-            "urgent": 1.0,
-            "asap": 0.9,
-            "immediately": 0.9,
-            "critical": 0.95,
-            "emergency": 1.0,
-            "broken": 0.7,
-            "not working": 0.7,
-            "down": 0.8,
-            "error": 0.6,
-            "failed": 0.6,
-            "cannot": 0.5,
-            "unable": 0.5
-        }
+        self.urgency_keywords = URGENCY_KEYWORDS
+        self.model_states: Dict[str, Dict] = {name: {"state": "pending"} for name in MODEL_NAMES}
+        self._load_task: Optional[asyncio.Task] = None
     
-    async def load_models(self):
-        """Load all ML models"""
+    def _load_classifier(self):
+        """TF-IDF + NaiveBayes classifier trained by ml/train_models.py"""
+        self.text_classifier = get_classifier()
+        if not self.text_classifier.is_ready():
+            raise FileNotFoundError("Trained classifier artifacts not available")
+        self.classification_model = self.text_classifier.model
+        self.classification_tokenizer = self.text_classifier.vectorizer
+    
+    def _load_sentiment(self):
+        import torch
+        from transformers import pipeline
+        
+        self.sentiment_pipeline = pipeline(
+            "sentiment-analysis",
+            model=settings.SENTIMENT_MODEL,
+            device=0 if torch.cuda.is_available() else -1
+        )
+    
+    def _load_embedding(self):
+        from sentence_transformers import SentenceTransformer
+        
+        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    
+    async def _load_rag(self):
+        from app.ml.rag_system import RAGSystem
+        
+        if self.embedding_model is None:
+            raise RuntimeError("Embedding model not loaded")
+        rag_system = RAGSystem(self.embedding_model)
+        await rag_system.initialize()
+        self.rag_system = rag_system
+    
+    async def _run_phase(self, name: str, loader) -> bool:
+        """Run one loader, recording its state and duration; returns whether it succeeded"""
+        status = self.model_states[name]
+        status.update(state="loading", error=None)
+        start = time.perf_counter()
         try:
-            logger.info("Loading ML models...")
-            
-            # Load classification model
-            model_path = os.path.join(settings.MODEL_PATH, "classifier.pkl")
-            
-            if os.path.exists(model_path):
-                # Load fine-tuned model
-                logger.info("Loading fine-tuned classification model...")
-                with open(model_path, 'rb') as f:
-                    self.classification_model = pickle.load(f)
-                
-                tokenizer_path = os.path.join(settings.MODEL_PATH, "tokenizer")
-                if os.path.exists(tokenizer_path):
-                    self.classification_tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
-                else:
-                    self.classification_tokenizer = AutoTokenizer.from_pretrained(settings.CLASSIFICATION_MODEL)
+            if asyncio.iscoroutinefunction(loader):
+                await loader()
             else:
-                # Use simple sklearn model as fallback
-                logger.info("Using fallback classification model...")
-                from sklearn.feature_extraction.text import TfidfVectorizer
-                from sklearn.naive_bayes import MultinomialNB
-                
-                self.classification_model = MultinomialNB()
-                self.classification_tokenizer = TfidfVectorizer(max_features=1000)
-            
-            # Load sentiment analysis pipeline
-            logger.info("Loading sentiment model...")
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model=settings.SENTIMENT_MODEL,
-                device=0 if torch.cuda.is_available() else -1
-            )
-            
-            # Load embedding model for RAG
-            logger.info("Loading embedding model...")
-            self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
-            
-            # Initialize RAG system
-            logger.info("Initializing RAG system...")
-            self.rag_system = RAGSystem(self.embedding_model)
-            await self.rag_system.initialize()
-            
-            logger.info("All models loaded successfully!")
-            
+                # Imports and weight loading block, keep them off the event loop
+                await asyncio.to_thread(loader)
+        except ImportError as e:
+            status.update(state="unavailable", error=str(e))
         except Exception as e:
-            logger.error(f"Error loading models: {str(e)}", exc_info=True)
-            raise
+            status.update(state="failed", error=str(e))
+        else:
+            status["state"] = "ready"
+        status["seconds"] = round(time.perf_counter() - start, 2)
+        
+        if status["state"] == "ready":
+            logger.info(f"Loaded {name} model in {status['seconds']}s")
+        else:
+            logger.warning(f"{name} model {status['state']} after {status['seconds']}s: {status['error']}")
+        return status["state"] == "ready"
+    
+    async def _load_embedding_and_rag(self):
+        if await self._run_phase("embedding", self._load_embedding):
+            await self._run_phase("rag", self._load_rag)
+        else:
+            self.model_states["rag"].update(state="unavailable", error="Embedding model not loaded")
+    
+    async def load_models(self):
+        """Load all ML models concurrently; failures leave the rule-based fallbacks in place"""
+        logger.info("Loading ML models...")
+        start = time.perf_counter()
+        await asyncio.gather(
+            self._run_phase("classifier", self._load_classifier),
+            self._run_phase("sentiment", self._load_sentiment),
+            self._load_embedding_and_rag()
+        )
+        ready = [name for name in MODEL_NAMES if self.model_is_ready(name)]
+        logger.info(
+            f"ML model loading finished in {time.perf_counter() - start:.2f}s "
+            f"({len(ready)}/{len(MODEL_NAMES)} ready: {', '.join(ready) or 'none'})"
+        )
+    
+    def start_background_loading(self) -> asyncio.Task:
+        """Schedule load_models on the running loop and return immediately"""
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self.load_models())
+        return self._load_task
+    
+    @property
+    def loading(self) -> bool:
+        """Whether background loading is still running"""
+        return self._load_task is not None and not self._load_task.done()
+    
+    def model_is_ready(self, name: str) -> bool:
+        return self.model_states[name]["state"] == "ready"
     
     def is_ready(self) -> bool:
         """Check if ML service is ready"""
         return (
-            self.classification_model is not None and
+            self.text_classifier is not None and
             self.sentiment_pipeline is not None and
             self.embedding_model is not None
         )
     
+    def status(self) -> Dict:
+        """Readiness summary with per-model state"""
+        if self.is_ready():
+            overall = "ready"
+        elif self._load_task is None:
+            # Loading was never scheduled (ML_BACKGROUND_LOADING=False); rule-based fallbacks only
+            overall = "disabled"
+        elif self.loading:
+            overall = "warming"
+        else:
+            overall = "degraded"
+        return {"status": overall, "models": {name: dict(state) for name, state in self.model_states.items()}}
+    
+    @track_inference("classify_ticket")
     async def classify_ticket(self, text: str) -> Dict:
         """Classify ticket into categories"""
-        if not self.is_ready():
-            raise Exception("ML models not loaded")
-        
         try:
-            # Simple keyword-based classification as fallback
-            text_lower = text.lower()
-            
-            # Category keywords
-            categories = {
-                "billing": ["payment", "charge", "invoice", "bill", "refund", "subscription"],
-                "technical": ["error", "bug", "not working", "broken", "crash", "issue", "problem"],
-                "account": ["password", "login", "access", "account", "sign in", "username"],
-                "complaint": ["disappointed", "upset", "angry", "terrible", "worst", "complaint"],
-                "feature_request": ["feature", "would like", "suggestion", "add", "implement", "wish"],
-                "general": ["question", "help", "how to", "what", "when", "where"]
-            }
-            
-            # Calculate scores for each category
-            scores = {}
-            for category, keywords in categories.items():
-                score = sum(1 for keyword in keywords if keyword in text_lower)
-                scores[category] = score
-            
-            # Get best category
-            if max(scores.values()) > 0:
-                best_category = max(scores, key=scores.get)
-                confidence = min(scores[best_category] / 5.0, 1.0)  # Normalize to 0-1
-            else:
-                best_category = "general"
-                confidence = 0.5
-            
-            # Normalize all scores
-            total_score = sum(scores.values()) if sum(scores.values()) > 0 else 1
-            all_predictions = {cat: score / total_score for cat, score in scores.items()}
-            
-            return {
-                "category": best_category,
-                "confidence": confidence,
-                "all_predictions": all_predictions
-            }
+            # Keyword-based classification shared with the API endpoints
+            return classify_features(extract_features(text))
             
         except Exception as e:
             logger.error(f"Classification error: {str(e)}")
@@ -155,14 +173,28 @@ class MLService:
                 "all_predictions": {"general": 1.0}
             }
     
+    @track_inference("classify_batch")
+    async def classify_batch(self, texts: List[str]) -> List[Dict]:
+        """Classify many tickets with one vectorizer pass"""
+        if self.text_classifier and self.text_classifier.is_ready():
+            return self.text_classifier.predict_batch(texts)
+        return [classify_features(extract_features(text)) for text in texts]
+    
+    @track_inference("sentiment")
     async def analyze_sentiment(self, text: str) -> Dict:
-        """Analyze sentiment and calculate urgency score"""
-        if not self.is_ready():
-            raise Exception("ML models not loaded")
+        """Analyze sentiment and calculate urgency score, by keyword rules until the model is warm"""
+        features = extract_features(text)
+        if self.sentiment_pipeline is None:
+            sentiment = sentiment_from_features(features)
+            return {
+                "sentiment": sentiment["sentiment"],
+                "score": sentiment["score"],
+                "urgency_score": urgency_from_features(features, sentiment["sentiment"])
+            }
         
         try:
             # Get sentiment from model
-            sentiment_result = self.sentiment_pipeline(text[:512])[0]  # Truncate to model max length
+            sentiment_result = (await asyncio.to_thread(self.sentiment_pipeline, text[:512]))[0]  # Truncate to model max length
             
             sentiment_label = sentiment_result['label'].lower()
             sentiment_score = sentiment_result['score']
@@ -175,30 +207,13 @@ class MLService:
             else:
                 sentiment = "neutral"
             
-            # Calculate urgency score based on keywords
-            text_lower = text.lower()
-            urgency_score = 0.3  # Base urgency
-            
-            for keyword, weight in self.urgency_keywords.items():
-                if keyword in text_lower:
-                    urgency_score = max(urgency_score, weight)
-            
-            # Adjust urgency based on sentiment
-            if sentiment == "negative":
-                urgency_score = min(urgency_score + 0.2, 1.0)
-            
-            # Check for exclamation marks and caps
-            if text.count('!') > 2:
-                urgency_score = min(urgency_score + 0.1, 1.0)
-            
-            caps_ratio = sum(1 for c in text if c.isupper()) / len(text) if len(text) > 0 else 0
-            if caps_ratio > 0.3:
-                urgency_score = min(urgency_score + 0.15, 1.0)
+            # Calculate urgency score from the shared keyword features
+            urgency_score = urgency_from_features(features, sentiment)
             
             return {
                 "sentiment": sentiment,
                 "score": sentiment_score,
-                "urgency_score": round(urgency_score, 2)
+                "urgency_score": urgency_score
             }
             
         except Exception as e:
@@ -209,6 +224,7 @@ class MLService:
                 "urgency_score": 0.5
             }
     
+    @track_inference("rag_suggest_response")
     async def suggest_response(self, ticket_text: str, category: str = None) -> Dict:
         """Generate suggested response using RAG system"""
         if not self.rag_system:
@@ -229,3 +245,14 @@ class MLService:
                 "source_tickets": [],
                 "reasoning": f"Error generating response: {str(e)}"
             }
+
+
+_ml_service: Optional[MLService] = None
+
+
+def get_ml_service() -> MLService:
+    """Shared ML service for this process"""
+    global _ml_service
+    if _ml_service is None:
+        _ml_service = MLService()
+    return _ml_service
@@ -17,6 +17,7 @@ class RAGSystem:
         self.embedding_model = embedding_model
         self.client = None
         self.collection = None
+        self.ticket_collection = None
         
     async def initialize(self):
         """Initialize ChromaDB and collection"""
@@ -50,6 +51,12 @@ class RAGSystem:
                 # Add some sample responses
                 await self.add_sample_responses()
             
+            # Incoming tickets, kept apart so they are never suggested as responses
+            self.ticket_collection = self.client.get_or_create_collection(
+                name=settings.CHROMA_TICKET_COLLECTION_NAME,
+                metadata={"description": "Incoming support tickets"}
+            )
+            
             logger.info("RAG system initialized successfully")
             
         except Exception as e:
@@ -140,6 +147,44 @@ class RAGSystem:
         except Exception as e:
             logger.error(f"Error adding ticket to knowledge base: {str(e)}")
     
+    async def add_tickets(self, tickets: List[Dict]) -> int:
+        """Index incoming tickets (id, text, category) with one batched encode"""
+        if not tickets:
+            return 0
+        
+        embeddings = self.embedding_model.encode([t["text"] for t in tickets]).tolist()
+        self.ticket_collection.upsert(
+            embeddings=embeddings,
+            documents=[t["text"] for t in tickets],
+            metadatas=[{"category": t["category"] or "", "ticket_id": str(t["id"])} for t in tickets],
+            ids=[f"ticket_{t['id']}" for t in tickets]
+        )
+        return len(tickets)
+    
+    async def search_similar_tickets(self, query: str, n_results: int = 5) -> List[Dict]:
+        """Find previously indexed tickets similar to a text"""
+        try:
+            query_embedding = self.embedding_model.encode(query).tolist()
+            
+            results = self.ticket_collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results
+            )
+            
+            return [
+                {
+                    "ticket_id": int(results['metadatas'][0][idx]["ticket_id"]),
+                    "category": results['metadatas'][0][idx].get("category", ""),
+                    "ticket_text": doc,
+                    "similarity": round(1.0 - results['distances'][0][idx], 2)
+                }
+                for idx, doc in enumerate(results['documents'][0])
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error searching similar tickets: {str(e)}")
+            return []
+    
     async def generate_response(self, ticket_text: str, category: str = None) -> Dict:
         """Generate response suggestion based on similar tickets"""
         try:
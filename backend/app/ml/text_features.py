@@ -0,0 +1,257 @@
+"""
+Shared rule-based text features for ticket classification and sentiment
+
+All keyword dictionaries live here and are compiled once into a shared
+matcher, so ticket creation, the /ml endpoints and MLService score the same
+text the same way.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    "billing": ["payment", "charge", "invoice", "bill", "refund", "subscription"],
+    "technical": ["error", "bug", "not working", "broken", "crash", "issue", "problem"],
+    "account": ["password", "login", "access", "account", "sign in", "username"],
+    "complaint": ["disappointed", "upset", "angry", "terrible", "worst", "complaint"],
+    "feature_request": ["feature", "would like", "suggestion", "add", "implement", "wish"],
+    "general": ["question", "help", "how to", "what", "when", "where"]
+}
+
+NEGATIVE_WORDS = ['angry', 'terrible', 'worst', 'disappointed', 'frustrated', 'broken', 'upset']
+POSITIVE_WORDS = ['great', 'good', 'thanks', 'appreciate', 'helpful', 'excellent', 'amazing']
+
+URGENCY_KEYWORDS: Dict[str, float] = {
+    "urgent": 1.0,
+    "asap": 0.9,
+    "immediately": 0.9,
+    "critical": 0.95,
+    "emergency": 1.0,
+    "broken": 0.7,
+    "not working": 0.7,
+    "down": 0.8,
+    "error": 0.6,
+    "failed": 0.6,
+    "cannot": 0.5,
+    "unable": 0.5
+}
+
+# Starting urgency per category before keyword/sentiment adjustments
+CATEGORY_BASE_URGENCY: Dict[str, float] = {
+    "account": 0.6,
+    "billing": 0.7,
+    "technical": 0.8,
+    "feature_request": 0.3,
+    "complaint": 0.7,
+    "general": 0.5
+}
+
+BASE_URGENCY = 0.3
+
+
+@dataclass
+class TextFeatures:
+    """Everything the rule-based classifiers need from one ticket text"""
+    category_scores: Dict[str, int]
+    negative_count: int
+    positive_count: int
+    urgency_weight: float
+    exclamation_count: int
+    caps_ratio: float
+
+
+class KeywordMatcher:
+    """
+    Keyword dictionaries compiled into one deduplicated probe table
+
+    Each distinct keyword is searched for at most once per text no matter how
+    many dictionaries it appears in, and keywords that are substrings of a
+    longer keyword (e.g. "help" in "helpful") are implied by a hit on the
+    longer one instead of being searched again. Each probe is still one C
+    substring search over the text; a regex or automaton stepped from Python
+    measured slower at this dictionary size. Every hit is then folded into
+    category scores, sentiment counts and urgency weight.
+    """
+
+    def __init__(
+        self,
+        category_keywords: Dict[str, List[str]],
+        negative_words: List[str],
+        positive_words: List[str],
+        urgency_keywords: Dict[str, float]
+    ):
+        self.categories = list(category_keywords)
+
+        # keyword -> list of (kind, value) contributions
+        contributions: Dict[str, list] = {}
+        for category, keywords in category_keywords.items():
+            for keyword in dict.fromkeys(keywords):
+                contributions.setdefault(keyword, []).append(("category", category))
+        for word in dict.fromkeys(negative_words):
+            contributions.setdefault(word, []).append(("negative", 1))
+        for word in dict.fromkeys(positive_words):
+            contributions.setdefault(word, []).append(("positive", 1))
+        for keyword, weight in urgency_keywords.items():
+            contributions.setdefault(keyword, []).append(("urgency", weight))
+
+        # Longest first so substring keywords are usually already implied
+        self._keywords = sorted(contributions, key=len, reverse=True)
+        self._index = {keyword: i for i, keyword in enumerate(self._keywords)}
+        self._contributions = [contributions[k] for k in self._keywords]
+        self._implied = [
+            tuple(
+                self._index[other] for other in self._keywords
+                if other != keyword and other in keyword
+            )
+            for keyword in self._keywords
+        ]
+
+    def matches(self, text_lower: str) -> List[str]:
+        """Return every known keyword that occurs in already-lowercased text"""
+        return [self._keywords[i] for i in self._match_ids(text_lower)]
+
+    def _match_ids(self, text_lower: str) -> List[int]:
+        found = [False] * len(self._keywords)
+        hits = []
+        for i, keyword in enumerate(self._keywords):
+            if found[i]:
+                continue
+            if keyword in text_lower:
+                found[i] = True
+                hits.append(i)
+                for j in self._implied[i]:
+                    if not found[j]:
+                        found[j] = True
+                        hits.append(j)
+        return hits
+
+    def extract(self, text: str) -> TextFeatures:
+        """Compute all rule-based features of a text"""
+        category_scores = dict.fromkeys(self.categories, 0)
+        negative_count = 0
+        positive_count = 0
+        urgency_weight: Optional[float] = None
+
+        for i in self._match_ids(text.lower()):
+            for kind, value in self._contributions[i]:
+                if kind == "category":
+                    category_scores[value] += 1
+                elif kind == "negative":
+                    negative_count += 1
+                elif kind == "positive":
+                    positive_count += 1
+                elif urgency_weight is None or value > urgency_weight:
+                    urgency_weight = value
+
+        text_length = len(text)
+        caps_ratio = _count_upper(text) / text_length if text_length > 0 else 0
+
+        return TextFeatures(
+            category_scores=category_scores,
+            negative_count=negative_count,
+            positive_count=positive_count,
+            urgency_weight=urgency_weight or 0.0,
+            exclamation_count=text.count('!'),
+            caps_ratio=caps_ratio
+        )
+
+
+_ASCII_UPPER = bytes(range(ord("A"), ord("Z") + 1))
+
+
+def _count_upper(text: str) -> int:
+    """Number of uppercase characters, as sum(c.isupper() for c in text)"""
+    if text.isascii():
+        # Only A-Z are uppercase in ASCII; deleting them in C beats a per-character loop
+        return len(text) - len(text.encode("ascii").translate(None, _ASCII_UPPER))
+    return sum(map(str.isupper, text))
+
+
+_matcher = KeywordMatcher(CATEGORY_KEYWORDS, NEGATIVE_WORDS, POSITIVE_WORDS, URGENCY_KEYWORDS)
+
+
+def extract_features(text: str) -> TextFeatures:
+    """Extract rule-based features using the shared compiled matcher"""
+    return _matcher.extract(text)
+
+
+def classify_features(features: TextFeatures) -> Dict:
+    """Pick a category from keyword scores"""
+    scores = features.category_scores
+
+    if max(scores.values()) > 0:
+        best_category = max(scores, key=scores.get)
+        confidence = min(scores[best_category] / 5.0, 1.0)  # Normalize to 0-1
+    else:
+        best_category = "general"
+        confidence = 0.5
+
+    total_score = sum(scores.values()) if sum(scores.values()) > 0 else 1
+    all_predictions = {cat: score / total_score for cat, score in scores.items()}
+
+    return {
+        "category": best_category,
+        "confidence": confidence,
+        "all_predictions": all_predictions
+    }
+
+
+def sentiment_from_features(features: TextFeatures) -> Dict:
+    """Keyword-count sentiment"""
+    if features.negative_count > features.positive_count:
+        return {"sentiment": "negative", "score": 0.3}
+    if features.positive_count > features.negative_count:
+        return {"sentiment": "positive", "score": 0.8}
+    return {"sentiment": "neutral", "score": 0.5}
+
+
+def urgency_from_features(features: TextFeatures, sentiment: str, category: str = None) -> float:
+    """
+    Combine keyword, sentiment and punctuation signals into urgency
+
+    Starts from BASE_URGENCY, as MLService always has; ticket enrichment
+    passes the category to start from its CATEGORY_BASE_URGENCY instead.
+    """
+    urgency_score = CATEGORY_BASE_URGENCY.get(category, BASE_URGENCY)
+    urgency_score = max(urgency_score, features.urgency_weight)
+
+    # Adjust urgency based on sentiment
+    if sentiment == "negative":
+        urgency_score = min(urgency_score + 0.2, 1.0)
+
+    # Check for exclamation marks and caps
+    if features.exclamation_count > 2:
+        urgency_score = min(urgency_score + 0.1, 1.0)
+
+    if features.caps_ratio > 0.3:
+        urgency_score = min(urgency_score + 0.15, 1.0)
+
+    return round(urgency_score, 2)
+
+
+def analyze_text(text: str) -> Dict:
+    """Rule-based category, sentiment and urgency of a text from one feature extraction"""
+    features = extract_features(text)
+    classification = classify_features(features)
+    sentiment = sentiment_from_features(features)
+
+    return {
+        **classification,
+        "sentiment": sentiment["sentiment"],
+        "sentiment_score": sentiment["score"],
+        "urgency_score": urgency_from_features(
+            features, sentiment["sentiment"], classification["category"]
+        )
+    }
+
+
+def priority_from_urgency(urgency_score: float) -> str:
+    """Map an urgency score to a ticket priority"""
+    if urgency_score > 0.8:
+        return "urgent"
+    elif urgency_score > 0.6:
+        return "high"
+    elif urgency_score > 0.3:
+        return "medium"
+    return "low"
@@ -37,6 +37,29 @@ class TicketCreate(BaseModel):
     description: str = Field(..., min_length=10)
 
 
+class BulkTicketCreate(BaseModel):
+    """Schema for bulk ticket creation; items are validated one by one as TicketCreate"""
+    tickets: List[dict] = Field(..., min_length=1)
+
+
+class BulkTicketResult(BaseModel):
+    """Outcome of one item of a bulk ticket creation"""
+    index: int
+    ticket_id: Optional[int] = None
+    ticket_number: Optional[str] = None
+    category: Optional[TicketCategory] = None
+    priority: Optional[TicketPriority] = None
+    sentiment: Optional[str] = None
+    errors: Optional[List[dict]] = None
+
+
+class BulkTicketCreateResponse(BaseModel):
+    """Schema for bulk ticket creation response"""
+    created: int
+    failed: int
+    results: List[BulkTicketResult]
+
+
 class TicketUpdate(BaseModel):
     """Schema for updating a ticket"""
     subject: Optional[str] = None
@@ -147,6 +170,17 @@ class ClassificationResponse(BaseModel):
     all_predictions: dict
 
 
+class BatchClassificationRequest(BaseModel):
+    """Schema for batch classification request"""
+    texts: List[str] = Field(..., min_length=1)
+
+
+class BatchClassificationResponse(BaseModel):
+    """Schema for batch classification response"""
+    model: str
+    results: List[ClassificationResponse]
+
+
 class SentimentResponse(BaseModel):
     """Schema for sentiment response"""
     sentiment: str
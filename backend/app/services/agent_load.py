@@ -0,0 +1,203 @@
+import logging
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import committed_values
+from models.ticket import Ticket, Agent, TicketStatus
+
+logger = logging.getLogger(__name__)
+
+
+LOAD_FIELDS = ("assigned_to", "status")
+_DELTAS_KEY = "agent_load_deltas"
+_COMMITTED_KEY = "agent_load_pending_commit"
+_CLAIMS_KEY = "agent_load_claims"
+
+_commit_hooks: List[Callable[[Dict[int, int]], None]] = []
+
+
+def on_load_committed(hook: Callable[[Dict[int, int]], None]):
+    """Register a callback receiving per-agent deltas once their transaction commits"""
+    _commit_hooks.append(hook)
+    return hook
+
+
+def counts_toward_load(status) -> bool:
+    """Tickets count against an agent's capacity until they are closed"""
+    return status != TicketStatus.CLOSED
+
+
+def _loaded_agent(assigned_to, status) -> Optional[int]:
+    return assigned_to if assigned_to is not None and counts_toward_load(status) else None
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_load_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault(_DELTAS_KEY, Counter())
+
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            agent_id = _loaded_agent(obj.assigned_to, obj.status)
+            if agent_id is not None:
+                deltas[agent_id] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj):
+            old = committed_values(session, obj, LOAD_FIELDS)
+            old_agent = _loaded_agent(old["assigned_to"], old["status"])
+            new_agent = _loaded_agent(obj.assigned_to, obj.status)
+            if old_agent != new_agent:
+                if old_agent is not None:
+                    deltas[old_agent] -= 1
+                if new_agent is not None:
+                    deltas[new_agent] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            old = committed_values(session, obj, LOAD_FIELDS)
+            old_agent = _loaded_agent(old["assigned_to"], old["status"])
+            if old_agent is not None:
+                deltas[old_agent] -= 1
+
+    # Slots taken by claim_agent_slot were already counted in the database
+    claims = session.info.pop(_CLAIMS_KEY, None)
+    if claims:
+        deltas.subtract(claims)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_collected_deltas(session, flush_context):
+    deltas = session.info.get(_DELTAS_KEY)
+    if deltas:
+        record_load_deltas(session, deltas)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_updated_agents(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if not deltas:
+        return
+    _expire_counters(session, deltas)
+
+
+def _expire_counters(session: Session, agent_ids):
+    # The counter was changed behind the ORM's back; reload it on next access
+    for obj in session.identity_map.values():
+        if isinstance(obj, Agent) and obj.id in agent_ids:
+            session.expire(obj, ["open_ticket_count"])
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_committed_deltas(session):
+    deltas = session.info.pop(_COMMITTED_KEY, None)
+    if not deltas:
+        return
+    for hook in _commit_hooks:
+        try:
+            hook(dict(deltas))
+        except Exception as e:
+            logger.warning(f"Agent load commit hook failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_uncommitted_deltas(session):
+    session.info.pop(_DELTAS_KEY, None)
+    session.info.pop(_CLAIMS_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
+
+
+def apply_load_deltas(connection, deltas: Dict[int, int]):
+    """
+    Add per-agent deltas to agents.open_ticket_count
+
+    ORM ticket writes are tracked by the flush listeners above; bulk Core
+    updates of assigned_to/status must call this on the same connection so
+    the counter commits or rolls back with them.
+    """
+    rows = [{"agent_id": agent_id, "delta": delta} for agent_id, delta in deltas.items() if delta]
+    if not rows:
+        return
+
+    table = Agent.__table__
+    connection.execute(
+        table.update().where(
+            table.c.id == bindparam("agent_id")
+        ).values(
+            open_ticket_count=table.c.open_ticket_count + bindparam("delta")
+        ),
+        rows
+    )
+
+
+def record_load_deltas(session: Session, deltas: Dict[int, int]):
+    """Apply deltas in the session's transaction and report them to commit hooks"""
+    apply_load_deltas(session.connection(), deltas)
+    session.info.setdefault(_COMMITTED_KEY, Counter()).update(deltas)
+
+
+def claim_agent_slot(session: Session, agent_id: int) -> bool:
+    """
+    Atomically take one unit of an agent's spare capacity
+
+    A single conditional UPDATE increments open_ticket_count only while it is
+    below max_tickets, so concurrent workers can never over-fill an agent and
+    nothing has to be locked. The claim is consumed by the next flush that
+    assigns a ticket to the agent; use assign_ticket_to_agent rather than
+    calling this directly.
+    """
+    table = Agent.__table__
+    result = session.connection().execute(
+        table.update().where(
+            table.c.id == agent_id,
+            table.c.is_active == True,
+            table.c.is_available == True,
+            table.c.open_ticket_count < table.c.max_tickets
+        ).values(
+            open_ticket_count=table.c.open_ticket_count + 1
+        )
+    )
+    if result.rowcount != 1:
+        return False
+
+    session.info.setdefault(_CLAIMS_KEY, Counter())[agent_id] += 1
+    session.info.setdefault(_COMMITTED_KEY, Counter())[agent_id] += 1
+    _expire_counters(session, {agent_id})
+    return True
+
+
+def assign_ticket_to_agent(session: Session, ticket: Ticket, agent_id: int) -> bool:
+    """
+    Assign a ticket if the agent has a free slot; returns False when full
+
+    The ticket should be loaded FOR UPDATE (or SKIP LOCKED) so two workers
+    can't reassign it at the same time. Flushes but does not commit.
+    """
+    already_counted = ticket.assigned_to == agent_id and counts_toward_load(ticket.status)
+    if not already_counted and not claim_agent_slot(session, agent_id):
+        return False
+
+    ticket.assigned_to = agent_id
+    ticket.status = TicketStatus.IN_PROGRESS
+    session.flush()
+    return True
+
+
+def repair_open_ticket_counts(db: Session) -> int:
+    """Recompute open_ticket_count from the tickets table; returns the number of agents fixed"""
+    actual = select(func.count(Ticket.id)).where(
+        Ticket.assigned_to == Agent.id,
+        or_(Ticket.status.is_(None), Ticket.status != TicketStatus.CLOSED)
+    ).scalar_subquery()
+
+    result = db.execute(
+        update(Agent).where(Agent.open_ticket_count != actual).values(open_ticket_count=actual),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+
+    if result.rowcount:
+        logger.warning(f"Repaired open_ticket_count for {result.rowcount} agents")
+    return result.rowcount
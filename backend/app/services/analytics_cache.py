@@ -0,0 +1,344 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResult:
+    """A computed analytics payload and when/for which generation it was computed"""
+    value: Any
+    computed_at: float
+    generation: int
+
+
+class MemoryAnalyticsStore:
+    """Per-process store; invalidation only reaches this worker"""
+
+    blocking = False
+
+    def __init__(self):
+        self._entries: Dict[str, CachedResult] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        return self._entries.get(key)
+
+    def set(self, key: str, result: CachedResult):
+        with self._lock:
+            # A result computed before an invalidation must not be stored
+            if result.generation == self._generation:
+                self._entries[key] = result
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def acquire(self, key: str, wait: float) -> bool:
+        # Only background refreshes lock here; requests single-flight on the event loop instead
+        lock = self._key_lock(key)
+        return lock.acquire(timeout=wait) if wait > 0 else lock.acquire(blocking=False)
+
+    def release(self, key: str):
+        self._key_lock(key).release()
+
+
+# Deletes the lock only if it still holds our token, i.e. it did not expire and pass to another worker
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisAnalyticsStore:
+    """Store shared by all workers; entries are namespaced by a generation counter"""
+
+    blocking = True
+
+    def __init__(self, url: str, max_age: int, lock_seconds: int, prefix: str = "analytics_cache"):
+        import redis
+
+        self.max_age = max_age
+        self.lock_seconds = lock_seconds
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._release_lock = self._redis.register_script(_RELEASE_LOCK_SCRIPT)
+        self._tokens: Dict[str, str] = {}
+
+    def generation(self) -> int:
+        return int(self._redis.get(f"{self.prefix}:generation") or 0)
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        raw = self._redis.get(f"{self.prefix}:{self.generation()}:{key}")
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CachedResult(data["value"], data["computed_at"], data["generation"])
+
+    def set(self, key: str, result: CachedResult):
+        payload = json.dumps({
+            "value": result.value,
+            "computed_at": result.computed_at,
+            "generation": result.generation
+        }, default=str)
+        # Stale generations are never read again and simply expire
+        self._redis.set(f"{self.prefix}:{result.generation}:{key}", payload, ex=self.max_age)
+
+    def invalidate(self):
+        self._redis.incr(f"{self.prefix}:generation")
+
+    def acquire(self, key: str, wait: float) -> bool:
+        lock_key = f"{self.prefix}:lock:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait
+        while True:
+            if self._redis.set(lock_key, token, nx=True, ex=self.lock_seconds):
+                self._tokens[key] = token
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def release(self, key: str):
+        token = self._tokens.pop(key, None)
+        if token is not None:
+            self._release_lock(keys=[f"{self.prefix}:lock:{key}"], args=[token])
+
+
+class AnalyticsCache:
+    """
+    Result cache for analytics endpoints
+
+    Results younger than ttl_seconds are served as-is. Results up to
+    stale_seconds past the TTL are still served, while a single background
+    thread recomputes them. Older or missing results are recomputed in the
+    request; concurrent requests for the same key wait for that computation
+    instead of running their own. Writes call invalidate(), which discards
+    every cached result.
+    """
+
+    def __init__(self, store, ttl_seconds: int, stale_seconds: int, wait_seconds: float):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.wait_seconds = wait_seconds
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self.store_errors = 0
+
+        # In-flight computations of a non-blocking store, awaited on the event loop
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def _compute(self, key: str, compute: Callable[[Session], Any], db: AsyncSession) -> Any:
+        generation = await self._run(self.store.generation, default=0)
+        value = await db.run_sync(compute)
+        await self._run(self.store.set, key, CachedResult(value, time.time(), generation))
+        return value
+
+    async def _run(self, method, *args, default=None):
+        """Call a store method, off the event loop if it may block"""
+        if self.store.blocking:
+            return await asyncio.to_thread(self._safe, method, *args, default=default)
+        return self._safe(method, *args, default=default)
+
+    def _safe(self, method, *args, default=None):
+        try:
+            return method(*args)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"Analytics cache store error: {e}")
+            return default
+
+    def _refresh_in_background(self, key: str, compute: Callable[[Session], Any]):
+        if not self._safe(self.store.acquire, key, 0, default=False):
+            return  # another request is already refreshing this key
+
+        def refresh():
+            # The request's session is closed by the time this runs
+            db = SessionLocal()
+            try:
+                generation = self._safe(self.store.generation, default=0)
+                value = compute(db)
+                self._safe(self.store.set, key, CachedResult(value, time.time(), generation))
+                self.refreshes += 1
+            except Exception as e:
+                logger.warning(f"Background refresh of analytics '{key}' failed: {e}")
+            finally:
+                db.close()
+                self._safe(self.store.release, key)
+
+        threading.Thread(target=refresh, name=f"analytics-refresh-{key}", daemon=True).start()
+
+    async def get_or_compute(self, key: str, compute: Callable[[Session], Any], db: AsyncSession) -> Any:
+        """Cached value for key, computing it with compute(session) when needed"""
+        cached = await self._run(self.store.get, key)
+        if cached is not None:
+            age = time.time() - cached.computed_at
+            if age <= self.ttl_seconds:
+                self.hits += 1
+                record_cache_lookup("analytics", "hit")
+                return cached.value
+            if age <= self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                record_cache_lookup("analytics", "stale")
+                await self._run(self._refresh_in_background, key, compute)
+                return cached.value
+
+        self.misses += 1
+        record_cache_lookup("analytics", "miss")
+        if not self.store.blocking:
+            return await self._compute_single_flight(key, compute, db)
+
+        # Waiting on the Redis lock polls, so it runs off the event loop
+        acquired = await self._run(self.store.acquire, key, self.wait_seconds, default=False)
+        try:
+            if acquired:
+                # Whoever held the lock may have just stored a fresh result
+                cached = await self._run(self.store.get, key)
+                if cached is not None and time.time() - cached.computed_at <= self.ttl_seconds:
+                    return cached.value
+            return await self._compute(key, compute, db)
+        finally:
+            if acquired:
+                await self._run(self.store.release, key)
+
+    async def _compute_single_flight(self, key: str, compute: Callable[[Session], Any], db: AsyncSession) -> Any:
+        """Compute key once per process; concurrent misses await the same future"""
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            try:
+                return await asyncio.wait_for(asyncio.shield(pending), self.wait_seconds)
+            except Exception:
+                pass  # timed out or the computation failed; compute it here instead
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._compute(key, compute, db)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, so an unwaited failure is not logged twice
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                self._inflight.pop(key, None)
+
+    def _forget_inflight(self):
+        # Requests after a write must not be handed a result computed before it
+        self._inflight.clear()
+
+    def invalidate(self):
+        self.invalidations += 1
+        self._forget_inflight()
+        self._safe(self.store.invalidate)
+
+    async def invalidate_async(self):
+        """invalidate() for request handlers, off the event loop if the store may block"""
+        self.invalidations += 1
+        self._forget_inflight()
+        await self._run(self.store.invalidate)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": type(self.store).__name__,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "background_refreshes": self.refreshes,
+            "invalidations": self.invalidations,
+            "store_errors": self.store_errors,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds
+        }
+
+
+def _create_store():
+    if settings.ANALYTICS_CACHE_BACKEND.lower() == "redis":
+        try:
+            store = RedisAnalyticsStore(
+                settings.REDIS_URL,
+                max_age=settings.ANALYTICS_CACHE_TTL_SECONDS + settings.ANALYTICS_CACHE_STALE_SECONDS,
+                lock_seconds=max(int(settings.ANALYTICS_CACHE_WAIT_SECONDS * 4), 30)
+            )
+            store.generation()
+            return store
+        except Exception as e:
+            logger.warning(f"Analytics cache Redis backend unavailable, using memory: {e}")
+    return MemoryAnalyticsStore()
+
+
+_analytics_cache: Optional[AnalyticsCache] = None
+
+
+def get_analytics_cache() -> Optional[AnalyticsCache]:
+    """Shared analytics cache, or None when disabled"""
+    global _analytics_cache
+    if not settings.ANALYTICS_CACHE_ENABLED:
+        return None
+    if _analytics_cache is None:
+        _analytics_cache = AnalyticsCache(
+            store=_create_store(),
+            ttl_seconds=settings.ANALYTICS_CACHE_TTL_SECONDS,
+            stale_seconds=settings.ANALYTICS_CACHE_STALE_SECONDS,
+            wait_seconds=settings.ANALYTICS_CACHE_WAIT_SECONDS
+        )
+    return _analytics_cache
+
+
+async def cached_analytics(key: str, compute: Callable[[Session], Any], db: AsyncSession) -> Any:
+    """
+    Serve compute(session) through the analytics cache when it is enabled
+
+    compute is plain synchronous ORM code; it runs on the async session's
+    connection through run_sync, so it never blocks the event loop.
+    """
+    cache = get_analytics_cache()
+    if cache is None:
+        return await db.run_sync(compute)
+    return await cache.get_or_compute(key, compute, db)
+
+
+def invalidate_analytics():
+    """Drop cached analytics after tickets or agents change"""
+    cache = get_analytics_cache()
+    if cache is not None:
+        cache.invalidate()
+
+
+async def invalidate_analytics_async():
+    """invalidate_analytics() for async handlers; a Redis store is called off the event loop"""
+    cache = get_analytics_cache()
+    if cache is not None:
+        await cache.invalidate_async()
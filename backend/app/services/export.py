@@ -0,0 +1,77 @@
+import csv
+import enum
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Iterator, List
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from models.ticket import Ticket
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_COLUMNS = [
+    "id", "ticket_number", "customer_name", "customer_email", "customer_id",
+    "subject", "description", "category", "category_confidence", "priority",
+    "sentiment", "sentiment_score", "urgency_score", "status", "assigned_to",
+    "created_at", "updated_at", "resolved_at"
+]
+
+
+def build_export_query(conditions: List):
+    """Column-only select of tickets in (created_at, id) order"""
+    table = Ticket.__table__
+    return select(
+        *[table.c[name] for name in EXPORT_COLUMNS]
+    ).where(*conditions).order_by(table.c.created_at, table.c.id)
+
+
+def _serialize(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_tickets(query, fmt: str) -> Iterator[str]:
+    """
+    Stream query rows as NDJSON or CSV
+
+    Uses its own session because the response outlives the request's
+    dependencies. yield_per makes the driver use a server-side cursor where
+    supported, so only one batch is held in memory and rows are sent while
+    the query is still running.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+            yield buffer.getvalue()
+
+        exported = 0
+        for partition in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in partition:
+                values = [_serialize(value) for value in row]
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))))
+                    buffer.write("\n")
+            exported += len(partition)
+            yield buffer.getvalue()
+
+        logger.info(f"Exported {exported} tickets as {fmt}")
+    finally:
+        db.close()
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import LLM_REQUEST_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+SUPPORT_SYSTEM_PROMPT = (
+    "You are a helpful customer support agent. "
+    "Write a concise, empathetic response to the customer's support ticket. "
+    "Keep it under 3 sentences. Do not use placeholder text like [Name]."
+)
+
+
+def build_support_messages(ticket_text: str, category: str) -> List[Dict]:
+    """Chat messages for a suggested support reply"""
+    return [
+        {"role": "system", "content": SUPPORT_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Category: {category}\n\nTicket: {ticket_text}"}
+    ]
+
+
+class LLMClient:
+    """
+    Process-wide async Groq client
+
+    Holds one pooled keep-alive HTTP connection pool for the whole process and
+    caps the number of in-flight completions with a semaphore. Every call is
+    bounded by a timeout (including time spent waiting for a slot) and returns
+    None on failure so callers can fall back to templates.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_concurrency: int,
+        timeout: float,
+        base_url: str = ""
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self):
+        if self._client is None:
+            from groq import AsyncGroq
+
+            http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._client = AsyncGroq(
+                api_key=self.api_key,
+                base_url=self.base_url or None,
+                http_client=http_client,
+                timeout=self.timeout,
+                max_retries=0
+            )
+        return self._client
+
+    async def complete(self, messages: List[Dict], max_tokens: int = 200) -> Optional[str]:
+        """Run a chat completion, or return None if disabled, saturated, slow or failing"""
+        if not self.enabled:
+            return None
+
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(
+                self._complete(messages, max_tokens),
+                timeout=self.timeout
+            )
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning(f"Groq call timed out after {self.timeout}s, falling back to templates")
+        except Exception as e:
+            logger.warning(f"Groq API error, falling back to templates: {e}")
+        finally:
+            LLM_REQUEST_DURATION.labels(operation="complete", outcome=outcome).observe(time.perf_counter() - start)
+        return None
+
+    async def _complete(self, messages: List[Dict], max_tokens: int) -> str:
+        async with self._semaphore:
+            chat = await self._get_client().chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+            )
+        return chat.choices[0].message.content.strip()
+
+    async def stream(self, messages: List[Dict], max_tokens: int = 200) -> AsyncIterator[str]:
+        """
+        Yield completion tokens as they arrive
+
+        Waiting for a slot, the initial response and each following chunk are
+        each bounded by the timeout. Unlike complete(), failures raise so the
+        caller can decide how to finish a partially sent stream.
+        """
+        if not self.enabled:
+            return
+
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            LLM_REQUEST_DURATION.labels(operation="stream", outcome="timeout").observe(time.perf_counter() - start)
+            raise
+        stream = None
+        try:
+            stream = await asyncio.wait_for(
+                self._get_client().chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    stream=True,
+                ),
+                timeout=self.timeout
+            )
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            LLM_REQUEST_DURATION.labels(operation="stream", outcome=outcome).observe(time.perf_counter() - start)
+            self._semaphore.release()
+            if stream is not None:
+                await stream.response.aclose()
+
+    async def close(self):
+        """Close the pooled HTTP connections"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Shared LLM client for this process"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient(
+            api_key=settings.GROQ_API_KEY,
+            model=settings.LLM_MODEL,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            base_url=settings.GROQ_BASE_URL
+        )
+    return _llm_client
+
+
+async def close_llm_client():
+    """Release the shared client's connections on shutdown"""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
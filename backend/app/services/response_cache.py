@@ -0,0 +1,406 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDING_DIM = 1024
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def embed_text(text: str) -> np.ndarray:
+    """
+    Hashed bag-of-ngrams embedding (unit length)
+
+    Word unigrams, word bigrams and character trigrams are hashed with crc32
+    into a fixed-size vector, so embeddings are stable across processes and
+    can be shared through the disk/Redis backends. Near-duplicate tickets
+    ("charged twice" variants) land close together under cosine similarity.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    joined = " ".join(tokens)
+
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    features += [joined[i:i + 3] for i in range(len(joined) - 2)]
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode())
+        vector[h % EMBEDDING_DIM] += -1.0 if h & 0x80000000 else 1.0
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+@dataclass
+class CacheEntry:
+    """A stored suggestion and the embedding of the ticket that produced it"""
+    key: str
+    category: str
+    vector: np.ndarray
+    response: Dict
+    created_at: float
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "key": self.key,
+            "category": self.category,
+            "vector": base64.b64encode(self.vector.astype(np.float32).tobytes()).decode(),
+            "response": self.response,
+            "created_at": self.created_at
+        })
+
+    @classmethod
+    def from_json(cls, raw) -> "CacheEntry":
+        data = json.loads(raw)
+        return cls(
+            key=data["key"],
+            category=data["category"],
+            vector=np.frombuffer(base64.b64decode(data["vector"]), dtype=np.float32),
+            response=data["response"],
+            created_at=data["created_at"]
+        )
+
+
+class DiskCacheBackend:
+    """SQLite file shared by all workers on one host"""
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS suggestion_cache ("
+            "key TEXT PRIMARY KEY, category TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_suggestion_cache_category "
+            "ON suggestion_cache (category, created_at)"
+        )
+        self._conn.commit()
+
+    def _fetch(self, category: str, since: float) -> List[CacheEntry]:
+        since = max(since, time.time() - self.ttl_seconds)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM suggestion_cache WHERE category = ? AND created_at > ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (category, since, self.max_entries)
+            ).fetchall()
+        return [CacheEntry.from_json(row[0]) for row in rows]
+
+    def _store(self, entry: CacheEntry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO suggestion_cache (key, category, payload, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (entry.key, entry.category, entry.to_json(), entry.created_at)
+            )
+            self._conn.execute(
+                "DELETE FROM suggestion_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            # Keep only the newest max_entries rows
+            self._conn.execute(
+                "DELETE FROM suggestion_cache WHERE key NOT IN ("
+                "SELECT key FROM suggestion_cache ORDER BY created_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    async def fetch(self, category: str, since: float = 0.0) -> List[CacheEntry]:
+        """Unexpired entries of a category created after since"""
+        return await asyncio.to_thread(self._fetch, category, since)
+
+    async def store(self, entry: CacheEntry):
+        await asyncio.to_thread(self._store, entry)
+
+
+class RedisCacheBackend:
+    """
+    Redis hash per category, shared by all workers and nodes
+
+    A sorted set next to each hash indexes the entries by created_at, so
+    fetches only transfer entries newer than the caller has seen and the
+    expiry/size trimming on store never reads the payloads.
+    """
+
+    def __init__(self, url: str, max_entries: int, ttl_seconds: int, prefix: str = "suggestion_cache"):
+        import redis.asyncio as redis
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    def _key(self, category: str) -> str:
+        return f"{self.prefix}:{category}"
+
+    def _index_key(self, category: str) -> str:
+        return f"{self.prefix}:{category}:by_time"
+
+    async def fetch(self, category: str, since: float = 0.0) -> List[CacheEntry]:
+        """Unexpired entries of a category created after since"""
+        since = max(since, time.time() - self.ttl_seconds)
+        fields = await self._redis.zrangebyscore(self._index_key(category), f"({since}", "+inf")
+        if not fields:
+            return []
+        raw_entries = await self._redis.hmget(self._key(category), fields)
+        return [CacheEntry.from_json(raw) for raw in raw_entries if raw is not None]
+
+    async def store(self, entry: CacheEntry):
+        key, index_key = self._key(entry.category), self._index_key(entry.category)
+        cutoff = time.time() - self.ttl_seconds
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, entry.key, entry.to_json())
+            pipe.zadd(index_key, {entry.key: entry.created_at})
+            # Expired and, past max_entries, oldest fields
+            pipe.zrangebyscore(index_key, "-inf", f"({cutoff}")
+            pipe.zrange(index_key, 0, -self.max_entries - 1)
+            results = await pipe.execute()
+
+        stale = set(results[2]) | set(results[3])
+        async with self._redis.pipeline(transaction=False) as pipe:
+            if stale:
+                pipe.hdel(key, *stale)
+                pipe.zrem(index_key, *stale)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.expire(index_key, self.ttl_seconds)
+            await pipe.execute()
+
+
+class SemanticResponseCache:
+    """
+    Suggestion cache keyed by category plus ticket embedding
+
+    Lookups return a stored response when a previous ticket in the same
+    category has cosine similarity at or above the threshold. Entries are held
+    in an in-process LRU with a TTL. With a disk or Redis backend, a local
+    miss pulls the category's entries written since the last pull, at most
+    once per sync_seconds, so workers share each other's LLM results without
+    a backend round trip on every miss.
+    """
+
+    # Re-read this much before the newest pulled entry, for clock skew between writers
+    SYNC_OVERLAP_SECONDS = 60.0
+
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        ttl_seconds: int,
+        backend=None,
+        sync_seconds: float = 30.0
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.sync_seconds = sync_seconds
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._matrices: Dict[str, tuple] = {}
+        self._synced_at: Dict[str, float] = {}
+        self._newest_synced: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.backend_errors = 0
+        self.backend_syncs = 0
+
+    @staticmethod
+    def make_key(category: str, text: str) -> str:
+        normalized = " ".join(_TOKEN_RE.findall(text.lower()))
+        return hashlib.sha1(f"{category}\x00{normalized}".encode()).hexdigest()
+
+    def _is_expired(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.created_at > self.ttl_seconds
+
+    def _add(self, entry: CacheEntry):
+        if entry.key in self._entries:
+            self._entries.move_to_end(entry.key)
+        self._entries[entry.key] = entry
+        self._matrices.pop(entry.category, None)
+
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._matrices.pop(evicted.category, None)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._matrices.pop(entry.category, None)
+
+    def _matrix(self, category: str):
+        if category not in self._matrices:
+            entries = [e for e in self._entries.values() if e.category == category]
+            if entries:
+                matrix = np.stack([e.vector for e in entries])
+            else:
+                matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+            self._matrices[category] = ([e.key for e in entries], matrix)
+        return self._matrices[category]
+
+    def _search(self, category: str, vector: np.ndarray):
+        now = time.time()
+        while True:
+            keys, matrix = self._matrix(category)
+            if not keys:
+                return None, 0.0
+
+            similarities = matrix @ vector
+            best = int(similarities.argmax())
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None, similarity
+
+            entry = self._entries[keys[best]]
+            if not self._is_expired(entry, now):
+                return entry, similarity
+
+            self._remove(entry.key)
+            self.expirations += 1
+
+    def _sync_due(self, category: str) -> bool:
+        synced_at = self._synced_at.get(category)
+        return synced_at is None or time.monotonic() - synced_at >= self.sync_seconds
+
+    async def _sync(self, category: str):
+        """Pull backend entries of a category written since the previous pull"""
+        self._synced_at[category] = time.monotonic()
+        since = self._newest_synced.get(category, 0.0) - self.SYNC_OVERLAP_SECONDS
+        now = time.time()
+        for remote in await self.backend.fetch(category, since):
+            self._newest_synced[category] = max(self._newest_synced.get(category, 0.0), remote.created_at)
+            if remote.key not in self._entries and not self._is_expired(remote, now):
+                self._add(remote)
+        self.backend_syncs += 1
+
+    async def get(self, category: str, text: str) -> Optional[Dict]:
+        """Return a cached response for a similar ticket, or None"""
+        vector = embed_text(text)
+        entry, similarity = self._search(category, vector)
+
+        if entry is None and self.backend is not None and self._sync_due(category):
+            try:
+                await self._sync(category)
+                entry, similarity = self._search(category, vector)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Suggestion cache backend fetch failed: {e}")
+
+        if entry is None:
+            self.misses += 1
+            record_cache_lookup("suggestion", "miss")
+            return None
+
+        self.hits += 1
+        record_cache_lookup("suggestion", "hit")
+        self._entries.move_to_end(entry.key)
+        return {
+            **entry.response,
+            "reasoning": (
+                f"{entry.response.get('reasoning', '')} "
+                f"(cached, {round(similarity * 100)}% similar ticket)"
+            ).strip()
+        }
+
+    async def put(self, category: str, text: str, response: Dict):
+        """Store a freshly generated response"""
+        entry = CacheEntry(
+            key=self.make_key(category, text),
+            category=category,
+            vector=embed_text(text),
+            response=response,
+            created_at=time.time()
+        )
+        self._add(entry)
+        self.stores += 1
+
+        if self.backend is not None:
+            try:
+                await self.backend.store(entry)
+            except Exception as e:
+                self.backend_errors += 1
+                logger.warning(f"Suggestion cache backend store failed: {e}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else "memory",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "backend_errors": self.backend_errors,
+            "backend_syncs": self.backend_syncs,
+            "threshold": self.threshold
+        }
+
+
+def _create_backend():
+    backend = settings.SUGGESTION_CACHE_BACKEND.lower()
+    try:
+        if backend == "redis":
+            return RedisCacheBackend(
+                settings.REDIS_URL,
+                settings.SUGGESTION_CACHE_MAX_ENTRIES,
+                settings.SUGGESTION_CACHE_TTL_SECONDS
+            )
+        if backend == "disk":
+            return DiskCacheBackend(
+                settings.SUGGESTION_CACHE_PATH,
+                settings.SUGGESTION_CACHE_MAX_ENTRIES,
+                settings.SUGGESTION_CACHE_TTL_SECONDS
+            )
+    except Exception as e:
+        logger.warning(f"Suggestion cache backend '{backend}' unavailable, using memory only: {e}")
+    return None
+
+
+_response_cache: Optional[SemanticResponseCache] = None
+
+
+def get_response_cache() -> Optional[SemanticResponseCache]:
+    """Shared suggestion cache, or None when disabled"""
+    global _response_cache
+    if not settings.SUGGESTION_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        _response_cache = SemanticResponseCache(
+            threshold=settings.SUGGESTION_CACHE_THRESHOLD,
+            max_entries=settings.SUGGESTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SUGGESTION_CACHE_TTL_SECONDS,
+            backend=_create_backend(),
+            sync_seconds=settings.SUGGESTION_CACHE_SYNC_SECONDS
+        )
+    return _response_cache
@@ -0,0 +1,200 @@
+import enum
+import logging
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, event, func, text
+from sqlalchemy.orm import Session
+
+from app.core.database import committed_values
+from models.ticket import Ticket, TicketDailyStat
+
+logger = logging.getLogger(__name__)
+
+
+ROLLUP_DIMENSIONS = ("category", "priority", "status", "sentiment")
+_DELTAS_KEY = "ticket_rollup_deltas"
+
+Bucket = Tuple[date, str, str, str, str]
+
+
+def _dimension_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    return str(value)
+
+
+def utc_today() -> date:
+    """Current rollup day; rollup days are UTC dates everywhere"""
+    return datetime.now(timezone.utc).date()
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        # Naive values (SQLite) are stored in UTC already
+        return (value.astimezone(timezone.utc) if value.tzinfo else value).date()
+    if isinstance(value, date):
+        return value
+    # SQLite returns func.date() as a string
+    return date.fromisoformat(str(value)[:10])
+
+
+def _ticket_day(ticket: Ticket) -> date:
+    created_at = ticket.created_at
+    if created_at is None:
+        # Stamp pending tickets now, so the stored created_at and the bucket use the same UTC clock
+        ticket.created_at = created_at = datetime.now(timezone.utc)
+    elif created_at.utcoffset():
+        # SQLite drops the offset on write; store UTC so date(created_at) in the rebuild agrees
+        ticket.created_at = created_at = created_at.astimezone(timezone.utc)
+    return _as_date(created_at)
+
+
+def _current_value(ticket: Ticket, name: str):
+    value = getattr(ticket, name)
+    if value is None:
+        # Pending tickets don't have their column defaults applied until the INSERT
+        default = Ticket.__table__.c[name].default
+        if default is not None and default.is_scalar:
+            value = default.arg
+    return value
+
+
+def ticket_bucket(ticket: Ticket, values: Optional[Dict] = None) -> Bucket:
+    """Rollup key for a ticket, optionally overriding dimension values"""
+    values = values or {}
+    return (_ticket_day(ticket),) + tuple(
+        _dimension_value(values[name] if name in values else _current_value(ticket, name))
+        for name in ROLLUP_DIMENSIONS
+    )
+
+
+def row_bucket(created_at, values: Dict) -> Bucket:
+    """Rollup key for a ticket row written with Core, from its column values"""
+    return (_as_date(created_at),) + tuple(_dimension_value(values.get(name)) for name in ROLLUP_DIMENSIONS)
+
+
+def _committed_bucket(session: Session, ticket: Ticket) -> Bucket:
+    """Rollup key of a ticket as it is currently stored in the database"""
+    return ticket_bucket(ticket, committed_values(session, ticket, ROLLUP_DIMENSIONS))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_rollup_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault(_DELTAS_KEY, Counter())
+
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            deltas[ticket_bucket(obj)] += 1
+
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj):
+            old, new = _committed_bucket(session, obj), ticket_bucket(obj)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            deltas[_committed_bucket(session, obj)] -= 1
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_collected_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_collected_deltas(session):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+def apply_rollup_deltas(connection, deltas: Dict[Bucket, int]):
+    """
+    Add per-bucket count deltas to ticket_daily_stats
+
+    ORM writes through a Session are tracked automatically by the flush
+    listeners above; bulk Core inserts/updates must call this themselves on
+    the same connection so the rollup commits or rolls back with them.
+    """
+    rows = [
+        {"day": bucket[0], **dict(zip(ROLLUP_DIMENSIONS, bucket[1:])), "ticket_count": count}
+        for bucket, count in deltas.items() if count
+    ]
+    if not rows:
+        return
+
+    table = TicketDailyStat.__table__
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day] + [table.c[name] for name in ROLLUP_DIMENSIONS],
+            set_={"ticket_count": table.c.ticket_count + stmt.excluded.ticket_count}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        key = [table.c.day == row["day"]] + [table.c[name] == row[name] for name in ROLLUP_DIMENSIONS]
+        updated = connection.execute(
+            table.update().where(*key).values(ticket_count=table.c.ticket_count + row["ticket_count"])
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def rebuild_daily_stats(db: Session) -> int:
+    """
+    Recompute ticket_daily_stats from the tickets table; returns the row count
+
+    The rollup is locked against writes before the tickets are read, so a
+    ticket write committing meanwhile either lands before the read or has
+    its delta wait and apply on top of the rebuilt rows; none are lost.
+    """
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        # Blocks the flush listeners' upserts (ROW EXCLUSIVE) but not readers, until commit
+        connection.execute(text(f"LOCK TABLE {TicketDailyStat.__tablename__} IN EXCLUSIVE MODE"))
+    # On SQLite the DELETE takes the database write lock for the rest of the transaction
+    connection.execute(delete(TicketDailyStat.__table__))
+
+    if connection.dialect.name == "postgresql":
+        # date() of a timestamptz uses the session time zone; bucket by UTC like the listeners
+        day = func.date(func.timezone("UTC", Ticket.created_at))
+    else:
+        day = func.date(Ticket.created_at)
+    grouped = db.query(
+        day,
+        Ticket.category,
+        Ticket.priority,
+        Ticket.status,
+        Ticket.sentiment,
+        func.count(Ticket.id)
+    ).group_by(
+        day, Ticket.category, Ticket.priority, Ticket.status, Ticket.sentiment
+    ).all()
+
+    # Enum columns are stored by name, so buckets are built in Python from the loaded values
+    deltas = Counter()
+    for row_day, category, priority, status, sentiment, count in grouped:
+        bucket = (_as_date(row_day),) + tuple(
+            _dimension_value(v) for v in (category, priority, status, sentiment)
+        )
+        deltas[bucket] += count
+
+    apply_rollup_deltas(connection, deltas)
+    db.commit()
+
+    logger.info(f"Rebuilt ticket_daily_stats: {len(deltas)} rows")
+    return len(deltas)
@@ -1,9 +1,23 @@
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import case
 from sqlalchemy.orm import Session
-from models.ticket import Ticket, Agent, TicketStatus
+from app.core.metrics import ROUTING_DECISION_DURATION
+from models.ticket import Ticket, Agent, TicketStatus, TicketPriority
+from app.services.agent_load import assign_ticket_to_agent, record_load_deltas
+from app.services.rollups import apply_rollup_deltas, ticket_bucket
+from app.services.routing_index import RoutingIndex, get_routing_index, parse_expertise, expertise_score
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Index picks to try before giving up when other workers keep filling agents
+MAX_CLAIM_ATTEMPTS = 5
+
 
 async def route_ticket_to_agent(ticket_id: int, db: Session) -> bool:
     """
@@ -14,91 +28,276 @@ async def route_ticket_to_agent(ticket_id: int, db: Session) -> bool:
     2. Current workload
     3. Agent availability
     4. Historical performance
+    
+    Scores are served by the routing index (see app.services.routing_index)
     """
     
+    start = time.perf_counter()
+    outcome = "error"
     try:
-        # Get the ticket
-        ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+        # Lock the ticket; a ticket another worker is routing is skipped
+        ticket = db.query(Ticket).filter(
+            Ticket.id == ticket_id
+        ).with_for_update(skip_locked=True).first()
         if not ticket:
-            logger.error(f"Ticket {ticket_id} not found")
-            return False
-        
-        # Get all available agents
-        available_agents = db.query(Agent).filter(
-            Agent.is_active == True,
-            Agent.is_available == True
-        ).all()
-        
-        if not available_agents:
-            logger.warning("No available agents for routing")
+            # SKIP LOCKED hides locked rows too, so look again without the lock
+            if db.query(Ticket.id).filter(Ticket.id == ticket_id).first() is None:
+                outcome = "not_found"
+                logger.error(f"Ticket {ticket_id} not found")
+            else:
+                outcome = "skipped"
+                logger.info(f"Ticket {ticket_id} is being routed by another worker, skipping")
             return False
         
-        # Score each agent
-        agent_scores = []
-        
-        for agent in available_agents:
-            score = 0.0
-            
-            # 1. Expertise matching (40% weight)
-            if ticket.category and agent.expertise:
-                expertise_list = [e.strip().lower() for e in agent.expertise.split(',')]
-                if ticket.category.value in expertise_list:
-                    score += 40
-                elif 'general' in expertise_list:
-                    score += 20
-            else:
-                score += 15  # Base score if no category
-            
-            # 2. Workload (30% weight)
-            current_tickets = agent.current_ticket_count
-            capacity_utilization = current_tickets / agent.max_tickets if agent.max_tickets > 0 else 1.0
-            workload_score = (1.0 - capacity_utilization) * 30
-            score += workload_score
-            
-            # 3. Check if agent has capacity
-            if current_tickets >= agent.max_tickets:
-                score = 0  # Agent at capacity, can't assign
-                continue
-            
-            # 4. Historical performance (20% weight)
-            if agent.customer_satisfaction_score > 0:
-                performance_score = (agent.customer_satisfaction_score / 5.0) * 20
-                score += performance_score
-            else:
-                score += 10  # Base score for new agents
+        routed = _assign_best_agent(ticket, db)
+        outcome = "routed" if routed else "no_agent"
+        return routed
             
-            # 5. Resolution time (10% weight) - faster is better
-            if agent.average_resolution_time > 0:
-                # Normalize resolution time (assuming 24 hours is poor, <1 hour is excellent)
-                time_score = max(0, (24 - agent.average_resolution_time) / 24 * 10)
-                score += time_score
-            else:
-                score += 5  # Base score
-            
-            agent_scores.append((agent, score))
+    except Exception as e:
+        logger.error(f"Error routing ticket {ticket_id}: {str(e)}", exc_info=True)
+        db.rollback()
+        return False
+    finally:
+        ROUTING_DECISION_DURATION.labels(outcome=outcome).observe(time.perf_counter() - start)
+
+
+async def route_next_open_ticket(
+    db: Session,
+    conditions: Sequence = (),
+    index: Optional[RoutingIndex] = None
+) -> Optional[int]:
+    """
+    Route the oldest open, unassigned ticket that no other worker holds
+    
+    Uses SELECT ... FOR UPDATE SKIP LOCKED so any number of routing workers
+    can drain the backlog in parallel. Returns the routed ticket id, or None
+    when there is nothing left that can be routed. conditions narrow the
+    tickets considered and index the agents (defaults to the shared index).
+    """
+    try:
+        ticket = db.query(Ticket).filter(
+            Ticket.status == TicketStatus.OPEN,
+            Ticket.assigned_to.is_(None),
+            *conditions
+        ).order_by(
+            Ticket.created_at, Ticket.id
+        ).with_for_update(skip_locked=True).first()
+        if not ticket:
+            return None
         
-        # Sort by score and select best agent
-        agent_scores.sort(key=lambda x: x[1], reverse=True)
+        ticket_id = ticket.id
+        return ticket_id if _assign_best_agent(ticket, db, index) else None
+    
+    except Exception as e:
+        logger.error(f"Error routing next open ticket: {str(e)}", exc_info=True)
+        db.rollback()
+        return None
+
+
+def _assign_best_agent(ticket: Ticket, db: Session, index: Optional[RoutingIndex] = None) -> bool:
+    """Assign a locked ticket to the best agent whose capacity can still be claimed"""
+    index = index or get_routing_index()
+    index.ensure_fresh(db)
+    category = ticket.category.value if ticket.category else None
+    
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        # Pick the best agent from the in-memory index
+        choice = index.best_agent(category)
+        if choice is None:
+            break
         
-        if agent_scores and agent_scores[0][1] > 0:
-            best_agent = agent_scores[0][0]
-            
-            # Assign ticket
-            ticket.assigned_to = best_agent.id
-            ticket.status = TicketStatus.IN_PROGRESS
-            
+        best_agent, score = choice
+        if assign_ticket_to_agent(db, ticket, best_agent.id):
             db.commit()
-            
-            logger.info(f"Ticket {ticket_id} routed to agent {best_agent.name} (score: {agent_scores[0][1]:.2f})")
+            logger.info(f"Ticket {ticket.id} routed to agent {best_agent.name} (score: {score:.2f})")
             return True
-        else:
-            logger.warning(f"No suitable agent found for ticket {ticket_id}")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Error routing ticket {ticket_id}: {str(e)}", exc_info=True)
+        
+        # Another worker filled this agent since the index last synced
+        index.mark_full(best_agent.id)
+    
+    logger.warning(f"No suitable agent found for ticket {ticket.id}")
+    db.rollback()
+    return False
+
+
+PRIORITY_ORDER = {
+    TicketPriority.URGENT: 0,
+    TicketPriority.HIGH: 1,
+    TicketPriority.MEDIUM: 2,
+    TicketPriority.LOW: 3
+}
+
+
+class StaleAssignmentPlan(Exception):
+    """Tickets in a plan were assigned or changed before it was applied"""
+
+
+@dataclass
+class AssignmentPlan:
+    """Planned ticket -> agent assignments for the open backlog"""
+    tickets_considered: int
+    assignments: List[Dict]
+    unassigned_ticket_ids: List[int]
+    agent_load: List[Dict]
+    tickets: Dict[int, Ticket] = field(default_factory=dict, repr=False)
+    
+    def to_dict(self) -> Dict:
+        return {
+            "tickets_considered": self.tickets_considered,
+            "assigned": len(self.assignments),
+            "unassigned": len(self.unassigned_ticket_ids),
+            "assignments": self.assignments,
+            "unassigned_ticket_ids": self.unassigned_ticket_ids,
+            "agent_load": self.agent_load
+        }
+
+
+def plan_backlog_assignment(db: Session, limit: Optional[int] = None, lock: bool = False) -> AssignmentPlan:
+    """
+    Assign the whole open, unassigned backlog in one greedy pass
+    
+    Tickets are taken most urgent and oldest first. For each ticket, the score
+    of every agent is one vector operation over precomputed per-category
+    expertise rows plus the workload/performance/resolution scores. The
+    chosen agent's load is then bumped, so the plan matches routing the
+    tickets one by one and never exceeds max_tickets. With lock=True the
+    tickets and agents are selected FOR UPDATE so the plan can be applied
+    safely in the same transaction.
+    """
+    agent_query = db.query(
+        Agent.id,
+        Agent.name,
+        Agent.expertise,
+        Agent.max_tickets,
+        Agent.open_ticket_count,
+        Agent.customer_satisfaction_score,
+        Agent.average_resolution_time
+    ).filter(
+        Agent.is_active == True,
+        Agent.is_available == True
+    ).order_by(Agent.id)
+    
+    # Ordered and limited in SQL, so a limited plan only loads (and locks) its own tickets
+    ticket_query = db.query(Ticket).filter(
+        Ticket.status == TicketStatus.OPEN,
+        Ticket.assigned_to.is_(None)
+    ).order_by(
+        # Comparisons against the column so the enum is bound by name, as it is stored
+        case(*[(Ticket.priority == priority, rank) for priority, rank in PRIORITY_ORDER.items()], else_=2),
+        Ticket.created_at,
+        Ticket.id
+    )
+    if limit is not None:
+        ticket_query = ticket_query.limit(limit)
+    
+    if lock:
+        agent_query = agent_query.with_for_update()
+        ticket_query = ticket_query.with_for_update()
+    
+    agents = agent_query.all()
+    tickets = ticket_query.all()
+    
+    max_tickets = np.array([a.max_tickets or 0 for a in agents], dtype=np.float64)
+    open_tickets = np.array([a.open_ticket_count or 0 for a in agents], dtype=np.float64)
+    satisfaction = np.array([a.customer_satisfaction_score or 0.0 for a in agents], dtype=np.float64)
+    resolution_time = np.array([a.average_resolution_time or 0.0 for a in agents], dtype=np.float64)
+    skills = [parse_expertise(a.expertise) for a in agents]
+    
+    # Performance and resolution parts never change during the pass
+    static_scores = np.where(satisfaction > 0, satisfaction / 5.0 * 20, 10.0)
+    static_scores += np.where(resolution_time > 0, np.maximum(0, (24 - resolution_time) / 24 * 10), 5.0)
+    safe_max = np.where(max_tickets > 0, max_tickets, 1.0)
+    
+    expertise_rows = {}
+    assignments = []
+    unassigned = []
+    
+    for ticket in tickets:
+        category = ticket.category.value if ticket.category else None
+        if category not in expertise_rows:
+            expertise_rows[category] = np.array(
+                [expertise_score(category, agent_skills) for agent_skills in skills], dtype=np.float64
+            )
+        
+        workload_scores = np.where(max_tickets > 0, (1.0 - open_tickets / safe_max) * 30, 0.0)
+        scores = expertise_rows[category] + workload_scores + static_scores
+        scores[open_tickets >= max_tickets] = -np.inf
+        
+        best = int(scores.argmax()) if len(agents) else -1
+        if best < 0 or scores[best] <= 0:
+            unassigned.append(ticket.id)
+            continue
+        
+        open_tickets[best] += 1
+        assignments.append({
+            "ticket_id": ticket.id,
+            "ticket_number": ticket.ticket_number,
+            "agent_id": agents[best].id,
+            "agent_name": agents[best].name,
+            "score": round(float(scores[best]), 2)
+        })
+    
+    agent_load = [
+        {
+            "agent_id": agent.id,
+            "name": agent.name,
+            "max_tickets": agent.max_tickets,
+            "open_tickets_before": agent.open_ticket_count,
+            "open_tickets_after": int(open_tickets[i])
+        }
+        for i, agent in enumerate(agents)
+        if open_tickets[i] != (agent.open_ticket_count or 0)
+    ]
+    
+    return AssignmentPlan(
+        tickets_considered=len(tickets),
+        assignments=assignments,
+        unassigned_ticket_ids=unassigned,
+        agent_load=agent_load,
+        tickets={ticket.id: ticket for ticket in tickets}
+    )
+
+
+def apply_assignment_plan(db: Session, plan: AssignmentPlan) -> int:
+    """
+    Write every planned assignment with one UPDATE statement and commit
+    
+    The rollup and agent counters are maintained in the same transaction.
+    Raises StaleAssignmentPlan (after rolling back) if any ticket stopped
+    being open and unassigned since it was planned.
+    """
+    assignments = plan.assignments
+    if not assignments:
+        return 0
+    
+    agent_by_ticket = {a["ticket_id"]: a["agent_id"] for a in assignments}
+    result = db.execute(
+        Ticket.__table__.update().where(
+            Ticket.__table__.c.id.in_(list(agent_by_ticket)),
+            Ticket.__table__.c.assigned_to.is_(None),
+            Ticket.__table__.c.status == TicketStatus.OPEN
+        ).values(
+            assigned_to=case(agent_by_ticket, value=Ticket.__table__.c.id),
+            status=TicketStatus.IN_PROGRESS
+        )
+    )
+    if result.rowcount != len(assignments):
         db.rollback()
-        return False
+        raise StaleAssignmentPlan(
+            f"{len(assignments) - result.rowcount} planned tickets changed before the plan was applied"
+        )
+    
+    rollup_deltas = Counter()
+    for assignment in assignments:
+        ticket = plan.tickets[assignment["ticket_id"]]
+        rollup_deltas[ticket_bucket(ticket)] -= 1
+        rollup_deltas[ticket_bucket(ticket, {"status": TicketStatus.IN_PROGRESS})] += 1
+    apply_rollup_deltas(db.connection(), rollup_deltas)
+    record_load_deltas(db, Counter(a["agent_id"] for a in assignments))
+    
+    db.commit()
+    logger.info(f"Rebalanced backlog: assigned {len(assignments)} tickets in one update")
+    return len(assignments)
 
 
 def calculate_routing_metrics(db: Session) -> dict:
@@ -0,0 +1,274 @@
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Collection, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.agent_load import on_load_committed
+from models.ticket import Agent
+
+logger = logging.getLogger(__name__)
+
+
+ALL_AGENTS = "*"
+NO_EXPERTISE = ""
+_AGENTS_CHANGED_KEY = "routing_index_agents_changed"
+
+
+def parse_expertise(expertise: Optional[str]) -> FrozenSet[str]:
+    """Normalized skill set from the comma-separated Agent.expertise string"""
+    if not expertise:
+        return frozenset()
+    # Trailing commas and blank entries are not skills
+    return frozenset(s for s in (e.strip().lower() for e in expertise.split(',')) if s)
+
+
+def expertise_score(category: Optional[str], skills: FrozenSet[str]) -> float:
+    """Expertise matching (40% weight)"""
+    if category and skills:
+        if category in skills:
+            return 40
+        if 'general' in skills:
+            return 20
+        return 0
+    return 15  # Base score if no category
+
+
+def agent_score(open_tickets: int, max_tickets: int, satisfaction: float, resolution_time: float) -> float:
+    """Workload, performance and resolution time part of the routing score"""
+    # Workload (30% weight)
+    capacity_utilization = open_tickets / max_tickets if max_tickets > 0 else 1.0
+    score = (1.0 - capacity_utilization) * 30
+
+    # Historical performance (20% weight)
+    if satisfaction > 0:
+        score += (satisfaction / 5.0) * 20
+    else:
+        score += 10  # Base score for new agents
+
+    # Resolution time (10% weight) - faster is better
+    if resolution_time > 0:
+        # Normalize resolution time (assuming 24 hours is poor, <1 hour is excellent)
+        score += max(0, (24 - resolution_time) / 24 * 10)
+    else:
+        score += 5  # Base score
+
+    return score
+
+
+@dataclass
+class AgentSnapshot:
+    """Routing-relevant fields of an available agent"""
+    id: int
+    name: str
+    skills: FrozenSet[str]
+    max_tickets: int
+    open_tickets: int
+    satisfaction: float
+    resolution_time: float
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.open_tickets < self.max_tickets
+
+    @property
+    def score(self) -> float:
+        return agent_score(self.open_tickets, self.max_tickets, self.satisfaction, self.resolution_time)
+
+
+class RoutingIndex:
+    """
+    In-memory index of available agents for ticket routing
+
+    Agents are bucketed by skill (plus "general", agents without expertise
+    and a bucket of every agent), and each bucket is a max-heap on the
+    category-independent part of the routing score. The best agent for a
+    ticket is the best of at most four bucket tops, each offset by its
+    expertise score, so routing costs O(log n).
+
+    Heap entries are versioned: an agent whose load changes gets a new entry
+    and older ones are discarded lazily when they reach the top. Committed
+    load changes from this process are applied incrementally; agent edits
+    mark the index stale, and it also resyncs from the database every
+    resync_seconds to pick up other workers' changes.
+    """
+
+    def __init__(self, resync_seconds: float, agent_ids: Optional[Collection[int]] = None):
+        self.resync_seconds = resync_seconds
+        self.agent_ids = agent_ids
+        self._agents: Dict[int, AgentSnapshot] = {}
+        self._heaps: Dict[str, List[Tuple[float, int, int]]] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.RLock()
+        self._synced_at = 0.0
+        self._stale = True
+
+        self.resyncs = 0
+
+    def resync(self, db: Session):
+        """Reload every available agent (or every one of agent_ids) from the database"""
+        query = db.query(
+            Agent.id,
+            Agent.name,
+            Agent.expertise,
+            Agent.max_tickets,
+            Agent.open_ticket_count,
+            Agent.customer_satisfaction_score,
+            Agent.average_resolution_time
+        ).filter(
+            Agent.is_active == True,
+            Agent.is_available == True
+        )
+        if self.agent_ids is not None:
+            query = query.filter(Agent.id.in_(list(self.agent_ids)))
+        rows = query.all()
+
+        with self._lock:
+            self._agents = {
+                row.id: AgentSnapshot(
+                    id=row.id,
+                    name=row.name,
+                    skills=parse_expertise(row.expertise),
+                    max_tickets=row.max_tickets or 0,
+                    open_tickets=row.open_ticket_count or 0,
+                    satisfaction=row.customer_satisfaction_score or 0.0,
+                    resolution_time=row.average_resolution_time or 0.0
+                )
+                for row in rows
+            }
+            self._rebuild_heaps()
+            self._synced_at = time.monotonic()
+            self._stale = False
+            self.resyncs += 1
+
+    def ensure_fresh(self, db: Session):
+        """Resync if marked stale or older than the resync interval"""
+        if self._stale or time.monotonic() - self._synced_at > self.resync_seconds:
+            self.resync(db)
+
+    def mark_stale(self):
+        self._stale = True
+
+    def _rebuild_heaps(self):
+        self._heaps = {}
+        self._versions = {}
+        for agent in self._agents.values():
+            self._push(agent)
+
+    def _push(self, agent: AgentSnapshot):
+        version = self._versions.get(agent.id, 0) + 1
+        self._versions[agent.id] = version
+        if not agent.has_capacity:
+            return  # Agent at capacity, can't assign
+
+        entry = (-agent.score, agent.id, version)
+        buckets = [ALL_AGENTS] + (list(agent.skills) if agent.skills else [NO_EXPERTISE])
+        for bucket in buckets:
+            heapq.heappush(self._heaps.setdefault(bucket, []), entry)
+
+    def _top(self, bucket: str) -> Optional[Tuple[AgentSnapshot, float]]:
+        heap = self._heaps.get(bucket)
+        while heap:
+            neg_score, agent_id, version = heap[0]
+            if self._versions.get(agent_id) == version:
+                return self._agents[agent_id], -neg_score
+            heapq.heappop(heap)
+        return None
+
+    def best_agent(self, category: Optional[str]) -> Optional[Tuple[AgentSnapshot, float]]:
+        """Highest scoring agent with spare capacity, or None"""
+        if category:
+            # Agents in a weaker bucket may also be in a stronger one; their
+            # underestimated score there never beats their real one
+            candidates = [(category, 40), ("general", 20), (NO_EXPERTISE, 15), (ALL_AGENTS, 0)]
+        else:
+            candidates = [(ALL_AGENTS, 15)]
+
+        best = None
+        with self._lock:
+            for bucket, base in candidates:
+                top = self._top(bucket)
+                if top is None:
+                    continue
+                agent, score = top
+                total = base + score
+                if best is None or total > best[1] or (total == best[1] and agent.id < best[0].id):
+                    best = (agent, total)
+
+        if best is None or best[1] <= 0:
+            return None
+        return best
+
+    def apply_load_deltas(self, deltas: Dict[int, int]):
+        """Apply committed open-ticket changes and reposition the agents"""
+        with self._lock:
+            for agent_id, delta in deltas.items():
+                agent = self._agents.get(agent_id)
+                if agent is None or not delta:
+                    continue
+                agent.open_tickets += delta
+                self._push(agent)
+
+            # Drop accumulated superseded entries once they dominate the heaps
+            if sum(len(h) for h in self._heaps.values()) > 8 * max(len(self._agents), 1):
+                self._rebuild_heaps()
+
+    def mark_full(self, agent_id: int):
+        """Drop an agent whose capacity another worker used up since the last sync"""
+        with self._lock:
+            agent = self._agents.get(agent_id)
+            if agent is not None:
+                agent.open_tickets = max(agent.open_tickets, agent.max_tickets)
+                self._push(agent)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "agents": len(self._agents),
+                "agents_with_capacity": sum(1 for a in self._agents.values() if a.has_capacity),
+                "buckets": len(self._heaps),
+                "resyncs": self.resyncs,
+                "stale": self._stale,
+                "seconds_since_sync": round(time.monotonic() - self._synced_at, 1) if self._synced_at else None
+            }
+
+
+_routing_index: Optional[RoutingIndex] = None
+
+
+def get_routing_index() -> RoutingIndex:
+    """Shared routing index for this process"""
+    global _routing_index
+    if _routing_index is None:
+        _routing_index = RoutingIndex(resync_seconds=settings.ROUTING_INDEX_RESYNC_SECONDS)
+    return _routing_index
+
+
+@on_load_committed
+def _apply_committed_load(deltas: Dict[int, int]):
+    if _routing_index is not None:
+        _routing_index.apply_load_deltas(deltas)
+
+
+@event.listens_for(Session, "before_flush")
+def _detect_agent_changes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Agent):
+            session.info[_AGENTS_CHANGED_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_stale_on_agent_change(session):
+    if session.info.pop(_AGENTS_CHANGED_KEY, False) and _routing_index is not None:
+        _routing_index.mark_stale()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_agent_changes(session):
+    session.info.pop(_AGENTS_CHANGED_KEY, None)
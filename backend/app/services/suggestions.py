@@ -0,0 +1,110 @@
+import json
+import logging
+from typing import AsyncIterator, Dict
+
+from app.services.llm import get_llm_client, build_support_messages
+from app.services.response_cache import get_response_cache
+
+logger = logging.getLogger(__name__)
+
+
+RESPONSE_TEMPLATES = {
+    "account": "Thank you for contacting support. I can help you with your account issue. Please verify your email address and I'll send you a password reset link.",
+    "billing": "I apologize for the billing concern. I've reviewed your account and will process a refund within 3-5 business days.",
+    "technical": "Thank you for reporting this issue. Our technical team is investigating. Please try clearing your cache and let us know if the problem persists.",
+    "complaint": "I sincerely apologize for your experience. Your feedback is important to us and I'd like to understand the issue better — could you provide more details?",
+    "feature_request": "Thank you for your suggestion! I've forwarded your feature request to our product team and we appreciate your feedback.",
+    "general": "Thank you for reaching out. I'm here to help — could you provide more details about your inquiry?"
+}
+
+
+def template_suggestion(category: str) -> Dict:
+    """Fallback suggestion from the per-category templates"""
+    return {
+        "suggested_text": RESPONSE_TEMPLATES.get(category, RESPONSE_TEMPLATES["general"]),
+        "confidence": 0.8,
+        "source_tickets": [],
+        "reasoning": f"Template response for category: {category}"
+    }
+
+
+def llm_suggestion(text: str, category: str) -> Dict:
+    return {
+        "suggested_text": text,
+        "confidence": 0.95,
+        "source_tickets": [],
+        "reasoning": f"Generated by Groq AI for category: {category}"
+    }
+
+
+async def generate_suggestion(ticket_text: str, category: str) -> Dict:
+    """Cached LLM suggestion, falling back to templates"""
+    llm = get_llm_client()
+    cache = get_response_cache() if llm.enabled else None
+
+    # Reuse a suggestion for a near-identical ticket
+    if cache:
+        cached = await cache.get(category, ticket_text)
+        if cached:
+            return cached
+
+    # Try Groq first if key is configured
+    suggested_text = await llm.complete(build_support_messages(ticket_text, category))
+    if suggested_text:
+        result = llm_suggestion(suggested_text, category)
+        if cache:
+            await cache.put(category, ticket_text, result)
+        return result
+
+    return template_suggestion(category)
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_suggestion(ticket_text: str, category: str) -> AsyncIterator[str]:
+    """
+    Stream a suggestion as Server-Sent Events
+
+    Emits `token` events as the LLM produces text and a final `done` event
+    carrying the full suggestion with its confidence/reasoning metadata. Cache
+    hits and template fallbacks are sent as a single `token` event.
+    """
+    llm = get_llm_client()
+    cache = get_response_cache() if llm.enabled else None
+
+    if cache:
+        cached = await cache.get(category, ticket_text)
+        if cached:
+            yield sse_event("token", {"text": cached["suggested_text"]})
+            yield sse_event("done", cached)
+            return
+
+    parts = []
+    interrupted = False
+    if llm.enabled:
+        try:
+            async for token in llm.stream(build_support_messages(ticket_text, category)):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            interrupted = True
+            logger.warning(f"Groq stream error, falling back to templates: {e!r}")
+
+    suggested_text = "".join(parts).strip()
+    if not suggested_text:
+        result = template_suggestion(category)
+        yield sse_event("token", {"text": result["suggested_text"]})
+        yield sse_event("done", result)
+        return
+
+    result = llm_suggestion(suggested_text, category)
+    if interrupted:
+        # Tokens already went out; report the partial text rather than switching to a template
+        result["confidence"] = 0.5
+        result["reasoning"] += " (stream interrupted)"
+    elif cache:
+        await cache.put(category, ticket_text, result)
+    yield sse_event("done", result)
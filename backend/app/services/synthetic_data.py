@@ -0,0 +1,484 @@
+import csv
+import enum
+import heapq
+import io
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.services.agent_load import repair_open_ticket_counts
+from app.services.rollups import rebuild_daily_stats
+from app.services.suggestions import RESPONSE_TEMPLATES
+from app.services.ticket_numbers import format_ticket_number, reserve_ticket_numbers
+from models.ticket import Agent, Ticket, TicketCategory, TicketPriority, TicketResponse, TicketStatus
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CATEGORY_WEIGHTS = {
+    "technical": 35, "billing": 20, "account": 20, "general": 12, "complaint": 8, "feature_request": 5
+}
+DEFAULT_PRIORITY_WEIGHTS = {"low": 20, "medium": 45, "high": 25, "urgent": 10}
+DEFAULT_SENTIMENT_WEIGHTS = {"negative": 40, "neutral": 45, "positive": 15}
+
+# Median hours of work per priority; actual times are log-normal around it
+RESOLUTION_HOURS = {"urgent": 2.0, "high": 6.0, "medium": 18.0, "low": 36.0}
+URGENCY_RANGES = {"urgent": (0.81, 1.0), "high": (0.61, 0.8), "medium": (0.31, 0.6), "low": (0.05, 0.3)}
+SENTIMENT_SCORES = {"negative": (0.05, 0.4), "neutral": (0.4, 0.6), "positive": (0.6, 0.95)}
+# Relative ticket volume per hour of day (UTC) and per weekday (Monday first)
+HOURLY_WEIGHTS = [2, 1, 1, 1, 1, 2, 4, 7, 10, 12, 12, 11, 10, 11, 12, 12, 11, 9, 7, 6, 5, 4, 3, 2]
+WEEKDAY_WEIGHTS = [1.0, 1.0, 0.95, 0.95, 0.9, 0.45, 0.4]
+
+TICKET_TEXTS = {
+    "technical": [
+        ("App crashes when uploading files", "Every time I upload a file larger than {n}MB the app crashes with an error."),
+        ("Page keeps loading forever", "The dashboard page has been stuck loading for {n} minutes, nothing works."),
+        ("Sync is broken", "My data stopped syncing between devices about {n} hours ago, please fix this bug."),
+    ],
+    "billing": [
+        ("Charged twice this month", "I was charged twice for my subscription, please refund the extra ${n}."),
+        ("Invoice is wrong", "My latest invoice shows ${n} but my plan should be cheaper, can you check?"),
+        ("Cancel my payment", "Please cancel the pending payment of ${n} on my card."),
+    ],
+    "account": [
+        ("Cannot log in", "I cannot login to my account, the password reset email never arrives."),
+        ("Change account email", "How do I change the email address on my account? I tried {n} times."),
+        ("Account locked", "My account got locked after {n} failed attempts, please unlock it."),
+    ],
+    "general": [
+        ("Question about plans", "What is the difference between the plans? We have {n} users."),
+        ("Where is the documentation", "I could not find documentation for the API, where can I read it?"),
+    ],
+    "complaint": [
+        ("Terrible experience", "Very disappointed, this is the worst experience I had in {n} years as a customer."),
+        ("Support is too slow", "I have been waiting {n} days for an answer, this is unacceptable."),
+    ],
+    "feature_request": [
+        ("Export to CSV", "Would like to suggest a feature for exporting reports to CSV for our {n} person team."),
+        ("Dark mode please", "It would be great to have a dark mode, I use the app {n} hours a day."),
+    ],
+}
+CUSTOMER_REPLIES = [
+    "Thanks, that fixed it!",
+    "I tried that but it still does not work.",
+    "Any update on this?",
+    "Here are the details you asked for.",
+    "Great, thank you for the quick help.",
+]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Drew", "Robin"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Kumar", "Müller", "Rossi", "Kim", "Haddad", "Berg"]
+
+TICKET_COLUMNS = (
+    "id", "ticket_number", "customer_name", "customer_email", "customer_id", "subject", "description",
+    "category", "category_confidence", "priority", "sentiment", "sentiment_score", "urgency_score",
+    "status", "assigned_to", "created_at", "resolved_at"
+)
+RESPONSE_COLUMNS = (
+    "id", "ticket_id", "message", "is_agent_response", "agent_name",
+    "is_ai_suggested", "suggestion_confidence", "created_at"
+)
+AGENT_COLUMNS = (
+    "id", "name", "email", "expertise", "max_tickets", "open_ticket_count", "is_active", "is_available",
+    "total_tickets_handled", "average_resolution_time", "customer_satisfaction_score"
+)
+
+@dataclass
+class SyntheticDataConfig:
+    """Size and shape of a generated dataset"""
+    tickets: int = 100_000
+    agents: int = 50
+    responses_per_ticket: float = 2.0
+    days: int = 365
+    end: Optional[datetime] = None  # defaults to now
+    growth: float = 1.5  # daily volume at the end relative to the start
+    category_weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_CATEGORY_WEIGHTS))
+    priority_weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_PRIORITY_WEIGHTS))
+    sentiment_weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_SENTIMENT_WEIGHTS))
+    agent_capacity: Tuple[int, int] = (8, 15)
+    close_after_hours: float = 48.0  # resolved tickets are closed (freeing the slot) after this
+    untriaged_minutes: float = 30.0  # tickets this recent are still open and unassigned
+    customers: Optional[int] = None  # distinct customers, defaults to tickets / 4
+    seed: int = 42
+    batch_size: int = 20_000
+
+
+def parse_weights(value: str, choices: Sequence[str]) -> Dict[str, float]:
+    """Weights from "name=weight,name=weight"; names must be in choices"""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in choices:
+            raise ValueError(f"Unknown value {name!r}, choose from {', '.join(choices)}")
+        weights[name] = float(weight)
+    return weights
+
+
+class AssignmentSimulator:
+    """
+    Replays ticket assignment in creation order under agent capacity limits
+
+    Every agent holds a heap of the times its tickets get closed. A ticket is
+    offered to a few agents with matching expertise (falling back to
+    everyone); the least loaded one with a free slot takes it, otherwise it
+    waits for the earliest slot to free up. A ticket that would still be
+    waiting at the end of the dataset stays open and unassigned, so the
+    tickets counting against each agent at the end never exceed max_tickets.
+    """
+
+    SAMPLE = 4
+
+    def __init__(self, agents: List[Dict], rng: random.Random, now: float, close_after: float):
+        self.agents = agents
+        self.rng = rng
+        self.now = now
+        self.close_after = close_after
+        self.slots: List[List[float]] = [[] for _ in agents]
+        self.handled = [0] * len(agents)
+        self.resolution_hours = [0.0] * len(agents)
+        self.pools: Dict[str, List[int]] = {}
+        for index, agent in enumerate(agents):
+            for skill in agent["expertise"].split(","):
+                self.pools.setdefault(skill, []).append(index)
+        self.everyone = list(range(len(agents)))
+
+    def _release(self, index: int, at: float):
+        slots = self.slots[index]
+        while slots and slots[0] <= at:
+            heapq.heappop(slots)
+
+    def assign(self, category: str, created: float, work_hours: float) -> Tuple[Optional[int], Optional[float]]:
+        """(agent index, resolved time) for a ticket, or (None, None) if it is still queued"""
+        pool = self.pools.get(category) or self.everyone
+        candidates = self.rng.sample(pool, min(self.SAMPLE, len(pool)))
+
+        free, waiting = None, None
+        for index in candidates:
+            self._release(index, created)
+            load = len(self.slots[index])
+            if load < self.agents[index]["max_tickets"]:
+                if free is None or load < len(self.slots[free]):
+                    free = index
+            elif waiting is None or self.slots[index][0] < self.slots[waiting][0]:
+                waiting = index
+
+        if free is not None:
+            best, begin = free, created
+        elif self.slots[waiting][0] > self.now:
+            return None, None
+        else:
+            best, begin = waiting, heapq.heappop(self.slots[waiting])
+
+        resolved = begin + work_hours * 3600
+        heapq.heappush(self.slots[best], resolved + self.close_after)
+        if resolved <= self.now:
+            self.handled[best] += 1
+            self.resolution_hours[best] += (resolved - created) / 3600
+        return best, resolved
+
+    def open_counts(self) -> List[int]:
+        return [sum(1 for closes in slots if closes > self.now) for slots in self.slots]
+
+
+class SyntheticDataGenerator:
+    """Streams agents, tickets and responses following a SyntheticDataConfig"""
+
+    def __init__(self, config: SyntheticDataConfig, first_agent_id: int = 1, first_ticket_id: int = 1,
+                 first_response_id: int = 1):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.end = (config.end or datetime.now(timezone.utc)).timestamp()
+        self.first_agent_id = first_agent_id
+        self.next_ticket_id = first_ticket_id
+        self.next_response_id = first_response_id
+        self.agents = self._generate_agents()
+        self.simulator = AssignmentSimulator(
+            self.agents, self.rng, self.end, config.close_after_hours * 3600
+        )
+
+    def _generate_agents(self) -> List[Dict]:
+        rng = self.rng
+        skills = list(DEFAULT_CATEGORY_WEIGHTS)
+        low, high = self.config.agent_capacity
+        agents = []
+        for i in range(self.config.agents):
+            agent_id = self.first_agent_id + i
+            agents.append({
+                "id": agent_id,
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "email": f"agent{agent_id}@autosupport.example.com",
+                "expertise": ",".join(rng.sample(skills, rng.randint(1, 3))),
+                "max_tickets": rng.randint(low, high),
+                "open_ticket_count": 0,
+                "is_active": True,
+                "is_available": rng.random() > 0.1,
+                "total_tickets_handled": 0,
+                "average_resolution_time": 0.0,
+                "customer_satisfaction_score": round(min(5.0, max(1.0, rng.gauss(4.3, 0.4))), 2),
+            })
+        return agents
+
+    def daily_counts(self) -> List[int]:
+        """Tickets per day, oldest first, following weekday weights and the growth trend"""
+        days = max(1, self.config.days)
+        start = datetime.fromtimestamp(self.end, timezone.utc) - timedelta(days=days)
+        weights = []
+        for d in range(days):
+            trend = 1 + (self.config.growth - 1) * d / max(1, days - 1)
+            weights.append(trend * WEEKDAY_WEIGHTS[(start + timedelta(days=d)).weekday()])
+        total = sum(weights)
+        counts = [int(self.config.tickets * w / total) for w in weights]
+        for d in range(self.config.tickets - sum(counts)):
+            counts[-1 - d % days] += 1
+        return counts
+
+    def ticket_batches(self) -> Iterator[Tuple[List[tuple], List[tuple]]]:
+        """(ticket rows, response rows) in creation order, batch_size tickets at a time"""
+        config = self.config
+        rng = self.rng
+        categories = list(config.category_weights)
+        category_cum = _cumulative(config.category_weights.values())
+        priorities = list(config.priority_weights)
+        priority_cum = _cumulative(config.priority_weights.values())
+        sentiments = list(config.sentiment_weights)
+        sentiment_cum = _cumulative(config.sentiment_weights.values())
+        hours_cum = _cumulative(HOURLY_WEIGHTS)
+        customers = config.customers or max(1, config.tickets // 4)
+        untriaged_after = self.end - config.untriaged_minutes * 60
+        day_start = self.end - max(1, config.days) * 86400
+
+        tickets, responses = [], []
+        for day, count in enumerate(self.daily_counts()):
+            base = day_start + day * 86400
+            hours = rng.choices(range(24), cum_weights=hours_cum, k=count)
+            for created in sorted(base + hour * 3600 + rng.random() * 3600 for hour in hours):
+                category = rng.choices(categories, cum_weights=category_cum)[0]
+                priority = rng.choices(priorities, cum_weights=priority_cum)[0]
+                sentiment = rng.choices(sentiments, cum_weights=sentiment_cum)[0]
+
+                agent, resolved = None, None
+                if created <= untriaged_after:
+                    work_hours = rng.lognormvariate(math.log(RESOLUTION_HOURS[priority]), 0.8)
+                    agent, resolved = self.simulator.assign(category, created, work_hours)
+
+                if agent is None:
+                    status = TicketStatus.OPEN
+                elif resolved > self.end:
+                    status = TicketStatus.IN_PROGRESS
+                elif resolved + self.simulator.close_after > self.end:
+                    status = TicketStatus.RESOLVED
+                else:
+                    status = TicketStatus.CLOSED
+
+                ticket_id = self.next_ticket_id
+                self.next_ticket_id += 1
+                customer = rng.randrange(customers)
+                subject, description = rng.choice(TICKET_TEXTS.get(category, TICKET_TEXTS["general"]))
+                created_at = datetime.fromtimestamp(created, timezone.utc)
+                tickets.append((
+                    ticket_id,
+                    format_ticket_number(ticket_id, created_at),
+                    f"{FIRST_NAMES[customer % len(FIRST_NAMES)]} {LAST_NAMES[customer // len(FIRST_NAMES) % len(LAST_NAMES)]}",
+                    f"customer{customer}@example.com",
+                    f"CUST-{customer:07d}",
+                    subject,
+                    description.format(n=rng.randint(2, 60)),
+                    TicketCategory(category),
+                    round(rng.uniform(0.55, 0.99), 2),
+                    TicketPriority(priority),
+                    sentiment,
+                    round(rng.uniform(*SENTIMENT_SCORES[sentiment]), 2),
+                    round(rng.uniform(*URGENCY_RANGES[priority]), 2),
+                    status,
+                    self.agents[agent]["id"] if agent is not None else None,
+                    created_at,
+                    datetime.fromtimestamp(resolved, timezone.utc) if status in (
+                        TicketStatus.RESOLVED, TicketStatus.CLOSED
+                    ) else None,
+                ))
+                if agent is not None and config.responses_per_ticket > 0:
+                    responses.extend(self._responses(ticket_id, category, agent, created, min(resolved, self.end)))
+
+                if len(tickets) >= config.batch_size:
+                    yield tickets, responses
+                    tickets, responses = [], []
+        if tickets:
+            yield tickets, responses
+
+    def _responses(self, ticket_id: int, category: str, agent: int, start: float, end: float) -> List[tuple]:
+        rng = self.rng
+        count = min(10, int(rng.expovariate(1 / self.config.responses_per_ticket) + 0.5))
+        rows = []
+        for i, at in enumerate(sorted(rng.uniform(start, end) for _ in range(count))):
+            from_agent = i % 2 == 0
+            ai_suggested = from_agent and rng.random() < 0.3
+            rows.append((
+                self.next_response_id,
+                ticket_id,
+                RESPONSE_TEMPLATES.get(category, RESPONSE_TEMPLATES["general"]) if from_agent
+                else rng.choice(CUSTOMER_REPLIES),
+                from_agent,
+                self.agents[agent]["name"] if from_agent else None,
+                ai_suggested,
+                round(rng.uniform(0.7, 0.95), 2) if ai_suggested else None,
+                datetime.fromtimestamp(at, timezone.utc),
+            ))
+            self.next_response_id += 1
+        return rows
+
+    def agent_stats(self) -> List[Dict]:
+        """Handled count, average resolution hours and open load per agent after generation"""
+        open_counts = self.simulator.open_counts()
+        return [
+            {
+                "agent_id": agent["id"],
+                "handled": self.simulator.handled[i],
+                "avg_hours": round(self.simulator.resolution_hours[i] / self.simulator.handled[i], 2)
+                if self.simulator.handled[i] else 0.0,
+                "open_count": open_counts[i],
+            }
+            for i, agent in enumerate(self.agents)
+        ]
+
+
+def _cumulative(weights) -> List[float]:
+    total, cumulative = 0.0, []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+class BulkLoader:
+    """
+    Batched inserts that skip the ORM
+
+    On PostgreSQL with psycopg2 rows are streamed with COPY ... FROM STDIN;
+    other databases get one executemany per batch. Enum columns are written
+    by name, like the ORM does.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.use_copy = engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+    def load(self, table, columns: Sequence[str], rows: List[tuple]):
+        if not rows:
+            return
+        if self.use_copy:
+            self._copy(table.name, columns, rows)
+        else:
+            with self.engine.begin() as conn:
+                conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+    def _copy(self, table_name: str, columns: Sequence[str], rows: List[tuple]):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([value.name if isinstance(value, enum.Enum) else value for value in row])
+        buffer.seek(0)
+
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            raw.commit()
+        finally:
+            raw.close()
+
+
+def _next_id(conn, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def seed_synthetic_data(
+    engine,
+    config: SyntheticDataConfig,
+    reset: bool = False,
+    progress: Callable[[str], None] = logger.info
+) -> Dict:
+    """
+    Generate and bulk-load agents, tickets and responses
+
+    With reset the schema is dropped and recreated first; otherwise the data
+    is appended after the existing ids (and simulated agents are all new).
+    The rollup table and agent counters are derived afterwards because the
+    bulk inserts bypass the session listeners that normally maintain them.
+    """
+    started = time.perf_counter()
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        generator = SyntheticDataGenerator(
+            config,
+            first_agent_id=_next_id(conn, Agent),
+            first_ticket_id=_next_id(conn, Ticket),
+            first_response_id=_next_id(conn, TicketResponse)
+        )
+
+    loader = BulkLoader(engine)
+    loader.load(Agent.__table__, AGENT_COLUMNS, [tuple(a[c] for c in AGENT_COLUMNS) for a in generator.agents])
+
+    loaded_tickets = loaded_responses = 0
+    number_at = TICKET_COLUMNS.index("ticket_number")
+    created_at = TICKET_COLUMNS.index("created_at")
+    for tickets, responses in generator.ticket_batches():
+        # Draw the numbers from the allocator's space so the API never hands them out again
+        with engine.begin() as conn:
+            values = reserve_ticket_numbers(conn, len(tickets))
+        tickets = [
+            row[:number_at] + (format_ticket_number(value, row[created_at]),) + row[number_at + 1:]
+            for row, value in zip(tickets, values)
+        ]
+        loader.load(Ticket.__table__, TICKET_COLUMNS, tickets)
+        loader.load(TicketResponse.__table__, RESPONSE_COLUMNS, responses)
+        loaded_tickets += len(tickets)
+        loaded_responses += len(responses)
+        elapsed = time.perf_counter() - started
+        progress(f"{loaded_tickets}/{config.tickets} tickets, {loaded_responses} responses "
+                 f"({loaded_tickets / elapsed:,.0f} tickets/s)")
+
+    with engine.begin() as conn:
+        conn.execute(
+            update(Agent.__table__).where(Agent.__table__.c.id == bindparam("agent_id")).values(
+                total_tickets_handled=bindparam("handled"),
+                average_resolution_time=bindparam("avg_hours"),
+                open_ticket_count=bindparam("open_count")
+            ),
+            generator.agent_stats()
+        )
+        if engine.dialect.name == "postgresql":
+            # Explicit ids leave the serial sequences behind
+            for table in ("agents", "tickets", "ticket_responses"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                ))
+
+    progress("Rebuilding daily rollups and agent counters")
+    db = Session(bind=engine)
+    try:
+        rebuild_daily_stats(db)
+        repaired = repair_open_ticket_counts(db)
+    finally:
+        db.close()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    return {
+        "agents": len(generator.agents),
+        "tickets": loaded_tickets,
+        "responses": loaded_responses,
+        "agent_counts_repaired": repaired,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
@@ -0,0 +1,110 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import async_engine
+from models.ticket import TicketNumberCounter, ticket_number_sequence
+
+logger = logging.getLogger(__name__)
+
+
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+SUFFIX_WIDTH = 6
+
+
+def format_ticket_number(value: int, day: Optional[datetime] = None) -> str:
+    """
+    TKT-YYYYMMDD-XXXXXX with value as the base-36 suffix
+
+    The suffix is unique on its own, so the date is informational; past
+    36**6 values it simply grows a character (the column fits 7).
+    """
+    digits = ""
+    while value:
+        value, r = divmod(value, 36)
+        digits = _BASE36[r] + digits
+    return f"TKT-{(day or datetime.now()):%Y%m%d}-{digits.rjust(SUFFIX_WIDTH, '0')}"
+
+
+def reserve_ticket_numbers(connection, count: int) -> List[int]:
+    """
+    Reserve count unused ticket number values in one round trip
+
+    PostgreSQL draws them from ticket_number_seq, which never hands a value
+    out twice across connections. Elsewhere the single counter row is bumped
+    by count; the UPDATE locks it until the caller's transaction ends.
+    """
+    if count <= 0:
+        return []
+    if connection.dialect.name == "postgresql":
+        return list(connection.execute(
+            select(ticket_number_sequence.next_value()).select_from(func.generate_series(1, count))
+        ).scalars())
+
+    counter = TicketNumberCounter.__table__
+    updated = connection.execute(
+        counter.update().where(counter.c.id == 1).values(next_value=counter.c.next_value + count)
+    )
+    if updated.rowcount == 0:
+        connection.execute(counter.insert().values(id=1, next_value=count + 1))
+    end = connection.execute(select(counter.c.next_value).where(counter.c.id == 1)).scalar()
+    return list(range(end - count, end))
+
+
+class TicketNumberAllocator:
+    """
+    Per-process ticket numbers handed out from reserved blocks
+
+    A block of block_size values is reserved from the database when the
+    local pool runs dry, so creating a ticket normally costs no extra round
+    trip. Values left in the pool when the process exits are skipped, which
+    leaves gaps but never duplicates.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = max(block_size, 1)
+        self._values: deque = deque()
+        self._lock = threading.Lock()
+        self.blocks = 0
+
+    def _take(self, count: int) -> Optional[List[int]]:
+        with self._lock:
+            if len(self._values) < count:
+                return None
+            return [self._values.popleft() for _ in range(count)]
+
+    async def allocate(self, count: int = 1) -> List[str]:
+        """count new ticket numbers"""
+        values = self._take(count)
+        while values is None:
+            # Committed on its own connection so the block survives a rolled-back ticket insert
+            async with async_engine.begin() as conn:
+                reserved = await conn.run_sync(reserve_ticket_numbers, max(count, self.block_size))
+            with self._lock:
+                self._values.extend(reserved)
+                self.blocks += 1
+            values = self._take(count)
+
+        day = datetime.now()
+        return [format_ticket_number(value, day) for value in values]
+
+
+_allocator: Optional[TicketNumberAllocator] = None
+
+
+def get_ticket_number_allocator() -> TicketNumberAllocator:
+    """Shared allocator for this process"""
+    global _allocator
+    if _allocator is None:
+        _allocator = TicketNumberAllocator(settings.TICKET_NUMBER_BLOCK_SIZE)
+    return _allocator
+
+
+async def allocate_ticket_numbers(count: int = 1) -> List[str]:
+    """count new ticket numbers, unique across workers and nodes"""
+    return await get_ticket_number_allocator().allocate(count)
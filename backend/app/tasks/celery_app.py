@@ -0,0 +1,46 @@
+"""
+Celery application for background ticket processing
+
+Run: celery -A app.tasks.celery_app worker --loglevel=info
+"""
+
+import logging
+from typing import List
+
+from celery import Celery
+
+from app.core.config import settings
+from app.tasks.enrichment import run_enrichment
+
+logger = logging.getLogger(__name__)
+
+
+celery_app = Celery(
+    "autosupport",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
+)
+celery_app.conf.update(
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    task_ignore_result=True,
+    # Re-deliver a batch whose worker died mid-way; enrichment is idempotent
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1
+)
+
+
+@celery_app.task(
+    name="enrichment.enrich_tickets",
+    autoretry_for=(Exception,),
+    retry_backoff=settings.ENRICHMENT_RETRY_BACKOFF_SECONDS,
+    retry_jitter=True,
+    max_retries=settings.ENRICHMENT_MAX_RETRIES
+)
+def enrich_tickets_task(ticket_ids: List[int]) -> dict:
+    """Enrich a batch of tickets queued by the API"""
+    result = run_enrichment(ticket_ids)
+    logger.info(f"Enriched {result['enriched']} tickets, routed {result['routed']}, indexed {result['indexed']}")
+    return result
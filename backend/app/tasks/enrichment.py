@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import track_inference
+from app.ml.inference import get_ml_service
+from app.ml.classifier import get_classifier
+from app.ml.text_features import (
+    analyze_text, extract_features, sentiment_from_features, urgency_from_features, priority_from_urgency
+)
+from app.services.analytics_cache import invalidate_analytics
+from app.services.routing import route_ticket_to_agent
+from models.ticket import Ticket, TicketCategory, TicketStatus
+
+logger = logging.getLogger(__name__)
+
+
+_rag_system = None
+_rag_unavailable = False
+
+
+@track_inference("enrichment_analyze_batch")
+def analyze_batch(texts: List[str]) -> List[Dict]:
+    """
+    Category, sentiment and urgency for many texts
+
+    With ENRICHMENT_CLASSIFIER=tfidf the trained classifier labels the whole
+    batch in one predict_proba call; sentiment and urgency stay rule-based.
+    """
+    classifier = get_classifier() if settings.ENRICHMENT_CLASSIFIER.lower() == "tfidf" else None
+    if classifier is None or not classifier.is_ready():
+        return [analyze_text(text) for text in texts]
+
+    results = []
+    for text, classification in zip(texts, classifier.predict_batch(texts)):
+        features = extract_features(text)
+        sentiment = sentiment_from_features(features)
+        results.append({
+            **classification,
+            "sentiment": sentiment["sentiment"],
+            "sentiment_score": sentiment["score"],
+            "urgency_score": urgency_from_features(
+                features, sentiment["sentiment"], classification["category"]
+            )
+        })
+    return results
+
+
+async def _get_rag_system():
+    """Knowledge base for ticket indexing, or None when disabled or not installed"""
+    global _rag_system, _rag_unavailable
+    if not settings.ENRICHMENT_RAG_INDEXING or _rag_unavailable:
+        return None
+    ml_service = get_ml_service()
+    if ml_service.rag_system is not None:
+        return ml_service.rag_system
+    if ml_service.loading:
+        # Background loading brings its own embedding model, don't load a second copy meanwhile
+        return None
+    if _rag_system is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+            from app.ml.rag_system import RAGSystem
+
+            rag_system = RAGSystem(SentenceTransformer(settings.EMBEDDING_MODEL))
+            await rag_system.initialize()
+            _rag_system = rag_system
+        except Exception as e:
+            _rag_unavailable = True
+            logger.warning(f"RAG indexing disabled, knowledge base unavailable: {e}")
+            return None
+    return _rag_system
+
+
+async def enrich_tickets(ticket_ids: List[int]) -> Dict:
+    """
+    Classify, score, route and index newly created tickets
+
+    Tickets that already have a sentiment (scored at bulk ingestion, or by
+    an earlier attempt) are not analyzed again, and only open, unassigned
+    tickets are routed, so a batch can safely be retried.
+    """
+    db = SessionLocal()
+    try:
+        tickets = db.query(Ticket).filter(Ticket.id.in_(ticket_ids)).order_by(Ticket.id).all()
+        if not tickets:
+            return {"enriched": 0, "routed": 0, "indexed": 0}
+
+        unscored = [ticket for ticket in tickets if ticket.sentiment is None]
+        analyses = analyze_batch([ticket.description for ticket in unscored]) if unscored else []
+        for ticket, analysis in zip(unscored, analyses):
+            ticket.category = TicketCategory(analysis["category"])
+            ticket.category_confidence = analysis["confidence"]
+            ticket.sentiment = analysis["sentiment"]
+            ticket.sentiment_score = analysis["sentiment_score"]
+            ticket.urgency_score = analysis["urgency_score"]
+            ticket.priority = priority_from_urgency(analysis["urgency_score"])
+
+        to_route = [
+            ticket.id for ticket in tickets
+            if ticket.assigned_to is None and ticket.status in (None, TicketStatus.OPEN)
+        ]
+        to_index = [
+            {"id": ticket.id, "text": ticket.description,
+             "category": ticket.category.value if ticket.category else None}
+            for ticket in tickets
+        ]
+        db.commit()
+
+        routed = 0
+        if settings.ENRICHMENT_AUTO_ROUTE:
+            for ticket_id in to_route:
+                if await route_ticket_to_agent(ticket_id, db):
+                    routed += 1
+        invalidate_analytics()
+
+        indexed = 0
+        rag_system = await _get_rag_system()
+        if rag_system is not None:
+            try:
+                indexed = await rag_system.add_tickets(to_index)
+            except Exception as e:
+                # The tickets are enriched and routed; a missing index entry is not worth a retry
+                logger.warning(f"Indexing tickets {[t['id'] for t in to_index]} failed: {e}")
+
+        return {"enriched": len(unscored), "routed": routed, "indexed": indexed}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_enrichment(ticket_ids: List[int]) -> Dict:
+    """Synchronous entry point for worker threads and Celery tasks"""
+    return asyncio.run(enrich_tickets(ticket_ids))
+
+
+def find_unenriched_tickets(db, limit: Optional[int] = None) -> List[int]:
+    """Ids of tickets whose enrichment never completed (e.g. lost on restart)"""
+    query = db.query(Ticket.id).filter(Ticket.sentiment.is_(None)).order_by(Ticket.id)
+    if limit:
+        query = query.limit(limit)
+    return [ticket_id for ticket_id, in query.all()]
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.tasks.enrichment import run_enrichment
+
+logger = logging.getLogger(__name__)
+
+
+_STOP = object()
+
+
+class EnrichmentQueue:
+    """
+    Batching queue in front of the ticket enrichment pipeline
+
+    A single worker thread takes the first queued ticket, keeps collecting
+    until batch_size tickets or batch_wait seconds, and hands the ids to
+    handler as one batch. A failed batch is re-queued after an exponential
+    backoff, up to max_retries times per ticket. Tickets still queued or
+    waiting for a retry when the process exits are not persisted; they can
+    be picked up again with scripts/enrich_pending.py.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[int]], object],
+        batch_size: int,
+        batch_wait: float,
+        max_retries: int,
+        retry_backoff: float
+    ):
+        self.handler = handler
+        self.batch_size = max(batch_size, 1)
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+        self.batches = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def put(self, ticket_ids: List[int]):
+        """Queue tickets for enrichment"""
+        with self._lock:
+            self._pending += len(ticket_ids)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ticket-enrichment", daemon=True)
+                self._thread.start()
+        for ticket_id in ticket_ids:
+            self._queue.put((ticket_id, 0))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[Tuple[int, int]]):
+        ticket_ids = [ticket_id for ticket_id, _ in batch]
+        retry = []
+        try:
+            self.handler(ticket_ids)
+            self.processed += len(batch)
+        except Exception as e:
+            retry = [(ticket_id, attempt + 1) for ticket_id, attempt in batch if attempt < self.max_retries]
+            failed = len(batch) - len(retry)
+            self.retried += len(retry)
+            self.failed += failed
+            logger.warning(
+                f"Enrichment of tickets {ticket_ids} failed ({e}); "
+                f"retrying {len(retry)}, giving up on {failed}"
+            )
+            if retry:
+                attempt = max(a for _, a in retry)
+                timer = threading.Timer(self.retry_backoff * 2 ** (attempt - 1), self._requeue, args=(retry,))
+                timer.daemon = True
+                timer.start()
+        finally:
+            self.batches += 1
+            with self._idle:
+                self._pending -= len(batch) - len(retry)
+                self._idle.notify_all()
+
+    def _requeue(self, items: List[Tuple[int, int]]):
+        for item in items:
+            self._queue.put(item)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued ticket is processed or given up on"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Finish the tickets queued so far, then stop the worker thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": self._pending,
+            "batches": self.batches,
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed
+        }
+
+
+def _dispatch_to_celery(ticket_ids: List[int]):
+    from app.tasks.celery_app import enrich_tickets_task
+
+    enrich_tickets_task.delay(ticket_ids)
+
+
+_enrichment_queue: Optional[EnrichmentQueue] = None
+
+
+def get_enrichment_queue() -> EnrichmentQueue:
+    """
+    Shared enrichment queue for this process
+
+    With the celery backend batches are sent to the worker as one task each
+    (Celery then owns the retries); otherwise they run in the queue's thread.
+    """
+    global _enrichment_queue
+    if _enrichment_queue is None:
+        celery = settings.ENRICHMENT_BACKEND.lower() == "celery"
+        _enrichment_queue = EnrichmentQueue(
+            handler=_dispatch_to_celery if celery else run_enrichment,
+            batch_size=settings.ENRICHMENT_BATCH_SIZE,
+            batch_wait=settings.ENRICHMENT_BATCH_WAIT_SECONDS,
+            max_retries=settings.ENRICHMENT_MAX_RETRIES,
+            retry_backoff=settings.ENRICHMENT_RETRY_BACKOFF_SECONDS
+        )
+    return _enrichment_queue
+
+
+async def enqueue_enrichment(ticket_ids: List[int]):
+    """
+    Hand newly created tickets to the enrichment pipeline
+
+    The eager backend runs the pipeline before returning (in a thread, so the
+    event loop is not blocked), which keeps test runs deterministic.
+    """
+    if not ticket_ids:
+        return
+    if settings.ENRICHMENT_BACKEND.lower() == "eager":
+        try:
+            await asyncio.to_thread(run_enrichment, ticket_ids)
+        except Exception as e:
+            logger.warning(f"Enrichment of tickets {ticket_ids} failed: {e}")
+        return
+    get_enrichment_queue().put(ticket_ids)
+
+
+def shutdown_enrichment(timeout: float = 10.0):
+    """Drain the in-process queue on shutdown"""
+    if _enrichment_queue is not None:
+        _enrichment_queue.stop(timeout)
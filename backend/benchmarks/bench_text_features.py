@@ -0,0 +1,177 @@
+"""
+Microbenchmark for the shared rule-based text feature extraction
+
+Compares the per-keyword scans that used to live in each call site
+(create_ticket, /ml/classify, /ml/sentiment, MLService), using their
+original dictionaries, with the compiled matcher in app.ml.text_features
+on short and long ticket texts.
+
+Run: python benchmarks/bench_text_features.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ml.text_features import (  # noqa: E402
+    extract_features, analyze_text, classify_features, urgency_from_features
+)
+
+
+SAMPLES = {
+    "short": "I can't login to my account, forgot password",
+    "medium": (
+        "Hi, I was charged twice for my subscription this month and the app keeps "
+        "crashing with an ERROR when I try to upload files. This is terrible, "
+        "please help ASAP!!! I cannot access my invoices and would like a refund."
+    ),
+    "long": (
+        "Hello support team, I have been a customer for three years and overall the "
+        "service has been good, but this week something is clearly broken. " * 12
+    ),
+}
+
+# The dictionaries exactly as the call sites had them before app.ml.text_features
+# (ml.classify_text and MLService.classify_ticket shared the categories,
+# ml.analyze_sentiment had the sentiment words, MLService the urgency keywords)
+LEGACY_CATEGORIES = {
+    "billing": ["payment", "charge", "invoice", "bill", "refund", "subscription"],
+    "technical": ["error", "bug", "not working", "broken", "crash", "issue", "problem"],
+    "account": ["password", "login", "access", "account", "sign in", "username"],
+    "complaint": ["disappointed", "upset", "angry", "terrible", "worst", "complaint"],
+    "feature_request": ["feature", "would like", "suggestion", "add", "implement", "wish"],
+    "general": ["question", "help", "how to", "what", "when", "where"]
+}
+LEGACY_NEGATIVE_WORDS = ['angry', 'terrible', 'worst', 'disappointed', 'frustrated', 'broken', 'upset']
+LEGACY_POSITIVE_WORDS = ['great', 'good', 'thanks', 'appreciate', 'helpful', 'excellent', 'amazing']
+LEGACY_URGENCY_KEYWORDS = {
+    "urgent": 1.0,
+    "asap": 0.9,
+    "immediately": 0.9,
+    "critical": 0.95,
+    "emergency": 1.0,
+    "broken": 0.7,
+    "not working": 0.7,
+    "down": 0.8,
+    "error": 0.6,
+    "failed": 0.6,
+    "cannot": 0.5,
+    "unable": 0.5
+}
+
+
+def legacy_features(text: str) -> dict:
+    """The original per-keyword scans, one generator per dictionary"""
+    text_lower = text.lower()
+
+    scores = {}
+    for category, keywords in LEGACY_CATEGORIES.items():
+        scores[category] = sum(1 for keyword in keywords if keyword in text_lower)
+
+    neg_count = sum(1 for word in LEGACY_NEGATIVE_WORDS if word in text_lower)
+    pos_count = sum(1 for word in LEGACY_POSITIVE_WORDS if word in text_lower)
+
+    urgency = 0.0
+    for keyword, weight in LEGACY_URGENCY_KEYWORDS.items():
+        if keyword in text_lower:
+            urgency = max(urgency, weight)
+
+    caps_ratio = sum(1 for c in text if c.isupper()) / len(text) if len(text) > 0 else 0
+
+    return {
+        "category_scores": scores,
+        "negative_count": neg_count,
+        "positive_count": pos_count,
+        "urgency_weight": urgency,
+        "exclamation_count": text.count('!'),
+        "caps_ratio": caps_ratio
+    }
+
+
+def legacy_classify(text: str) -> dict:
+    """ml.classify_text / MLService.classify_ticket before the shared matcher"""
+    text_lower = text.lower()
+
+    scores = {}
+    for category, keywords in LEGACY_CATEGORIES.items():
+        score = sum(1 for keyword in keywords if keyword in text_lower)
+        scores[category] = score
+
+    if max(scores.values()) > 0:
+        best_category = max(scores, key=scores.get)
+        confidence = min(scores[best_category] / 5.0, 1.0)
+    else:
+        best_category = "general"
+        confidence = 0.5
+
+    total_score = sum(scores.values()) if sum(scores.values()) > 0 else 1
+    all_predictions = {cat: score / total_score for cat, score in scores.items()}
+
+    return {"category": best_category, "confidence": confidence, "all_predictions": all_predictions}
+
+
+def legacy_urgency(text: str, sentiment: str) -> float:
+    """MLService.analyze_sentiment's urgency before the shared matcher"""
+    text_lower = text.lower()
+    urgency_score = 0.3  # Base urgency
+
+    for keyword, weight in LEGACY_URGENCY_KEYWORDS.items():
+        if keyword in text_lower:
+            urgency_score = max(urgency_score, weight)
+
+    if sentiment == "negative":
+        urgency_score = min(urgency_score + 0.2, 1.0)
+
+    if text.count('!') > 2:
+        urgency_score = min(urgency_score + 0.1, 1.0)
+
+    caps_ratio = sum(1 for c in text if c.isupper()) / len(text) if len(text) > 0 else 0
+    if caps_ratio > 0.3:
+        urgency_score = min(urgency_score + 0.15, 1.0)
+
+    return round(urgency_score, 2)
+
+
+def legacy_all_call_sites(text: str):
+    """What one ticket cost when every call site rescanned the text"""
+    legacy_features(text)  # create_ticket
+    legacy_features(text)  # /ml/classify
+    legacy_features(text)  # /ml/sentiment
+
+
+def check_equivalence(texts=None):
+    """Raise if the shared matcher disagrees with the original scans on any text"""
+    for text in texts or SAMPLES.values():
+        expected = legacy_features(text)
+        actual = vars(extract_features(text))
+        if expected != actual:
+            raise AssertionError(f"Feature mismatch for {text!r}: {expected} != {actual}")
+        if classify_features(extract_features(text)) != legacy_classify(text):
+            raise AssertionError(f"Classification mismatch for {text!r}")
+        for sentiment in ("negative", "neutral", "positive"):
+            if urgency_from_features(extract_features(text), sentiment) != legacy_urgency(text, sentiment):
+                raise AssertionError(f"Urgency mismatch for {text!r} ({sentiment})")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    check_equivalence()
+
+    print(f"{'sample':<8} {'chars':>6} {'legacy us':>10} {'matcher us':>11} "
+          f"{'3 sites us':>11} {'analyze us':>11}")
+    for name, text in SAMPLES.items():
+        legacy = timeit.timeit(lambda: legacy_features(text), number=iterations)
+        matcher = timeit.timeit(lambda: extract_features(text), number=iterations)
+        legacy_sites = timeit.timeit(lambda: legacy_all_call_sites(text), number=iterations)
+        shared = timeit.timeit(lambda: analyze_text(text), number=iterations)
+
+        print(f"{name:<8} {len(text):>6} "
+              f"{legacy / iterations * 1e6:>10.2f} {matcher / iterations * 1e6:>11.2f} "
+              f"{legacy_sites / iterations * 1e6:>11.2f} {shared / iterations * 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
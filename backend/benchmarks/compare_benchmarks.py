@@ -0,0 +1,65 @@
+"""
+Compare two run_benchmarks.py result files
+
+Prints the median of every benchmark in both runs and the new/old ratio,
+and exits with status 1 when any benchmark got slower than --threshold
+(default 1.25, i.e. 25% slower), so it can gate a CI job.
+
+Run: python benchmarks/compare_benchmarks.py baseline.json results.json [--threshold 1.25]
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str):
+    with open(path) as f:
+        report = json.load(f)
+    results = {
+        (r["benchmark"], r["dataset"]): r
+        for r in report["results"]
+        if not r.get("skipped")
+    }
+    return report["meta"], results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.baseline)
+    new_meta, new = load(args.current)
+    print(f"baseline {base_meta.get('commit')} ({base_meta.get('database')})  vs  "
+          f"current {new_meta.get('commit')} ({new_meta.get('database')})")
+    if base_meta.get("database") != new_meta.get("database"):
+        print("⚠️  Runs used different databases; ratios are not comparable")
+
+    regressions = []
+    print(f"{'benchmark':<32} {'dataset':<16} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for key in sorted(set(base) | set(new), key=lambda k: (k[0], k[1] or "")):
+        name, dataset = key
+        old_result, new_result = base.get(key), new.get(key)
+        if old_result is None or new_result is None:
+            print(f"{name:<32} {dataset or '-':<16} {'only in ' + ('current' if old_result is None else 'baseline'):>33}")
+            continue
+        ratio = new_result["median_ms"] / old_result["median_ms"] if old_result["median_ms"] else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  ❌ slower"
+            regressions.append(key)
+        elif ratio < 1 / args.threshold:
+            flag = "  ✅ faster"
+        print(f"{name:<32} {dataset or '-':<16} {old_result['median_ms']:>12.3f} "
+              f"{new_result['median_ms']:>12.3f} {ratio:>7.2f}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}x")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
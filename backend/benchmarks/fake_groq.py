@@ -0,0 +1,126 @@
+"""
+Local stand-in for the Groq chat completions API
+
+Answers POST /openai/v1/chat/completions (plain and stream=true) after a
+configurable delay and fails a configurable share of calls with a 500 or a
+429, so load tests exercise the LLM path, its concurrency limit and the
+template fallback without a Groq key or quota. Point the app at it with
+GROQ_BASE_URL=http://127.0.0.1:8090 and any non-empty GROQ_API_KEY.
+
+Run: python benchmarks/fake_groq.py [--port 8090] [--latency-ms 400] [--jitter-ms 150] \
+         [--error-rate 0.02] [--token-delay-ms 20]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+REPLY = (
+    "Thanks for reaching out and sorry for the trouble. "
+    "I have looked into your account and the issue is now being handled by our team. "
+    "You will get an update by email within one business day."
+)
+
+
+class FakeGroqConfig:
+    latency_ms = 400.0
+    jitter_ms = 150.0
+    error_rate = 0.0
+    token_delay_ms = 20.0
+
+
+config = FakeGroqConfig()
+app = FastAPI(title="Fake Groq")
+
+
+def _delay() -> float:
+    return max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+
+
+def _error_response():
+    if random.random() < 0.5:
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+            status_code=429
+        )
+    return JSONResponse(
+        {"error": {"message": "Internal server error", "type": "internal_server_error"}},
+        status_code=500
+    )
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    return "data: " + json.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }) + "\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    await asyncio.sleep(_delay())
+    if random.random() < config.error_rate:
+        return _error_response()
+
+    if body.get("stream"):
+        async def events():
+            yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for word in REPLY.split(" "):
+                await asyncio.sleep(config.token_delay_ms / 1000)
+                yield _chunk(completion_id, model, {"content": word + " "})
+            yield _chunk(completion_id, model, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    words = len(REPLY.split(" "))
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": REPLY},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 60, "completion_tokens": words, "total_tokens": 60 + words}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms, help="mean time to respond")
+    parser.add_argument("--jitter-ms", type=float, default=config.jitter_ms, help="standard deviation of the delay")
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="share of calls failing (0-1)")
+    parser.add_argument("--token-delay-ms", type=float, default=config.token_delay_ms,
+                        help="gap between streamed chunks")
+    args = parser.parse_args()
+
+    config.latency_ms = args.latency_ms
+    config.jitter_ms = args.jitter_ms
+    config.error_rate = args.error_rate
+    config.token_delay_ms = args.token_delay_ms
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+End-to-end load test with a mixed traffic profile
+
+Replays a weighted mix of requests against the running app and reports
+p50/p95/p99 latency, throughput and error rate per route. The default
+profile is 60% ticket list, 20% ticket creation, 10% dashboard polls and
+10% suggest-response; override it with --mix list_tickets=70,create_ticket=30
+or a JSON file of the same name -> weight pairs.
+
+Without --target the script starts everything locally: benchmarks/fake_groq.py
+with the given latency and error rate, and uvicorn with --workers N pointed
+at it (DATABASE_URL is passed through, so run it against the database you
+want to size). With --target it only generates load against that server.
+
+Load is closed-loop by default (--concurrency users sending back to back).
+With --rate it is open-loop: requests start at a Poisson arrival rate
+whether or not earlier ones finished, and latency is measured from the
+scheduled start, so a saturated server shows up as queueing rather than as
+a politely lower request rate.
+
+Run: python benchmarks/load_test.py --workers 2 --concurrency 50 --duration 60
+     python benchmarks/load_test.py --target http://localhost:8000 --rate 200 --duration 120
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+API = "/api/v1"
+
+DEFAULT_MIX = {
+    "list_tickets": 60,
+    "create_ticket": 20,
+    "dashboard": 10,
+    "suggest_response": 10,
+}
+
+SUBJECTS = [
+    ("Charged twice this month", "I was charged twice for my subscription this month, please refund the extra payment"),
+    ("App crashes on upload", "The app keeps crashing with an error whenever I upload files larger than 10MB"),
+    ("Cannot log in", "I cannot login to my account since yesterday, the password reset email never arrives"),
+    ("Export to CSV", "Would like to suggest a feature for exporting reports to CSV for our finance team"),
+    ("Terrible experience", "Very disappointed with the support so far, this is the worst experience I have had"),
+    ("Change account email", "Question: how do I change the email address on my account? Thanks in advance"),
+]
+STATUS_FILTERS = [None, None, None, "open", "in_progress"]
+
+
+class LoadState:
+    """Ticket ids the scenarios can refer to, grown by create_ticket"""
+
+    def __init__(self, ticket_ids: List[int]):
+        self.ticket_ids = ticket_ids
+
+    def random_ticket(self) -> Optional[int]:
+        return random.choice(self.ticket_ids) if self.ticket_ids else None
+
+
+# Each scenario sends one request and returns (route label, response)
+
+async def list_tickets(client: httpx.AsyncClient, state: LoadState):
+    params = {"limit": 50}
+    status = random.choice(STATUS_FILTERS)
+    if status:
+        params["status"] = status
+    return "GET /tickets", await client.get(f"{API}/tickets/", params=params)
+
+
+async def create_ticket(client: httpx.AsyncClient, state: LoadState):
+    subject, description = random.choice(SUBJECTS)
+    n = random.randrange(100_000)
+    response = await client.post(f"{API}/tickets/", json={
+        "customer_name": f"Load Customer {n}",
+        "customer_email": f"load{n}@example.com",
+        "subject": subject,
+        "description": description
+    })
+    if response.status_code == 201:
+        state.ticket_ids.append(response.json()["id"])
+    return "POST /tickets", response
+
+
+async def dashboard(client: httpx.AsyncClient, state: LoadState):
+    return "GET /analytics/dashboard", await client.get(f"{API}/analytics/dashboard")
+
+
+async def suggest_response(client: httpx.AsyncClient, state: LoadState):
+    ticket_id = state.random_ticket()
+    return "POST /tickets/{id}/suggest-response", await client.post(f"{API}/tickets/{ticket_id}/suggest-response")
+
+
+SCENARIOS = {
+    "list_tickets": list_tickets,
+    "create_ticket": create_ticket,
+    "dashboard": dashboard,
+    "suggest_response": suggest_response,
+}
+
+
+class Recorder:
+    """Latencies and outcomes per route, ignoring requests started during warmup"""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.fallbacks: Dict[str, int] = defaultdict(int)
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def record(self, route: str, started: float, ended: float, ok: bool, fallback: bool = False):
+        if started < self.measure_from:
+            return
+        self.first_start = started if self.first_start is None else min(self.first_start, started)
+        self.last_end = ended if self.last_end is None else max(self.last_end, ended)
+        self.latencies[route].append(ended - started)
+        if not ok:
+            self.errors[route] += 1
+        if fallback:
+            self.fallbacks[route] += 1
+
+
+async def send(client: httpx.AsyncClient, state: LoadState, recorder: Recorder, scenario: str, started: float):
+    route = scenario
+    ok = False
+    fallback = False
+    try:
+        route, response = await SCENARIOS[scenario](client, state)
+        ok = response.status_code < 400
+        # The app answers 200 from templates when Groq fails or is saturated
+        if ok and scenario == "suggest_response":
+            fallback = response.json().get("reasoning", "").startswith("Template")
+    except httpx.HTTPError:
+        pass
+    recorder.record(route, started, time.perf_counter(), ok, fallback)
+
+
+def pick(mix: Dict[str, float]) -> str:
+    return random.choices(list(mix), weights=list(mix.values()))[0]
+
+
+async def closed_loop(client, state, recorder, mix, concurrency: int, deadline: float, think_time: float):
+    async def user():
+        while time.perf_counter() < deadline:
+            await send(client, state, recorder, pick(mix), time.perf_counter())
+            if think_time:
+                await asyncio.sleep(random.expovariate(1 / think_time))
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client, state, recorder, mix, rate: float, deadline: float, max_in_flight: int):
+    in_flight = set()
+    dropped = 0
+    next_start = time.perf_counter()
+    while next_start < deadline:
+        delay = next_start - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            dropped += 1
+        else:
+            task = asyncio.create_task(send(client, state, recorder, pick(mix), next_start))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_start += random.expovariate(rate)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    if dropped:
+        print(f"⚠️  {dropped} arrivals dropped at the --max-in-flight limit of {max_in_flight}")
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(recorder: Recorder) -> Dict:
+    elapsed = (recorder.last_end - recorder.first_start) if recorder.first_start is not None else 0.0
+    routes = {}
+    all_latencies = []
+    for route, latencies in sorted(recorder.latencies.items()):
+        ordered = sorted(latencies)
+        all_latencies.extend(ordered)
+        routes[route] = {
+            "requests": len(ordered),
+            "errors": recorder.errors[route],
+            "error_rate": round(recorder.errors[route] / len(ordered), 4),
+            "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else None,
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+        if recorder.fallbacks[route]:
+            routes[route]["template_fallbacks"] = recorder.fallbacks[route]
+
+    total_errors = sum(recorder.errors.values())
+    all_latencies.sort()
+    total = {
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+        "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+    }
+    if all_latencies:
+        total.update({
+            "p50_ms": round(percentile(all_latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(all_latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(all_latencies, 99) * 1000, 2),
+            "max_ms": round(all_latencies[-1] * 1000, 2),
+        })
+    return {"elapsed_seconds": round(elapsed, 2), "routes": routes, "total": total}
+
+
+def print_report(summary: Dict):
+    print(f"\n{'route':<38} {'reqs':>7} {'err %':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(summary["routes"].items()) + [("TOTAL", summary["total"])]
+    for route, stats in rows:
+        if not stats["requests"]:
+            continue
+        print(f"{route:<38} {stats['requests']:>7} {stats['error_rate'] * 100:>6.2f} "
+              f"{stats['throughput_rps'] or 0:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+    for route, stats in summary["routes"].items():
+        if stats.get("template_fallbacks"):
+            print(f"ℹ️  {route}: {stats['template_fallbacks']} answered from templates (Groq failed or saturated)")
+
+
+def parse_mix(value: Optional[str]) -> Dict[str, float]:
+    if not value:
+        return dict(DEFAULT_MIX)
+    if os.path.exists(value):
+        with open(value) as f:
+            mix = {name: float(weight) for name, weight in json.load(f).items()}
+    else:
+        mix = {}
+        for part in value.split(","):
+            name, _, weight = part.partition("=")
+            mix[name.strip()] = float(weight)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios {sorted(unknown)}; choose from {sorted(SCENARIOS)}")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_servers(args) -> List[subprocess.Popen]:
+    """Fake Groq plus uvicorn with the requested worker count"""
+    groq = subprocess.Popen([
+        sys.executable, os.path.join(BENCH_DIR, "fake_groq.py"),
+        "--port", str(args.groq_port),
+        "--latency-ms", str(args.groq_latency_ms),
+        "--jitter-ms", str(args.groq_jitter_ms),
+        "--error-rate", str(args.groq_error_rate),
+    ])
+
+    env = dict(os.environ)
+    env["GROQ_API_KEY"] = env.get("GROQ_API_KEY") or "load-test"
+    env["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.groq_port}"
+    if args.workers > 1 and not env.get("PROMETHEUS_MULTIPROC_DIR"):
+        env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="load_test_metrics_")
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ], cwd=BACKEND_DIR, env=env)
+
+    servers = [groq, app]
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.groq_port}/docs")
+        wait_until_up(f"http://127.0.0.1:{args.port}/health")
+    except SystemExit:
+        stop_servers(servers)
+        raise
+    return servers
+
+
+def stop_servers(servers: List[subprocess.Popen]):
+    for server in servers:
+        server.terminate()
+    for server in servers:
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+async def prepare_state(client: httpx.AsyncClient, minimum: int = 20) -> LoadState:
+    """Existing ticket ids to suggest responses for, creating a few on an empty database"""
+    response = await client.get(f"{API}/tickets/", params={"limit": 500})
+    response.raise_for_status()
+    state = LoadState([ticket["id"] for ticket in response.json()])
+    while len(state.ticket_ids) < minimum:
+        await create_ticket(client, state)
+    return state
+
+
+async def run(args, mix: Dict[str, float]) -> Dict:
+    limits = httpx.Limits(max_connections=args.max_in_flight if args.rate else args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=args.timeout) as client:
+        state = await prepare_state(client)
+        start = time.perf_counter()
+        recorder = Recorder(measure_from=start + args.warmup)
+        deadline = start + args.warmup + args.duration
+        if args.rate:
+            await open_loop(client, state, recorder, mix, args.rate, deadline, args.max_in_flight)
+        else:
+            await closed_loop(client, state, recorder, mix, args.concurrency, deadline, args.think_time)
+    return summarize(recorder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="base URL of a running server; starts one locally when omitted")
+    parser.add_argument("--mix", help="name=weight,... or a JSON file (default 60/20/10/10)")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before that")
+    parser.add_argument("--concurrency", type=int, default=20, help="closed-loop users")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between a user's requests")
+    parser.add_argument("--rate", type=float, help="open-loop arrivals per second (overrides --concurrency)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="open-loop cap on outstanding requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout per request")
+    parser.add_argument("--output", help="write the summary as JSON")
+    local = parser.add_argument_group("local servers (without --target)")
+    local.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    local.add_argument("--port", type=int, default=8000)
+    local.add_argument("--groq-port", type=int, default=8090)
+    local.add_argument("--groq-latency-ms", type=float, default=400.0)
+    local.add_argument("--groq-jitter-ms", type=float, default=150.0)
+    local.add_argument("--groq-error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    servers = []
+    if not args.target:
+        servers = start_servers(args)
+        args.target = f"http://127.0.0.1:{args.port}"
+
+    load = f"{args.rate} req/s open-loop" if args.rate else f"{args.concurrency} concurrent users"
+    print(f"🚀 {load} against {args.target} for {args.duration:.0f}s (+{args.warmup:.0f}s warmup), mix {mix}")
+    try:
+        summary = asyncio.run(run(args, mix))
+    finally:
+        stop_servers(servers)
+
+    summary["config"] = {
+        "target": args.target,
+        "mix": mix,
+        "load": load,
+        "workers": args.workers if servers else None,
+        "groq": None if not servers else {
+            "latency_ms": args.groq_latency_ms,
+            "jitter_ms": args.groq_jitter_ms,
+            "error_rate": args.groq_error_rate,
+        },
+    }
+    print_report(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""
+Benchmark suite for the backend hot paths
+
+Times the request handlers and services directly (no HTTP stack) against
+synthetic datasets and writes the results to JSON, so two commits can be
+compared with benchmarks/compare_benchmarks.py:
+
+  ml.classify_text              keyword classification (/ml/classify)
+  tickets.create                create_ticket, with enrichment run eagerly
+  tickets.list.first_page       get_tickets, newest 50
+  tickets.list.cursor_20_pages  get_tickets, following X-Next-Cursor 20 times
+  tickets.list.offset_middle    get_tickets with skip= half the table
+  analytics.dashboard.compute   dashboard aggregates, uncached
+  analytics.dashboard.cached    get_dashboard_analytics, cache hit
+  routing.route_ticket          route_ticket_to_agent on an open ticket
+  rag.generate_response         RAGSystem.generate_response (needs chromadb
+                                and sentence-transformers, skipped otherwise)
+
+Datasets: small = 10k tickets / 10 agents, medium = 100k / 100,
+large = 1M / 1000. Each dataset is rebuilt from scratch unless --reuse is
+given and the database already holds one of the same size. Benchmarks that
+write (create, route) run last.
+
+Run: [DATABASE_URL=postgresql://...] python benchmarks/run_benchmarks.py \
+         [--datasets small,medium] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+# Settings are read at import; the defaults keep a laptop run self-contained
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}")
+os.environ.setdefault("ENRICHMENT_BACKEND", "eager")
+
+from fastapi import Response  # noqa: E402
+from sqlalchemy import func, insert, select, update  # noqa: E402
+
+from app.api.v1.analytics import compute_dashboard_analytics, get_dashboard_analytics  # noqa: E402
+from app.api.v1.ml import classify_text  # noqa: E402
+from app.api.v1.tickets import create_ticket, get_tickets  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.database import AsyncSessionLocal, Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.core.pagination import NEXT_CURSOR_HEADER  # noqa: E402
+from app.schemas import ClassificationRequest, TicketCreate  # noqa: E402
+from app.services.agent_load import repair_open_ticket_counts  # noqa: E402
+from app.services.rollups import rebuild_daily_stats  # noqa: E402
+from app.services.routing import route_ticket_to_agent  # noqa: E402
+from app.services.routing_index import get_routing_index  # noqa: E402
+from models.ticket import Agent, Ticket, TicketCategory, TicketPriority, TicketStatus  # noqa: E402
+
+
+DATASETS = {
+    "small": (10_000, 10),
+    "medium": (100_000, 100),
+    "large": (1_000_000, 1000),
+}
+INSERT_BATCH = 10_000
+
+SAMPLE_TEXTS = [
+    "I was charged twice for my subscription this month, please refund",
+    "The app keeps crashing with an error when I upload files",
+    "I cannot login to my account, forgot my password",
+    "Would like to suggest a feature for exporting reports",
+    "Very disappointed with the support, this is the worst experience",
+    "Question: how to change the email on my account?",
+]
+
+
+class BenchContext:
+    """Event loop and dataset facts shared by the benchmarks of one dataset"""
+
+    def __init__(self, dataset: str, tickets: int, agents: int):
+        self.dataset = dataset
+        self.tickets = tickets
+        self.agents = agents
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+
+BENCHMARKS = []
+
+
+def benchmark(name: str, repeats: int = 50, per_dataset: bool = True):
+    """Register a factory that prepares state and returns the callable to time"""
+    def register(factory: Callable[[BenchContext], Optional[Callable[[], object]]]):
+        BENCHMARKS.append((name, repeats, per_dataset, factory))
+        return factory
+    return register
+
+
+# --- Benchmarks (read-only first, writers last) ---
+
+@benchmark("ml.classify_text", repeats=5000, per_dataset=False)
+def bench_classify_text(ctx: BenchContext):
+    requests = [ClassificationRequest(text=text) for text in SAMPLE_TEXTS]
+    texts = iter(range(10 ** 9))
+    return lambda: ctx.run(classify_text(requests[next(texts) % len(requests)]))
+
+
+@benchmark("tickets.list.first_page", repeats=200)
+def bench_first_page(ctx: BenchContext):
+    async def first_page():
+        async with AsyncSessionLocal() as db:
+            await get_tickets(Response(), skip=0, limit=50, cursor=None, db=db)
+    return lambda: ctx.run(first_page())
+
+
+@benchmark("tickets.list.cursor_20_pages", repeats=30)
+def bench_cursor_walk(ctx: BenchContext):
+    async def walk():
+        async with AsyncSessionLocal() as db:
+            cursor = None
+            for _ in range(20):
+                response = Response()
+                await get_tickets(response, skip=0, limit=50, cursor=cursor, db=db)
+                cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                if cursor is None:
+                    break
+    return lambda: ctx.run(walk())
+
+
+@benchmark("tickets.list.offset_middle", repeats=30)
+def bench_offset_middle(ctx: BenchContext):
+    async def deep_page():
+        async with AsyncSessionLocal() as db:
+            await get_tickets(Response(), skip=ctx.tickets // 2, limit=50, cursor=None, db=db)
+    return lambda: ctx.run(deep_page())
+
+
+@benchmark("analytics.dashboard.compute", repeats=10)
+def bench_dashboard_compute(ctx: BenchContext):
+    async def compute():
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(compute_dashboard_analytics)
+    return lambda: ctx.run(compute())
+
+
+@benchmark("analytics.dashboard.cached", repeats=500)
+def bench_dashboard_cached(ctx: BenchContext):
+    async def cached():
+        async with AsyncSessionLocal() as db:
+            await get_dashboard_analytics(db)
+    return lambda: ctx.run(cached())
+
+
+@benchmark("rag.generate_response", repeats=100, per_dataset=False)
+def bench_rag(ctx: BenchContext):
+    try:
+        from sentence_transformers import SentenceTransformer
+        from app.ml.rag_system import RAGSystem
+    except ImportError as e:
+        print(f"  skipped rag.generate_response: {e}")
+        return None
+
+    settings.CHROMA_DB_PATH = tempfile.mkdtemp(prefix="bench_chroma_")
+    rag_system = RAGSystem(SentenceTransformer(settings.EMBEDDING_MODEL))
+    ctx.run(rag_system.initialize())
+    texts = iter(range(10 ** 9))
+    return lambda: ctx.run(rag_system.generate_response(SAMPLE_TEXTS[next(texts) % len(SAMPLE_TEXTS)]))
+
+
+@benchmark("tickets.create", repeats=200)
+def bench_create_ticket(ctx: BenchContext):
+    counter = iter(range(10 ** 9))
+
+    async def create():
+        i = next(counter)
+        async with AsyncSessionLocal() as db:
+            await create_ticket(TicketCreate(
+                customer_name="Bench Customer",
+                customer_email="bench@example.com",
+                subject=f"Benchmark ticket {i}",
+                description=SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+            ), db)
+    return lambda: ctx.run(create())
+
+
+@benchmark("routing.route_ticket", repeats=200)
+def bench_route_ticket(ctx: BenchContext):
+    needed = 200 + 5  # repeats + warmup
+    db = SessionLocal()
+    ticket_ids = [
+        ticket_id for ticket_id, in db.query(Ticket.id).filter(
+            Ticket.status == TicketStatus.OPEN,
+            Ticket.assigned_to.is_(None)
+        ).order_by(Ticket.id).limit(needed)
+    ]
+    # Make sure every pick can be claimed, whatever load the dataset left
+    db.execute(update(Agent).values(
+        max_tickets=Agent.open_ticket_count + needed,
+        is_active=True,
+        is_available=True
+    ))
+    db.commit()
+    get_routing_index().mark_stale()
+    if len(ticket_ids) < needed:
+        print(f"  skipped routing.route_ticket: only {len(ticket_ids)} open tickets")
+        db.close()
+        return None
+
+    ids = iter(ticket_ids)
+    return lambda: ctx.run(route_ticket_to_agent(next(ids), db))
+
+
+# --- Datasets ---
+
+def dataset_size() -> tuple:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(Ticket.id)).scalar(), db.query(func.count(Agent.id)).scalar()
+    finally:
+        db.close()
+
+
+def build_dataset(tickets: int, agents: int, seed: int = 42):
+    """Recreate the schema and load synthetic agents and tickets with batched inserts"""
+    rng = random.Random(seed)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    categories = list(TicketCategory)
+    skills = [c.value for c in categories] + ["general"]
+    priorities = list(TicketPriority)
+    statuses = [TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.RESOLVED, TicketStatus.CLOSED]
+    status_weights = [30, 20, 35, 15]
+    sentiments = ["negative", "neutral", "positive"]
+    now = datetime.now(timezone.utc)
+
+    with engine.begin() as conn:
+        conn.execute(insert(Agent), [
+            {
+                "name": f"Bench Agent {i}",
+                "email": f"bench-agent-{i}@example.com",
+                "expertise": ",".join(rng.sample(skills, 2)),
+                "max_tickets": 15,
+                "is_active": True,
+                "is_available": rng.random() > 0.1,
+                "customer_satisfaction_score": round(rng.uniform(3.0, 5.0), 2),
+                "average_resolution_time": round(rng.uniform(0.5, 30.0), 2)
+            }
+            for i in range(agents)
+        ])
+        agent_ids = [agent_id for agent_id, in conn.execute(select(Agent.id))]
+
+    started = time.perf_counter()
+    for start in range(0, tickets, INSERT_BATCH):
+        rows = []
+        for i in range(start, min(start + INSERT_BATCH, tickets)):
+            status = rng.choices(statuses, status_weights)[0]
+            created_at = now - timedelta(seconds=rng.randrange(90 * 86400))
+            rows.append({
+                "ticket_number": f"BENCH-{i:09d}",
+                "customer_name": f"Customer {i % 5000}",
+                "customer_email": f"customer{i % 5000}@example.com",
+                "subject": f"Synthetic ticket {i}",
+                "description": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)],
+                "category": rng.choice(categories),
+                "category_confidence": round(rng.uniform(0.3, 1.0), 2),
+                "priority": rng.choice(priorities),
+                "sentiment": rng.choice(sentiments),
+                "sentiment_score": round(rng.random(), 2),
+                "urgency_score": round(rng.random(), 2),
+                "status": status,
+                "assigned_to": rng.choice(agent_ids) if status != TicketStatus.OPEN else None,
+                "created_at": created_at,
+                "resolved_at": (
+                    created_at + timedelta(hours=rng.uniform(0.5, 72))
+                    if status in (TicketStatus.RESOLVED, TicketStatus.CLOSED) else None
+                )
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Ticket), rows)
+
+    # Bulk inserts bypass the ORM listeners, so derive the rollup and counters
+    db = SessionLocal()
+    try:
+        rebuild_daily_stats(db)
+        repair_open_ticket_counts(db)
+    finally:
+        db.close()
+    print(f"  loaded {tickets} tickets in {time.perf_counter() - started:.1f}s")
+
+
+# --- Runner ---
+
+def measure(fn: Callable[[], object], repeats: int, warmup: int = 5) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "repeats": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "median_ms": round(median * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "stdev_ms": round(statistics.stdev(ordered) * 1000, 4) if len(ordered) > 1 else 0.0,
+        "ops_per_sec": round(1 / median, 2) if median > 0 else None
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def run_dataset(name: str, tickets: int, agents: int, reuse: bool, only: Optional[set], first: bool) -> List[Dict]:
+    print(f"dataset {name}: {tickets} tickets, {agents} agents")
+    if reuse and dataset_size() == (tickets, agents):
+        print("  reusing existing data")
+    else:
+        build_dataset(tickets, agents)
+
+    ctx = BenchContext(name, tickets, agents)
+    results = []
+    try:
+        for bench_name, repeats, per_dataset, factory in BENCHMARKS:
+            if only and bench_name not in only:
+                continue
+            if not per_dataset and not first:
+                continue
+            fn = factory(ctx)
+            if fn is None:
+                results.append({"benchmark": bench_name, "dataset": name, "skipped": True})
+                continue
+            # Per-ticket warnings (e.g. no agent available) would swamp the report
+            logging.disable(logging.WARNING)
+            try:
+                samples = measure(fn, repeats)
+            finally:
+                logging.disable(logging.NOTSET)
+            stats = summarize(samples)
+            print(f"  {bench_name:<32} median {stats['median_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms")
+            results.append({
+                "benchmark": bench_name,
+                "dataset": name if per_dataset else None,
+                "tickets": tickets if per_dataset else None,
+                "agents": agents if per_dataset else None,
+                **stats
+            })
+    finally:
+        ctx.run(async_engine.dispose())
+        ctx.loop.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="small", help=f"comma-separated, from {', '.join(DATASETS)}")
+    parser.add_argument("--tickets", type=int, help="custom dataset size (with --agents) instead of --datasets")
+    parser.add_argument("--agents", type=int)
+    parser.add_argument("--benchmarks", help="comma-separated benchmark names to run (default all)")
+    parser.add_argument("--reuse", action="store_true", help="keep existing data of the right size")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"))
+    args = parser.parse_args()
+
+    if args.tickets:
+        datasets = [(f"custom-{args.tickets}-{args.agents or 10}", args.tickets, args.agents or 10)]
+    else:
+        unknown = [d for d in args.datasets.split(",") if d not in DATASETS]
+        if unknown:
+            parser.error(f"unknown datasets: {unknown}")
+        datasets = [(d, *DATASETS[d]) for d in args.datasets.split(",")]
+    only = set(args.benchmarks.split(",")) if args.benchmarks else None
+
+    results = []
+    for i, (name, tickets, agents) in enumerate(datasets):
+        results.extend(run_dataset(name, tickets, agents, args.reuse, only, first=i == 0))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+        },
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
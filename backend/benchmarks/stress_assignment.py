@@ -0,0 +1,205 @@
+"""
+Concurrency stress check for ticket assignment
+
+Creates a batch of agents with small capacities and more open tickets than
+they can take, then lets many threads assign at once:
+
+  route   - every worker drains the backlog with route_next_open_ticket
+            (SELECT ... FOR UPDATE SKIP LOCKED + conditional capacity claim),
+            limited to this run's tickets and agents
+  assign  - every worker assigns and reassigns random tickets to random
+            agents the way POST /tickets/{id}/assign does
+
+Afterwards it verifies from the tickets table that no agent is over
+max_tickets and that agents.open_ticket_count matches the real count.
+Exits non-zero on any violation. Row locks need PostgreSQL; other databases
+are run with a single worker.
+
+Run: DATABASE_URL=postgresql://... python benchmarks/stress_assignment.py [--mode route|assign]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, or_  # noqa: E402
+
+from app.core.database import SessionLocal, engine, Base, ensure_columns  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.agent_load import assign_ticket_to_agent, on_load_committed  # noqa: E402
+from app.services.routing import route_next_open_ticket  # noqa: E402
+from app.services.routing_index import RoutingIndex  # noqa: E402
+from models.ticket import Agent, Ticket, TicketCategory, TicketStatus  # noqa: E402
+
+
+CATEGORIES = [c.value for c in TicketCategory]
+
+
+def create_fixture(run_id: str, agents: int, capacity: int, tickets: int):
+    db = SessionLocal()
+    try:
+        agent_rows = [
+            Agent(
+                name=f"Stress Agent {i}",
+                email=f"stress-{run_id}-{i}@example.com",
+                expertise=",".join(random.sample(CATEGORIES + ["general"], 2)),
+                max_tickets=capacity,
+                customer_satisfaction_score=random.choice([0.0, 3.5, 4.8]),
+                average_resolution_time=random.choice([0.0, 2.0, 20.0])
+            )
+            for i in range(agents)
+        ]
+        db.add_all(agent_rows)
+        db.add_all([
+            Ticket(
+                ticket_number=f"STRESS-{run_id}-{i}",
+                customer_name="Stress Test",
+                customer_email="stress@example.com",
+                subject="Concurrency stress ticket",
+                description="Generated by benchmarks/stress_assignment.py",
+                category=random.choice(list(TicketCategory))
+            )
+            for i in range(tickets)
+        ])
+        db.commit()
+        return [agent.id for agent in agent_rows]
+    finally:
+        db.close()
+
+
+def route_worker(run_id: str, index: RoutingIndex, stats: dict, lock: threading.Lock):
+    # Only this run's tickets and agents, so real tickets are never routed
+    conditions = [Ticket.ticket_number.like(f"STRESS-{run_id}-%")]
+    while True:
+        db = SessionLocal()
+        try:
+            routed = asyncio.run(route_next_open_ticket(db, conditions, index))
+        finally:
+            db.close()
+        if routed is None:
+            return
+        with lock:
+            stats["assigned"] += 1
+
+
+def assign_worker(run_id: str, agent_ids: list, operations: int, stats: dict, lock: threading.Lock):
+    for _ in range(operations):
+        db = SessionLocal()
+        try:
+            ticket = db.query(Ticket).filter(
+                Ticket.ticket_number == f"STRESS-{run_id}-{random.randrange(stats['tickets'])}"
+            ).with_for_update().first()
+            ok = assign_ticket_to_agent(db, ticket, random.choice(agent_ids))
+            if ok:
+                db.commit()
+            else:
+                db.rollback()
+        except Exception as e:
+            db.rollback()
+            ok = False
+            with lock:
+                stats["errors"] += 1
+                stats["last_error"] = repr(e)
+        finally:
+            db.close()
+        with lock:
+            stats["assigned" if ok else "rejected"] += 1
+
+
+def verify(agent_ids: list) -> list:
+    db = SessionLocal()
+    try:
+        actual = dict(db.query(Ticket.assigned_to, func.count(Ticket.id)).filter(
+            Ticket.assigned_to.in_(agent_ids),
+            or_(Ticket.status.is_(None), Ticket.status != TicketStatus.CLOSED)
+        ).group_by(Ticket.assigned_to).all())
+
+        problems = []
+        for agent in db.query(Agent).filter(Agent.id.in_(agent_ids)):
+            count = actual.get(agent.id, 0)
+            if count > agent.max_tickets:
+                problems.append(f"agent {agent.id} holds {count} tickets, max_tickets={agent.max_tickets}")
+            if count != agent.open_ticket_count:
+                problems.append(f"agent {agent.id} open_ticket_count={agent.open_ticket_count}, actual={count}")
+        return problems
+    finally:
+        db.close()
+
+
+def cleanup(run_id: str, agent_ids: list):
+    db = SessionLocal()
+    try:
+        for ticket in db.query(Ticket).filter(Ticket.ticket_number.like(f"STRESS-{run_id}-%")):
+            db.delete(ticket)
+        db.query(Agent).filter(Agent.id.in_(agent_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["route", "assign"], default="route")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=5)
+    parser.add_argument("--tickets", type=int, default=500)
+    parser.add_argument("--operations", type=int, default=100, help="assignments per worker in assign mode")
+    parser.add_argument("--keep", action="store_true", help="leave the generated rows in the database")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    if engine.dialect.name != "postgresql" and args.workers > 1:
+        # Without FOR UPDATE two workers can pick the same ticket and double count it
+        print(f"note: {engine.dialect.name} has no row locks, using 1 worker; run against PostgreSQL for a real test")
+        args.workers = 1
+
+    run_id = uuid.uuid4().hex[:6]
+    agent_ids = create_fixture(run_id, args.agents, args.capacity, args.tickets)
+    stats = {"assigned": 0, "rejected": 0, "errors": 0, "tickets": args.tickets}
+    lock = threading.Lock()
+    index = RoutingIndex(settings.ROUTING_INDEX_RESYNC_SECONDS, agent_ids=agent_ids)
+    on_load_committed(index.apply_load_deltas)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for _ in range(args.workers):
+            if args.mode == "route":
+                pool.submit(route_worker, run_id, index, stats, lock)
+            else:
+                pool.submit(assign_worker, run_id, agent_ids, args.operations, stats, lock)
+    elapsed = time.perf_counter() - started
+
+    problems = verify(agent_ids)
+    capacity = args.agents * args.capacity
+
+    print(f"mode={args.mode} workers={args.workers} agents={args.agents} capacity={capacity} tickets={args.tickets}")
+    print(f"assigned={stats['assigned']} rejected={stats['rejected']} errors={stats['errors']} "
+          f"in {elapsed:.2f}s ({stats['assigned'] / elapsed:.0f} assignments/s)")
+    if stats.get("last_error"):
+        print(f"last error: {stats['last_error']}")
+    if args.mode == "route" and stats["assigned"] > capacity:
+        problems.append(f"routed {stats['assigned']} tickets into {capacity} slots")
+
+    if not args.keep:
+        cleanup(run_id, agent_ids)
+
+    if problems:
+        print("FAILED")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("OK: no agent over capacity, counters consistent")
+
+
+if __name__ == "__main__":
+    main()
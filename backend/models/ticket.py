@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Enum, Boolean
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Text, Date, DateTime, Float, ForeignKey, Enum, Boolean, Index,
+    Sequence, event
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -72,10 +75,54 @@ class Ticket(Base):
     agent = relationship("Agent", back_populates="tickets")
     responses = relationship("TicketResponse", back_populates="ticket", cascade="all, delete-orphan")
     
+    # Listing filters, each ending in the (created_at, id) keyset order
+    __table_args__ = (
+        Index("ix_tickets_created_at_id", "created_at", "id"),
+        Index("ix_tickets_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tickets_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_tickets_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_tickets_status_category_created_at_id", "status", "category", "created_at", "id"),
+        Index("ix_tickets_status_priority_created_at_id", "status", "priority", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Ticket {self.ticket_number}: {self.subject}>"
 
 
+class TicketDailyStat(Base):
+    """Ticket counts per creation day and current category/priority/status/sentiment"""
+    __tablename__ = "ticket_daily_stats"
+    
+    # Missing category/sentiment are stored as "" so every column can be part of the key
+    day = Column(Date, primary_key=True)
+    category = Column(String(30), primary_key=True, default="")
+    priority = Column(String(20), primary_key=True, default="")
+    status = Column(String(20), primary_key=True, default="")
+    sentiment = Column(String(20), primary_key=True, default="")
+    
+    ticket_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<TicketDailyStat {self.day} {self.category}/{self.status}: {self.ticket_count}>"
+
+
+# Ticket number suffixes come from this sequence on PostgreSQL (see app.services.ticket_numbers)
+ticket_number_sequence = Sequence("ticket_number_seq", metadata=Base.metadata)
+
+
+class TicketNumberCounter(Base):
+    """Single-row ticket number counter for databases without sequences"""
+    __tablename__ = "ticket_number_counter"
+    
+    id = Column(Integer, primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+
+
+@event.listens_for(TicketNumberCounter.__table__, "after_create")
+def _insert_counter_row(table, connection, **kw):
+    connection.execute(table.insert().values(id=1, next_value=1))
+
+
 class Agent(Base):
     """Agent model"""
     __tablename__ = "agents"
@@ -88,6 +135,9 @@ class Agent(Base):
     expertise = Column(String(500))  # Comma-separated categories
     max_tickets = Column(Integer, default=10)
     
+    # Assigned tickets that are not closed; maintained by app.services.agent_load
+    open_ticket_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Status
     is_active = Column(Boolean, default=True)
     is_available = Column(Boolean, default=True)
@@ -104,11 +154,6 @@ class Agent(Base):
     # Relationships
     tickets = relationship("Ticket", back_populates="agent")
     
-    @property
-    def current_ticket_count(self):
-        """Get current number of assigned tickets"""
-        return len([t for t in self.tickets if t.status != TicketStatus.CLOSED])
-    
     def __repr__(self):
         return f"<Agent {self.name} ({self.email})>"
 
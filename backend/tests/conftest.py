@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import, so point the app at a scratch SQLite database first
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="autosupport-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["ENRICHMENT_BACKEND"] = "eager"
+os.environ["ENRICHMENT_RAG_INDEXING"] = "False"
+os.environ["ANALYTICS_CACHE_BACKEND"] = "memory"
+os.environ["SUGGESTION_CACHE_ENABLED"] = "False"
+os.environ["ML_BACKGROUND_LOADING"] = "False"
+os.environ["GROQ_API_KEY"] = ""
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.analytics_cache import invalidate_analytics  # noqa: E402
+from app.services.routing_index import get_routing_index  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_schema():
+    """Empty tables for every test"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    get_routing_index().mark_stale()
+    invalidate_analytics()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
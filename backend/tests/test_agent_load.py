@@ -0,0 +1,65 @@
+from app.services.agent_load import repair_open_ticket_counts
+from models.ticket import Agent, Ticket
+
+
+def _agent(db, name: str, max_tickets: int = 5) -> int:
+    agent = Agent(name=name, email=f"{name.lower()}@example.com", expertise="general", max_tickets=max_tickets)
+    db.add(agent)
+    db.commit()
+    return agent.id
+
+
+def _ticket(db, number: int) -> int:
+    ticket = Ticket(
+        ticket_number=f"TKT-LOAD-{number}",
+        customer_name="Customer",
+        customer_email="customer@example.com",
+        subject="Load ticket",
+        description="Counts against an agent"
+    )
+    db.add(ticket)
+    db.commit()
+    return ticket.id
+
+
+def _open_counts(db, *agent_ids):
+    db.expire_all()
+    return [db.get(Agent, agent_id).open_ticket_count for agent_id in agent_ids]
+
+
+def test_open_ticket_count_follows_assign_reassign_close_reopen_and_delete(client, db):
+    alice, bob = _agent(db, "Alice"), _agent(db, "Bob")
+    ticket_id = _ticket(db, 1)
+
+    assert client.post(f"/api/v1/tickets/{ticket_id}/assign", json={"agent_id": alice}).status_code == 200
+    assert _open_counts(db, alice, bob) == [1, 0]
+
+    assert client.post(f"/api/v1/tickets/{ticket_id}/assign", json={"agent_id": bob}).status_code == 200
+    assert _open_counts(db, alice, bob) == [0, 1]
+
+    # Assigning to the current agent again does not count the ticket twice
+    assert client.post(f"/api/v1/tickets/{ticket_id}/assign", json={"agent_id": bob}).status_code == 200
+    assert _open_counts(db, alice, bob) == [0, 1]
+
+    assert client.put(f"/api/v1/tickets/{ticket_id}", json={"status": "closed"}).status_code == 200
+    assert _open_counts(db, alice, bob) == [0, 0]
+
+    assert client.put(f"/api/v1/tickets/{ticket_id}", json={"status": "open"}).status_code == 200
+    assert _open_counts(db, alice, bob) == [0, 1]
+
+    assert client.delete(f"/api/v1/tickets/{ticket_id}").status_code == 204
+    assert _open_counts(db, alice, bob) == [0, 0]
+    assert repair_open_ticket_counts(db) == 0
+
+
+def test_assignment_is_refused_once_an_agent_is_at_capacity(client, db):
+    agent_id = _agent(db, "Carol", max_tickets=1)
+    first, second = _ticket(db, 1), _ticket(db, 2)
+
+    assert client.post(f"/api/v1/tickets/{first}/assign", json={"agent_id": agent_id}).status_code == 200
+    response = client.post(f"/api/v1/tickets/{second}/assign", json={"agent_id": agent_id})
+
+    assert response.status_code == 400
+    assert _open_counts(db, agent_id) == [1]
+    assert db.get(Ticket, second).assigned_to is None
+    assert repair_open_ticket_counts(db) == 0
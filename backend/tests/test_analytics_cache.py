@@ -0,0 +1,48 @@
+import asyncio
+
+from app.services.analytics_cache import AnalyticsCache, MemoryAnalyticsStore
+
+
+class _SlowSession:
+    """Stands in for AsyncSession.run_sync with a computation that takes a while"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run_sync(self, compute):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return compute(None)
+
+
+def _cache():
+    return AnalyticsCache(MemoryAnalyticsStore(), ttl_seconds=60, stale_seconds=0, wait_seconds=5)
+
+
+def test_concurrent_misses_share_one_computation_without_threads(monkeypatch):
+    async def no_threads(*args, **kwargs):
+        raise AssertionError("memory store waits must stay on the event loop")
+
+    monkeypatch.setattr(asyncio, "to_thread", no_threads)
+    cache, db = _cache(), _SlowSession()
+
+    async def burst():
+        return await asyncio.gather(*[cache.get_or_compute("stats", lambda _: 42, db) for _ in range(20)])
+
+    assert asyncio.run(burst()) == [42] * 20
+    assert db.calls == 1
+    assert cache.misses == 20
+
+
+def test_requests_after_invalidation_do_not_join_an_older_computation():
+    cache, db = _cache(), _SlowSession()
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_compute("stats", lambda _: "before", db))
+        await asyncio.sleep(0.01)
+        cache.invalidate()
+        second = await cache.get_or_compute("stats", lambda _: "after", db)
+        return await first, second
+
+    assert asyncio.run(scenario()) == ("before", "after")
+    assert db.calls == 2
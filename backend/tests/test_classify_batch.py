@@ -0,0 +1,63 @@
+import pickle
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from app.api.v1 import ml as ml_api
+from app.core.config import settings
+from app.ml.classifier import TfidfClassifier
+
+TEXTS = [
+    "I was charged twice, please refund the payment",
+    "The app crashes with an error on startup",
+    "Cannot login, password reset does not work",
+]
+
+
+@pytest.fixture
+def trained_classifier(tmp_path):
+    labels = ["billing", "technical", "account"]
+    vectorizer = TfidfVectorizer()
+    model = MultinomialNB().fit(vectorizer.fit_transform(TEXTS * 3), labels * 3)
+    with open(tmp_path / "classifier.pkl", "wb") as f:
+        pickle.dump(model, f)
+    with open(tmp_path / "vectorizer.pkl", "wb") as f:
+        pickle.dump(vectorizer, f)
+
+    classifier = TfidfClassifier(str(tmp_path))
+    assert classifier.load()
+    return classifier
+
+
+def test_batch_uses_the_trained_model_and_matches_single_predictions(client, monkeypatch, trained_classifier):
+    monkeypatch.setattr(ml_api, "get_classifier", lambda: trained_classifier)
+
+    response = client.post("/api/v1/ml/classify/batch", json={"texts": TEXTS})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["model"] == "tfidf_naive_bayes"
+    assert [r["category"] for r in body["results"]] == ["billing", "technical", "account"]
+    assert body["results"] == [trained_classifier.predict(text) for text in TEXTS]
+
+
+def test_batch_falls_back_to_keyword_rules_in_input_order(client, monkeypatch, tmp_path):
+    missing = TfidfClassifier(str(tmp_path))
+    missing.load()
+    monkeypatch.setattr(ml_api, "get_classifier", lambda: missing)
+
+    response = client.post("/api/v1/ml/classify/batch", json={"texts": TEXTS})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["model"] == "keyword_rules"
+    singles = [client.post("/api/v1/ml/classify", json={"text": text}).json() for text in TEXTS]
+    assert body["results"] == singles
+
+
+def test_batch_rejects_oversized_and_empty_requests(client, monkeypatch):
+    monkeypatch.setattr(settings, "CLASSIFY_BATCH_MAX_SIZE", 2)
+
+    assert client.post("/api/v1/ml/classify/batch", json={"texts": TEXTS}).status_code == 400
+    assert client.post("/api/v1/ml/classify/batch", json={"texts": []}).status_code == 422
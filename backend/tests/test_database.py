@@ -0,0 +1,16 @@
+from sqlalchemy import inspect
+
+from app.core.database import engine, ensure_indexes
+from models.ticket import Ticket
+
+
+def test_ensure_indexes_adds_indexes_missing_from_an_existing_table():
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_tickets_status_created_at_id")
+
+    created = ensure_indexes()
+
+    assert created == ["ix_tickets_status_created_at_id"]
+    names = {index["name"] for index in inspect(engine).get_indexes(Ticket.__tablename__)}
+    assert {index.name for index in Ticket.__table__.indexes} <= names
+    assert ensure_indexes() == []
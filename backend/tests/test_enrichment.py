@@ -0,0 +1,52 @@
+from app.tasks.enrichment import run_enrichment
+from models.ticket import Agent, Ticket, TicketCategory, TicketStatus
+
+
+def _ticket(db, number, description, **values):
+    ticket = Ticket(
+        ticket_number=number,
+        customer_name="Test Customer",
+        customer_email="customer@example.com",
+        subject="Help needed",
+        description=description,
+        **values
+    )
+    db.add(ticket)
+    db.commit()
+    return ticket.id
+
+
+def test_enrich_tickets_scores_and_routes_unscored_ticket(db):
+    db.add(Agent(name="Billing Agent", email="billing@example.com", expertise="billing", max_tickets=5))
+    db.commit()
+    ticket_id = _ticket(db, "TKT-TEST-1", "I was charged twice on my invoice, please refund the payment")
+
+    result = run_enrichment([ticket_id])
+
+    db.expire_all()
+    ticket = db.get(Ticket, ticket_id)
+    assert result["enriched"] == 1
+    assert result["routed"] == 1
+    assert ticket.category == TicketCategory.BILLING
+    assert ticket.sentiment is not None
+    assert ticket.urgency_score is not None
+    assert ticket.assigned_to is not None
+    assert ticket.status == TicketStatus.IN_PROGRESS
+
+
+def test_enrich_tickets_routes_pre_scored_ticket_without_rescoring(db):
+    db.add(Agent(name="Tech Agent", email="tech@example.com", expertise="technical", max_tickets=5))
+    db.commit()
+    scored_id = _ticket(
+        db, "TKT-TEST-2", "The app crashes on upload",
+        category=TicketCategory.TECHNICAL, sentiment="neutral", sentiment_score=0.5, urgency_score=0.4
+    )
+    unscored_id = _ticket(db, "TKT-TEST-3", "I cannot login to my account")
+
+    result = run_enrichment([scored_id, unscored_id])
+
+    db.expire_all()
+    assert result["enriched"] == 1
+    assert result["routed"] == 2
+    assert db.get(Ticket, scored_id).sentiment == "neutral"
+    assert db.get(Ticket, unscored_id).sentiment is not None
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.export import EXPORT_COLUMNS
+from models.ticket import Ticket, TicketCategory, TicketPriority, TicketStatus
+
+
+@pytest.fixture
+def tickets(db, monkeypatch):
+    # Several yield_per partitions for five tickets
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    start = datetime(2026, 2, 1)
+    # Inserted out of order; the export sorts by created_at
+    for i, minutes in enumerate([30, 10, 40, 0, 20]):
+        db.add(Ticket(
+            ticket_number=f"TKT-EXPORT-{i}",
+            customer_name="Customer, Jr.",
+            customer_email="customer@example.com",
+            subject=f"Export ticket {i}",
+            description="Line one\nline \"two\"",
+            category=TicketCategory.BILLING,
+            priority=TicketPriority.HIGH,
+            status=TicketStatus.RESOLVED if i == 2 else TicketStatus.OPEN,
+            created_at=start + timedelta(minutes=minutes)
+        ))
+    db.commit()
+
+
+def test_ndjson_export_streams_every_ticket_oldest_first(client, tickets):
+    response = client.get("/api/v1/tickets/export", params={"format": "ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["ticket_number"] for row in rows] == [
+        "TKT-EXPORT-3", "TKT-EXPORT-1", "TKT-EXPORT-4", "TKT-EXPORT-0", "TKT-EXPORT-2"
+    ]
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert rows[0]["category"] == "billing"
+    assert rows[0]["priority"] == "high"
+    assert rows[0]["created_at"].startswith("2026-02-01T00:00:00")
+    assert rows[0]["description"] == "Line one\nline \"two\""
+
+
+def test_csv_export_has_a_header_and_applies_filters(client, tickets):
+    response = client.get("/api/v1/tickets/export", params={"format": "csv", "status": "open"})
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=tickets.csv"
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames == EXPORT_COLUMNS
+    rows = list(reader)
+    assert [row["ticket_number"] for row in rows] == [
+        "TKT-EXPORT-3", "TKT-EXPORT-1", "TKT-EXPORT-4", "TKT-EXPORT-0"
+    ]
+    assert rows[0]["customer_name"] == "Customer, Jr."
+    assert rows[0]["status"] == "open"
+
+
+def test_unknown_export_format_is_rejected(client):
+    assert client.get("/api/v1/tickets/export", params={"format": "xml"}).status_code == 400
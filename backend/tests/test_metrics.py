@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import instrument_engine
+
+
+def _sample(name: str, label: str):
+    return REGISTRY.get_sample_value(name, {"engine": label}) or 0
+
+
+def test_pool_metrics_survive_engine_dispose():
+    path = os.path.join(tempfile.mkdtemp(prefix="autosupport-metrics-"), "pool.db")
+    engine = create_engine(f"sqlite:///{path}", pool_size=2, max_overflow=0)
+    instrument_engine(engine, "test-dispose")
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert _sample("db_pool_checked_out_connections", "test-dispose") == 1
+    assert _sample("db_pool_checked_out_connections", "test-dispose") == 0
+
+    # dispose() replaces the pool; waits and checkouts must still be recorded
+    engine.dispose()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT 1"))
+        assert _sample("db_pool_checked_out_connections", "test-dispose") == 1
+
+    assert _sample("db_pool_checkout_wait_seconds_count", "test-dispose") == 2
+    assert _sample("db_pool_checked_out_connections", "test-dispose") == 0
+    engine.dispose()
@@ -0,0 +1,17 @@
+def test_models_status(client):
+    response = client.get("/api/v1/ml/models/status")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert "tfidf_classifier" in body
+    assert body["groq_ai"] is False
+
+
+def test_ready_reports_disabled_when_models_are_not_loaded(client):
+    # The test settings turn ML_BACKGROUND_LOADING off
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "disabled"
+    assert body["models"]["sentiment"]["state"] == "pending"
@@ -0,0 +1,54 @@
+import pytest
+
+from app.core.query_stats import assert_query_budget
+from models.ticket import Agent, Ticket, TicketResponse, TicketStatus
+
+
+@pytest.fixture
+def populated(db):
+    """Five agents with a handful of tickets and responses each"""
+    agents = [
+        Agent(name=f"Agent {i}", email=f"agent{i}@example.com", expertise="technical,billing", max_tickets=20)
+        for i in range(5)
+    ]
+    db.add_all(agents)
+    db.flush()
+    for agent in agents:
+        for j in range(4):
+            ticket = Ticket(
+                ticket_number=f"TKT-BUDGET-{agent.id}-{j}",
+                customer_name="Customer",
+                customer_email="customer@example.com",
+                subject="Budget ticket",
+                description="Ticket used by the query budget tests",
+                status=TicketStatus.RESOLVED if j % 2 else TicketStatus.IN_PROGRESS,
+                assigned_to=agent.id
+            )
+            db.add(ticket)
+            db.flush()
+            db.add_all([
+                TicketResponse(ticket_id=ticket.id, message=f"Reply {k}", agent_name=agent.name)
+                for k in range(3)
+            ])
+    db.commit()
+    return {"agent_id": agents[0].id, "ticket_id": db.query(Ticket.id).first()[0]}
+
+
+def test_agent_stats_query_budget(client, populated):
+    response = client.get(f"/api/v1/agents/{populated['agent_id']}/stats")
+    assert response.status_code == 200
+    assert_query_budget(response, 2)
+
+
+def test_ticket_responses_query_budget(client, populated):
+    response = client.get(f"/api/v1/tickets/{populated['ticket_id']}/responses")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert_query_budget(response, 2)
+
+
+def test_agent_list_query_budget(client, populated):
+    response = client.get("/api/v1/agents/")
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert_query_budget(response, 1)
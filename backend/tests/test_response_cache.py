@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services.response_cache import DiskCacheBackend, SemanticResponseCache
+
+RESPONSE = {"suggested_text": "We will refund the duplicate charge.", "confidence": 0.95, "reasoning": "llm"}
+
+
+def _cache(backend, sync_seconds=30.0):
+    return SemanticResponseCache(
+        threshold=0.85, max_entries=100, ttl_seconds=3600, backend=backend, sync_seconds=sync_seconds
+    )
+
+
+class CountingBackend(DiskCacheBackend):
+    fetches = 0
+
+    async def fetch(self, category, since=0.0):
+        self.fetches += 1
+        return await super().fetch(category, since)
+
+
+def test_misses_pull_backend_entries_at_most_once_per_sync_interval(tmp_path):
+    backend = CountingBackend(str(tmp_path / "cache.db"), max_entries=100, ttl_seconds=3600)
+    writer, reader = _cache(backend), _cache(backend)
+
+    async def scenario():
+        assert await reader.get("billing", "I was charged twice this month") is None
+        await writer.put("billing", "I was charged twice this month", RESPONSE)
+        # Within the sync interval the reader does not go back to the backend
+        assert await reader.get("billing", "I was charged twice this month") is None
+        assert backend.fetches == 1
+
+        reader._synced_at.clear()
+        return await reader.get("billing", "I was charged twice this month!")
+
+    hit = asyncio.run(scenario())
+    assert hit["suggested_text"] == RESPONSE["suggested_text"]
+    assert backend.fetches == 2
+
+
+def test_disk_backend_fetch_returns_only_newer_entries(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path / "cache.db"), max_entries=100, ttl_seconds=3600)
+    cache = _cache(backend)
+
+    async def scenario():
+        await cache.put("billing", "refund my double payment", RESPONSE)
+        entries = await backend.fetch("billing")
+        newest = max(e.created_at for e in entries)
+        return entries, await backend.fetch("billing", since=newest)
+
+    everything, newer = asyncio.run(scenario())
+    assert len(everything) == 1
+    assert newer == []
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.core.database import engine
+from app.main import app
+from app.services.rollups import rebuild_daily_stats
+from models.ticket import Ticket, TicketDailyStat, TicketStatus
+
+
+def _rollup(db):
+    return sorted(
+        (row.day, row.category, row.priority, row.status, row.sentiment, row.ticket_count)
+        for row in db.query(TicketDailyStat).all()
+    )
+
+
+def test_incremental_rollup_matches_rebuild_across_time_zones(db):
+    late_evening_new_york = datetime(2026, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5)))
+    for i, created_at in enumerate([late_evening_new_york, None]):
+        db.add(Ticket(
+            ticket_number=f"TKT-ROLLUP-{i}",
+            customer_name="Customer",
+            customer_email="customer@example.com",
+            subject="Rollup ticket",
+            description="Counted in ticket_daily_stats",
+            created_at=created_at
+        ))
+    db.commit()
+
+    incremental = _rollup(db)
+    rebuild_daily_stats(db)
+
+    assert incremental == _rollup(db)
+    # 23:30 in New York is already the next day in UTC
+    assert incremental[0][0].isoformat() == "2026-03-02"
+
+
+def test_startup_backfills_a_newly_created_rollup_table(db):
+    for i in range(3):
+        db.add(Ticket(
+            ticket_number=f"TKT-BACKFILL-{i}",
+            customer_name="Customer",
+            customer_email="customer@example.com",
+            subject="Older ticket",
+            description="Created before the rollup table existed"
+        ))
+    db.commit()
+    expected = _rollup(db)
+    db.close()
+    TicketDailyStat.__table__.drop(bind=engine)
+
+    with TestClient(app):
+        pass
+
+    assert _rollup(db) == expected
+
+    # A status change on an older ticket moves its count instead of going negative
+    ticket = db.query(Ticket).first()
+    ticket.status = TicketStatus.RESOLVED
+    db.commit()
+    counts = [row[-1] for row in _rollup(db)]
+    assert sorted(counts) == [1, 2]
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.services.routing import plan_backlog_assignment, route_ticket_to_agent
+from app.services.routing_index import RoutingIndex, expertise_score, parse_expertise
+from models.ticket import Agent, Ticket, TicketCategory, TicketPriority
+
+
+def test_limited_plan_takes_most_urgent_then_oldest(db):
+    db.add(Agent(name="Agent", email="agent@example.com", expertise="technical", max_tickets=10))
+    start = datetime(2026, 1, 1)
+    for i, priority in enumerate([TicketPriority.LOW, TicketPriority.URGENT, TicketPriority.MEDIUM,
+                                  TicketPriority.URGENT, TicketPriority.HIGH]):
+        db.add(Ticket(
+            ticket_number=f"TKT-PLAN-{i}",
+            customer_name="Customer",
+            customer_email="customer@example.com",
+            subject="Backlog ticket",
+            description="Needs an agent",
+            category=TicketCategory.TECHNICAL,
+            priority=priority,
+            created_at=start + timedelta(minutes=i)
+        ))
+    db.commit()
+
+    plan = plan_backlog_assignment(db, limit=3)
+
+    assert plan.tickets_considered == 3
+    assert [a["ticket_number"] for a in plan.assignments] == ["TKT-PLAN-1", "TKT-PLAN-3", "TKT-PLAN-4"]
+
+
+def test_routing_a_missing_ticket_is_reported_as_not_found(db, caplog):
+    routed = asyncio.run(route_ticket_to_agent(12345, db))
+
+    assert routed is False
+    assert [r.levelname for r in caplog.records if "12345" in r.getMessage()] == ["ERROR"]
+    assert "not found" in caplog.text
+    assert "another worker" not in caplog.text
+
+
+def test_trailing_commas_in_expertise_are_not_a_skill(db):
+    assert parse_expertise("Billing, ") == frozenset({"billing"})
+    assert parse_expertise("billing,,technical,") == frozenset({"billing", "technical"})
+
+    # Neither agent knows technical; the better-rated one must win on its own merits
+    db.add(Agent(name="Trailing", email="trailing@example.com", expertise="billing,",
+                 customer_satisfaction_score=3.0))
+    db.add(Agent(name="Clean", email="clean@example.com", expertise="account",
+                 customer_satisfaction_score=4.5))
+    db.commit()
+    index = RoutingIndex(60)
+    index.resync(db)
+
+    agent, score = index.best_agent("technical")
+    assert agent.name == "Clean"
+    assert expertise_score("technical", parse_expertise("billing,")) == 0
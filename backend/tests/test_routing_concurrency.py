@@ -0,0 +1,123 @@
+"""
+Concurrent routing against PostgreSQL
+
+SQLite has no row locks, so FOR UPDATE SKIP LOCKED and the conditional
+capacity claim only race for real on PostgreSQL. Point TEST_POSTGRES_URL at
+a database the tests may write to; the rows created here are removed again.
+
+Run: TEST_POSTGRES_URL=postgresql://... pytest tests/test_routing_concurrency.py
+"""
+
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, func, or_
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.services.routing import route_next_open_ticket
+from app.services.routing_index import RoutingIndex
+from models.ticket import Agent, Ticket, TicketCategory, TicketStatus
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+WORKERS = 12
+AGENTS = 6
+CAPACITY = 4
+TICKETS = 60
+
+
+@pytest.fixture
+def pg_sessions():
+    engine = create_engine(POSTGRES_URL, pool_size=WORKERS, max_overflow=0)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def pg_fixture(pg_sessions):
+    run_id = uuid.uuid4().hex[:6]
+    db = pg_sessions()
+    try:
+        agents = [
+            Agent(name=f"Concurrency Agent {i}", email=f"concurrency-{run_id}-{i}@example.com",
+                  expertise="technical,billing", max_tickets=CAPACITY)
+            for i in range(AGENTS)
+        ]
+        db.add_all(agents)
+        db.add_all([
+            Ticket(
+                ticket_number=f"CONC-{run_id}-{i}",
+                customer_name="Concurrency Test",
+                customer_email="concurrency@example.com",
+                subject="Concurrent routing ticket",
+                description="Routed by several threads at once",
+                category=TicketCategory.TECHNICAL if i % 2 else TicketCategory.BILLING
+            )
+            for i in range(TICKETS)
+        ])
+        db.commit()
+        agent_ids = [agent.id for agent in agents]
+    finally:
+        db.close()
+
+    yield run_id, agent_ids
+
+    db = pg_sessions()
+    try:
+        for ticket in db.query(Ticket).filter(Ticket.ticket_number.like(f"CONC-{run_id}-%")):
+            db.delete(ticket)
+        db.query(Agent).filter(Agent.id.in_(agent_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_concurrent_routing_never_overfills_an_agent(pg_sessions, pg_fixture):
+    run_id, agent_ids = pg_fixture
+    conditions = [Ticket.ticket_number.like(f"CONC-{run_id}-%")]
+    # Resync on every pick, so the index never hides the race on the capacity claim
+    index = RoutingIndex(0, agent_ids=agent_ids)
+    routed = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            db = pg_sessions()
+            try:
+                ticket_id = asyncio.run(route_next_open_ticket(db, conditions, index))
+            finally:
+                db.close()
+            if ticket_id is None:
+                return
+            with lock:
+                routed.append(ticket_id)
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        for future in [pool.submit(worker) for _ in range(WORKERS)]:
+            future.result()
+
+    assert len(routed) == len(set(routed))
+    assert 0 < len(routed) <= AGENTS * CAPACITY
+
+    db = pg_sessions()
+    try:
+        actual = dict(db.query(Ticket.assigned_to, func.count(Ticket.id)).filter(
+            Ticket.assigned_to.in_(agent_ids),
+            or_(Ticket.status.is_(None), Ticket.status != TicketStatus.CLOSED)
+        ).group_by(Ticket.assigned_to).all())
+        assert sum(actual.values()) == len(routed)
+        for agent in db.query(Agent).filter(Agent.id.in_(agent_ids)):
+            assert agent.open_ticket_count <= agent.max_tickets
+            assert agent.open_ticket_count == actual.get(agent.id, 0)
+    finally:
+        db.close()
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from app.ml.inference import MLService
+from benchmarks.bench_text_features import SAMPLES, check_equivalence, legacy_urgency
+
+CORPUS = list(SAMPLES.values()) + [
+    "",
+    "!!!",
+    "URGENT: PAYMENT FAILED AND THE SITE IS DOWN!!!",
+    "Thanks, the new feature is helpful and works great",
+    "I would like to add a suggestion: please implement dark mode, I wish it existed",
+    "Password reset email never arrives, unable to sign in with my username",
+    "Worst experience ever, I'm angry, upset and disappointed; filing a complaint",
+    "Das Konto ist GESPERRT, ich kann mich nicht anmelden – ÄRGERLICH!",
+    "Ошибка при оплате, списали деньги дважды",
+    "Where is my invoice? How to download the bill for the subscription?",
+    "The app is not working: crash on startup, error 500, bug reported twice",
+]
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_shared_matcher_matches_the_original_call_site_scans(text):
+    check_equivalence([text])
+
+
+def test_ml_service_keyword_sentiment_keeps_its_original_urgency():
+    service = MLService()
+    for text in CORPUS:
+        analysis = asyncio.run(service.analyze_sentiment(text))
+        assert analysis["urgency_score"] == legacy_urgency(text, analysis["sentiment"])
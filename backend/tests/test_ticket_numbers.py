@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime
+
+from app.core.database import engine
+from app.services.ticket_numbers import TicketNumberAllocator, format_ticket_number, reserve_ticket_numbers
+from models.ticket import TicketNumberCounter
+
+
+def test_format_ticket_number_pads_and_grows_the_base36_suffix():
+    day = datetime(2026, 3, 4)
+
+    assert format_ticket_number(1, day) == "TKT-20260304-000001"
+    assert format_ticket_number(36, day) == "TKT-20260304-000010"
+    assert format_ticket_number(36 ** 6 - 1, day) == "TKT-20260304-ZZZZZZ"
+    assert format_ticket_number(36 ** 6, day) == "TKT-20260304-1000000"
+
+
+def test_reserved_blocks_are_consecutive_and_disjoint():
+    with engine.begin() as conn:
+        first = reserve_ticket_numbers(conn, 3)
+        second = reserve_ticket_numbers(conn, 2)
+
+    assert first == [1, 2, 3]
+    assert second == [4, 5]
+
+
+def test_reserving_recreates_a_missing_counter_row():
+    with engine.begin() as conn:
+        conn.execute(TicketNumberCounter.__table__.delete())
+        assert reserve_ticket_numbers(conn, 2) == [1, 2]
+        assert reserve_ticket_numbers(conn, 0) == []
+
+
+def test_allocators_hand_out_unique_numbers_one_block_per_round_trip():
+    # Two allocators stand in for two worker processes
+    first, second = TicketNumberAllocator(block_size=4), TicketNumberAllocator(block_size=4)
+
+    async def allocate():
+        numbers = []
+        for _ in range(6):
+            numbers += await first.allocate()
+            numbers += await second.allocate()
+        # A request bigger than the block reserves exactly what it needs
+        numbers += await first.allocate(count=9)
+        return numbers
+
+    numbers = asyncio.run(allocate())
+
+    assert len(numbers) == 21
+    assert len(set(numbers)) == 21
+    assert first.blocks == 3
+    assert second.blocks == 2
+
+
+def test_created_tickets_get_distinct_numbers(client):
+    payload = {
+        "customer_name": "Customer",
+        "customer_email": "customer@example.com",
+        "subject": "Numbered ticket",
+        "description": "Needs a ticket number"
+    }
+
+    numbers = [client.post("/api/v1/tickets/", json=payload).json()["ticket_number"] for _ in range(3)]
+
+    assert len(set(numbers)) == 3
+    assert all(number.startswith("TKT-") for number in numbers)
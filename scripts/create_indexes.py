@@ -0,0 +1,38 @@
+"""
+Create missing indexes for AutoSupport
+
+Builds indexes that were added to the models after their tables existed.
+On PostgreSQL each one is created CONCURRENTLY IF NOT EXISTS, so the
+tickets table stays writable while it builds. Run once per deploy, before
+or alongside the new workers; the API does not build indexes at startup.
+
+A CONCURRENTLY build that fails leaves an INVALID index behind; drop it
+and run this again.
+
+Run: python scripts/create_indexes.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import engine, Base, ensure_indexes
+
+
+def main():
+    """Create every index the models define but the database lacks"""
+    print("🗂️  Creating missing indexes...")
+    
+    Base.metadata.create_all(bind=engine)
+    
+    created = ensure_indexes()
+    for name in created:
+        print(f"   + {name}")
+    
+    print(f"✅ Created {len(created)} indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Enrich tickets whose background enrichment never completed
+
+Tickets are classified, scored, routed and indexed after they are created
+(see app.tasks.enrichment). Tickets still queued when an API process
+stopped, or that ran out of retries, are left without a sentiment; this
+runs the pipeline for them in batches.
+
+Run: python scripts/enrich_pending.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.tasks.enrichment import find_unenriched_tickets, run_enrichment
+
+
+def main():
+    """Run the enrichment pipeline for every unenriched ticket"""
+    print("🔄 Enriching pending tickets...")
+    
+    db = SessionLocal()
+    try:
+        ticket_ids = find_unenriched_tickets(db)
+    finally:
+        db.close()
+    
+    totals = {"enriched": 0, "routed": 0, "indexed": 0}
+    batch_size = settings.ENRICHMENT_BATCH_SIZE
+    for start in range(0, len(ticket_ids), batch_size):
+        result = run_enrichment(ticket_ids[start:start + batch_size])
+        for key in totals:
+            totals[key] += result[key]
+    
+    print(f"✅ Enriched {totals['enriched']} tickets, routed {totals['routed']}, indexed {totals['indexed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Rebuild the ticket_daily_stats rollup for AutoSupport
+
+Recomputes the per-day trend counts from the tickets table. Run after bulk
+imports or to repair drift; normal ticket writes keep the rollup current.
+
+Run: python scripts/rebuild_rollups.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal, engine, Base
+from app.services.rollups import rebuild_daily_stats
+
+
+def main():
+    """Recreate the rollup from scratch"""
+    print("📊 Rebuilding ticket_daily_stats...")
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        rows = rebuild_daily_stats(db)
+    finally:
+        db.close()
+    
+    print(f"✅ Rebuilt {rows} daily rollup rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Repair per-agent open ticket counters for AutoSupport
+
+Recomputes agents.open_ticket_count from the tickets table. Ticket writes
+keep the counter current; run this after bulk SQL edits or to fix drift.
+
+Run: python scripts/repair_agent_counts.py
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal, engine, Base, ensure_columns
+from app.services.agent_load import repair_open_ticket_counts
+
+
+def main():
+    """Recompute every agent's open ticket count"""
+    print("🔧 Repairing agent open ticket counts...")
+    
+    Base.metadata.create_all(bind=engine)
+    ensure_columns()
+    
+    db = SessionLocal()
+    try:
+        fixed = repair_open_ticket_counts(db)
+    finally:
+        db.close()
+    
+    print(f"✅ Corrected {fixed} agents")
+
+
+if __name__ == "__main__":
+    main()
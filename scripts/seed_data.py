@@ -13,6 +13,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import SessionLocal, engine, Base
+from app.services import rollups, agent_load  # noqa: F401 - keeps rollups and agent counters in step with seeded tickets
 from models.ticket import Agent, Ticket, KnowledgeBase, TicketStatus, TicketPriority, TicketCategory
 from datetime import datetime, timedelta
 import random